@@ -1,55 +1,262 @@
 from django.contrib import admin
-from .models import Station, Route, Crew, TrainType, Train, Journey, Order, Ticket
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
+
+from .models import (
+    Station,
+    Route,
+    RouteStop,
+    Crew,
+    TrainType,
+    Fare,
+    Train,
+    Journey,
+    Order,
+    Ticket,
+    TicketCheckIn,
+    ArchivedTicket,
+    SlowQuery,
+    OrderNotification,
+)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Use the planner's row estimate for unfiltered changelists on Postgres.
+
+    An exact COUNT(*) over millions of tickets scans the whole table; the
+    estimate from pg_class is read in constant time. Small tables and
+    filtered changelists still get the exact count.
+    """
+
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is not None and not query.where:
+            connection = connections[self.object_list.db]
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                        [self.object_list.model._meta.db_table],
+                    )
+                    row = cursor.fetchone()
+                if row and row[0] > self.exact_count_threshold:
+                    return int(row[0])
+
+        return super().count
+
+
+class IdInputFilter(admin.SimpleListFilter):
+    """Filter by a related object's id typed into a box.
+
+    Replaces choice lists that would render every related row.
+    """
+
+    template = "admin/station/input_filter.html"
+    field_name = None
+
+    def lookups(self, request, model_admin):
+        return ((None, None),)
+
+    def choices(self, changelist):
+        yield {
+            "query_parts": [
+                (key, value)
+                for key, value in changelist.params.items()
+                if key != self.parameter_name
+            ]
+        }
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value and value.isdigit():
+            return queryset.filter(**{self.field_name: value})
+        return queryset
+
+
+class JourneyIdFilter(IdInputFilter):
+    title = "journey id"
+    parameter_name = "journey"
+    field_name = "journey_id"
+
+
+class OrderIdFilter(IdInputFilter):
+    title = "order id"
+    parameter_name = "order"
+    field_name = "order_id"
+
+
+class TicketJourneyIdFilter(IdInputFilter):
+    title = "journey id"
+    parameter_name = "journey"
+    field_name = "ticket__journey_id"
 
 
 @admin.register(Station)
 class StationAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "latitude", "longitude")
+    search_fields = ("name",)
+
+
+class RouteStopFormSet(BaseInlineFormSet):
+    def clean(self):
+        super().clean()
+        if any(form.instance.pk for form in self.deleted_forms):
+            RouteStop.validate_unbooked(self.instance.pk)
+
+
+class RouteStopInline(admin.TabularInline):
+    model = RouteStop
+    formset = RouteStopFormSet
+    extra = 1
+    autocomplete_fields = ("station",)
 
 
 @admin.register(Route)
 class RouteAdmin(admin.ModelAdmin):
+    inlines = (RouteStopInline,)
     list_display = ("id", "source", "destination", "distance")
+    list_select_related = ("source", "destination")
     search_fields = ("source__name", "destination__name")
+    autocomplete_fields = ("source", "destination")
 
 
 @admin.register(Crew)
 class CrewAdmin(admin.ModelAdmin):
     list_display = ("id", "first_name", "last_name")
+    search_fields = ("first_name", "last_name")
 
 
 @admin.register(TrainType)
 class TrainTypeAdmin(admin.ModelAdmin):
     list_display = ("id", "name")
+    search_fields = ("name",)
+
+
+@admin.register(Fare)
+class FareAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "train_type",
+        "base_price",
+        "price_per_km",
+        "first_class_cargos",
+        "first_class_multiplier",
+    )
+    list_select_related = ("train_type",)
 
 
 @admin.register(Train)
 class TrainAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "cargo_num", "places_in_cargo", "train_type")
+    list_select_related = ("train_type",)
     search_fields = ("name", "train_type__name")
 
 
 @admin.register(Journey)
 class JourneyAdmin(admin.ModelAdmin):
-    list_display = ("id", "route", "train", "departure_time", "arrival_time")
+    list_display = (
+        "id",
+        "route",
+        "train",
+        "departure_time",
+        "arrival_time",
+        "cancelled_at",
+    )
+    list_select_related = ("route__source", "route__destination", "train")
     list_filter = ("departure_time", "arrival_time")
-    search_fields = ("route__source__name", "route__destination__name")
+    search_fields = ("route__source__name", "route__destination__name", "train__name")
+    date_hierarchy = "departure_time"
+    autocomplete_fields = ("route", "train", "crews")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Ticket)
 class TicketAdmin(admin.ModelAdmin):
-    list_display = ("id", "cargo", "seat", "journey", "order")
-    list_filter = ("journey",)
+    list_display = (
+        "id",
+        "cargo",
+        "seat",
+        "from_stop",
+        "to_stop",
+        "price",
+        "journey",
+        "order",
+    )
+    list_select_related = ("journey__train", "order")
+    list_filter = (JourneyIdFilter, OrderIdFilter)
+    autocomplete_fields = ("journey", "order")
+    ordering = ("-id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class TicketInline(admin.TabularInline):
     model = Ticket
     extra = 1
+    autocomplete_fields = ("journey",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("journey__train")
 
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     inlines = (TicketInline,)
     list_display = ("id", "created_at", "user")
+    list_select_related = ("user",)
     list_filter = ("created_at",)
-    search_fields = ("user__username",)
+    search_fields = ("user__email",)
+    date_hierarchy = "created_at"
+    autocomplete_fields = ("user",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(TicketCheckIn)
+class TicketCheckInAdmin(admin.ModelAdmin):
+    list_display = ("id", "ticket", "checked_in_at", "checked_in_by")
+    list_select_related = ("ticket__journey__train", "checked_in_by")
+    list_filter = (TicketJourneyIdFilter,)
+    raw_id_fields = ("ticket",)
+    ordering = ("-id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(ArchivedTicket)
+class ArchivedTicketAdmin(admin.ModelAdmin):
+    list_display = ("id", "cargo", "seat", "price", "journey", "order", "archived_at")
+    list_select_related = ("journey__train", "order")
+    list_filter = (JourneyIdFilter, OrderIdFilter)
+    raw_id_fields = ("journey", "order")
+    ordering = ("-id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(OrderNotification)
+class OrderNotificationAdmin(admin.ModelAdmin):
+    list_display = ("id", "order", "journey", "kind", "created_at", "sent_at")
+    list_filter = ("kind", OrderIdFilter, JourneyIdFilter)
+    raw_id_fields = ("order", "journey")
+    ordering = ("-id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ("id", "view_name", "duration_ms", "fingerprint", "created_at")
+    list_filter = ("view_name", "database")
+    search_fields = ("fingerprint",)
+    readonly_fields = [field.name for field in SlowQuery._meta.fields]
+    ordering = ("-id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
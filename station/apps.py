@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class StationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "station"
+
+    def ready(self):
+        import station.checks  # noqa: F401
+        import station.signals  # noqa: F401
+        from station.journey_cache import warm_on_startup
+        from train_station_api_service.schema import build_on_startup
+
+        build_on_startup()
+        warm_on_startup()
@@ -0,0 +1,66 @@
+"""Moving tickets into the archive table without the ORM delete cascade."""
+
+from django.db import connection, transaction
+
+from station.models import ArchivedTicket, Ticket, TicketCheckIn
+
+
+def archive_batch(tickets, batch_size, cancelled=False, journey_ids=None):
+    """Move up to ``batch_size`` of ``tickets`` into ArchivedTicket.
+
+    Runs in its own transaction and returns the number of tickets moved, so
+    callers loop until it returns 0 without holding locks in between. The
+    journeys of the moved tickets are added to the ``journey_ids`` set, if
+    given, so the caller can announce them once it is done.
+    """
+    with transaction.atomic():
+        rows = list(
+            tickets.order_by("id").values(
+                "id",
+                "cargo",
+                "seat",
+                "journey_id",
+                "order_id",
+                "price",
+                "from_stop",
+                "to_stop",
+                "check_in__checked_in_at",
+            )[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        ArchivedTicket.objects.bulk_create(
+            [
+                ArchivedTicket(
+                    id=ticket["id"],
+                    cargo=ticket["cargo"],
+                    seat=ticket["seat"],
+                    journey_id=ticket["journey_id"],
+                    order_id=ticket["order_id"],
+                    price=ticket["price"],
+                    from_stop=ticket["from_stop"],
+                    to_stop=ticket["to_stop"],
+                    checked_in_at=ticket["check_in__checked_in_at"],
+                    cancelled=cancelled,
+                )
+                for ticket in rows
+            ],
+            ignore_conflicts=True,
+        )
+
+        # Plain DELETEs: archiving must not fire the per-ticket delete
+        # signals, which would announce the seats as freed one by one; the
+        # callers send one resync per journey instead.
+        if journey_ids is not None:
+            journey_ids.update(ticket["journey_id"] for ticket in rows)
+        ids = [ticket["id"] for ticket in rows]
+        placeholders = ", ".join(["%s"] * len(ids))
+        with connection.cursor() as cursor:
+            for model, column in ((TicketCheckIn, "ticket_id"), (Ticket, "id")):
+                cursor.execute(
+                    f"DELETE FROM {model._meta.db_table} "
+                    f"WHERE {column} IN ({placeholders})",
+                    ids,
+                )
+        return len(rows)
@@ -0,0 +1,164 @@
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+from station.invalidation import register
+from station.models import Station
+from station.notify import ensure_listener
+
+# Ukrainian national transliteration (KMU 2010), so "Kyiv" finds "Київ".
+UKRAINIAN_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "h", "ґ": "g", "д": "d", "е": "e",
+    "є": "ie", "ж": "zh", "з": "z", "и": "y", "і": "i", "ї": "i", "й": "i",
+    "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r",
+    "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch",
+    "ш": "sh", "щ": "shch", "ь": "", "ю": "iu", "я": "ia", "'": "", "’": "",
+}
+NON_WORD = re.compile(r"[^\w]+")
+FUZZY_THRESHOLD = 0.3
+FUZZY_CANDIDATES = 50
+PREFIX_CANDIDATES = 200
+
+
+def transliterate(text):
+    return "".join(UKRAINIAN_TO_LATIN.get(char, char) for char in text)
+
+
+def normalize(text):
+    """Casefold and strip accents, keeping words separated by single spaces."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return NON_WORD.sub(" ", text).strip()
+
+
+def variants(name):
+    folded = normalize(transliterate(name.casefold()))
+    return {normalize(name), folded}
+
+
+def trigrams(text):
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class StationIndex:
+    """Process-local prefix and trigram index over station names."""
+
+    def __init__(self, stations):
+        self.names = {}
+        self.words = {}
+        self.grams = {}
+        prefixes = []
+        postings = defaultdict(set)
+
+        for station_id, name in stations:
+            self.names[station_id] = name
+            words = set()
+            self.grams[station_id] = []
+            for variant in variants(name):
+                prefixes.append((variant, station_id))
+                for word in variant.split():
+                    words.add(word)
+                    prefixes.append((word, station_id))
+                grams = trigrams(variant)
+                self.grams[station_id].append(grams)
+                for gram in grams:
+                    postings[gram].add(station_id)
+            self.words[station_id] = words
+
+        self.prefixes = sorted(prefixes)
+        self.postings = dict(postings)
+        self.built_at = time.monotonic()
+
+    def _prefix_matches(self, query):
+        start = bisect_left(self.prefixes, (query,))
+        end = min(start + PREFIX_CANDIDATES, len(self.prefixes))
+        for position in range(start, end):
+            key, station_id = self.prefixes[position]
+            if not key.startswith(query):
+                break
+            yield key, station_id
+
+    def search(self, query, limit=10):
+        query_variants = {variant for variant in variants(query) if variant}
+        if not query_variants:
+            return []
+
+        ranked = {}
+
+        for query_variant in query_variants:
+            first_word, *other_words = query_variant.split()
+            for key, station_id in self._prefix_matches(query_variant):
+                ranked[station_id] = min(ranked.get(station_id, (2, 0)), (0, 0))
+            for key, station_id in self._prefix_matches(first_word):
+                words = self.words[station_id]
+                if all(
+                    any(word.startswith(other) for word in words)
+                    for other in other_words
+                ):
+                    ranked[station_id] = min(ranked.get(station_id, (2, 0)), (1, 0))
+
+        if len(ranked) < limit:
+            for query_variant in query_variants:
+                query_grams = trigrams(query_variant)
+                shared = Counter(
+                    station_id
+                    for gram in query_grams
+                    for station_id in self.postings.get(gram, ())
+                )
+                for station_id, _ in shared.most_common(FUZZY_CANDIDATES):
+                    similarity = max(
+                        len(query_grams & grams) / len(query_grams | grams)
+                        for grams in self.grams[station_id]
+                    )
+                    if similarity >= FUZZY_THRESHOLD:
+                        ranked[station_id] = min(
+                            ranked.get(station_id, (2, 0)), (2, -similarity)
+                        )
+
+        best = sorted(
+            ranked,
+            key=lambda station_id: (
+                ranked[station_id],
+                len(self.names[station_id]),
+                self.names[station_id],
+            ),
+        )
+        return [
+            {"id": station_id, "name": self.names[station_id]}
+            for station_id in best[:limit]
+        ]
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    ensure_listener()
+    index = _index
+    if index is None or (
+        time.monotonic() - index.built_at > settings.STATION_AUTOCOMPLETE_TTL
+    ):
+        with _lock:
+            if _index is index:
+                _index = StationIndex(Station.objects.values_list("id", "name"))
+            index = _index
+    return index
+
+
+def reset_index():
+    global _index
+    _index = None
+
+
+register("stations", lambda keys: reset_index())
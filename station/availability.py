@@ -0,0 +1,209 @@
+"""Station-pair availability matrix for the search home page.
+
+For every origin station, destination and day of the booking horizon the
+matrix holds the earliest departure, the number of journeys and the fewest
+free seats on any of them, stored as one JSON row per origin so a lookup is a
+single primary key read. Origins are computed independently, which lets
+precompute_availability spread them over a process pool. Booking, journey
+and route changes mark the affected origins stale through changed_at; an
+incremental run recomputes only those. Route edits mark the stations a route
+served before the change as well as after it, and bookings mark theirs once
+committed so the UPDATE never holds locks inside a booking transaction.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timedelta
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, Prefetch, Q
+from django.utils import timezone
+
+from station.models import (
+    Journey,
+    Route,
+    RouteStop,
+    SeatOccupancy,
+    Station,
+    StationAvailability,
+    segment_mask,
+)
+
+
+def origin_matrix(origin_id, now, horizon_days):
+    """Availability of legs starting at ``origin_id`` from ``now`` on."""
+    zone = timezone.get_current_timezone()
+    first_day = timezone.localtime(now, zone).date()
+    window_end = datetime.combine(
+        first_day + timedelta(days=horizon_days), time.min, zone
+    )
+    journeys = (
+        Journey.objects.filter(
+            Q(route__source_id=origin_id) | Q(route__stops__station_id=origin_id),
+            departure_time__lt=window_end,
+            arrival_time__gt=now,
+            cancelled_at__isnull=True,
+        )
+        .distinct()
+        .select_related("route", "train")
+        .prefetch_related(
+            "route__stops",
+            Prefetch(
+                "occupied_seats",
+                queryset=SeatOccupancy.objects.only("journey_id", "segments"),
+            ),
+        )
+    )
+
+    cells = {}
+    for journey in journeys.iterator(chunk_size=500):
+        route = journey.route
+        stations = [
+            route.source_id,
+            *(stop.station_id for stop in route.stops.all()),
+            route.destination_id,
+        ]
+        distances = route.stop_distances()
+        length = distances[-1] or 1
+        travel = journey.arrival_time - journey.departure_time
+        occupied = [seat.segments for seat in journey.occupied_seats.all()]
+
+        for from_stop, station_id in enumerate(stations[:-1]):
+            if station_id != origin_id:
+                continue
+            departs = journey.departure_time + travel * (distances[from_stop] / length)
+            if not now <= departs < window_end:
+                continue
+            day = timezone.localtime(departs, zone).date().isoformat()
+            for to_stop in range(from_stop + 1, len(stations)):
+                if stations[to_stop] == origin_id:
+                    continue
+                leg = segment_mask(from_stop, to_stop)
+                free = journey.train.capacity - sum(
+                    1 for segments in occupied if segments & leg
+                )
+                key = (stations[to_stop], day)
+                earliest, count, fewest = cells.get(key, (departs, 0, free))
+                cells[key] = (min(earliest, departs), count + 1, min(fewest, free))
+
+    matrix = {}
+    for (destination_id, day), (earliest, count, fewest) in cells.items():
+        matrix.setdefault(str(destination_id), {})[day] = [
+            earliest.isoformat(),
+            count,
+            fewest,
+        ]
+    return matrix
+
+
+def compute_origin(task):
+    origin_id, now, horizon_days = task
+    return origin_id, origin_matrix(origin_id, now, horizon_days)
+
+
+def stale_origins():
+    """Stations never computed or changed since their last computation."""
+    return Station.objects.filter(
+        Q(availability__isnull=True)
+        | Q(availability__changed_at__gt=F("availability__computed_at"))
+    ).values_list("id", flat=True)
+
+
+def precompute(origin_ids, workers=0):
+    """Recompute and store the matrix rows of ``origin_ids``.
+
+    With ``workers`` above 1 origins are spread over that many processes;
+    otherwise they are computed in this one. Returns the number of rows.
+    """
+    now = timezone.now()
+    tasks = [
+        (origin_id, now, settings.AVAILABILITY_HORIZON_DAYS)
+        for origin_id in origin_ids
+    ]
+    if workers > 1:
+        # Forked workers must not share this process's database sockets.
+        connections.close_all()
+        with ProcessPoolExecutor(workers, initializer=django.setup) as pool:
+            results = list(pool.map(compute_origin, tasks, chunksize=4))
+    else:
+        results = map(compute_origin, tasks)
+
+    stored = 0
+    for origin_id, matrix in results:
+        StationAvailability.objects.update_or_create(
+            origin_id=origin_id, defaults={"matrix": matrix, "computed_at": now}
+        )
+        stored += 1
+    return stored
+
+
+def current_origins(model, pk):
+    """Stations a Route, RouteStop or Journey row lets trips leave from now."""
+    if pk is None:
+        return set()
+    if model is RouteStop:
+        return set(
+            RouteStop.objects.filter(pk=pk).values_list("station_id", flat=True)
+        )
+    if model is Route:
+        route_ids = [pk]
+    else:
+        route_ids = Journey.objects.filter(pk=pk).values("route_id")
+    return set(
+        Route.objects.filter(pk__in=route_ids).values_list("source_id", flat=True)
+    ) | set(
+        RouteStop.objects.filter(route_id__in=route_ids).values_list(
+            "station_id", flat=True
+        )
+    )
+
+
+def mark_origins_changed(origin_ids):
+    if origin_ids:
+        StationAvailability.objects.filter(origin_id__in=origin_ids).update(
+            changed_at=timezone.now()
+        )
+
+
+def mark_route_changed(route_id):
+    StationAvailability.objects.filter(
+        Q(origin__departure_station__id=route_id)
+        | Q(origin__route_stops__route_id=route_id)
+    ).update(changed_at=timezone.now())
+
+
+def mark_journeys_changed(journey_ids):
+    StationAvailability.objects.filter(
+        Q(origin__departure_station__journeys__id__in=journey_ids)
+        | Q(origin__route_stops__route__journeys__id__in=journey_ids)
+    ).update(changed_at=timezone.now())
+
+
+def lookup(origin_id, destination_id=None, day=None):
+    """Matrix rows of one origin, optionally narrowed to a destination/day."""
+    row = (
+        StationAvailability.objects.filter(origin_id=origin_id)
+        .values_list("matrix", "computed_at")
+        .first()
+    )
+    if row is None:
+        return None, []
+    matrix, computed_at = row
+
+    rows = []
+    for destination, days in matrix.items():
+        if destination_id is not None and destination != str(destination_id):
+            continue
+        for date, (earliest, journeys, free) in sorted(days.items()):
+            if day is None or date == day:
+                rows.append(
+                    {
+                        "destination": int(destination),
+                        "date": date,
+                        "earliest_departure": earliest,
+                        "journeys": journeys,
+                        "min_free_seats": free,
+                    }
+                )
+    return computed_at, rows
@@ -0,0 +1,72 @@
+"""Cancelling a journey without loading its tickets through the ORM.
+
+The journey is marked cancelled first, which stops new bookings; then every
+affected order gets a notification queued with one INSERT ... SELECT, and the
+tickets move to the archive in short batches. No step holds locks for long,
+so the journey list and other bookings keep working, and rerunning a
+cancellation that was interrupted resumes where it stopped. Bookings lock
+the journey row and re-check cancelled_at, so none can commit a ticket after
+the release loop has passed. Once the tickets are gone, seat event streams of
+the journey get one "resync" and the journey list is evicted again.
+"""
+
+from functools import partial
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from station.archive import archive_batch
+from station.availability import mark_route_changed
+from station.events import publish_resync
+from station.invalidation import invalidate
+from station.models import Journey, OrderNotification, SeatOccupancy, Ticket
+
+
+def mark_cancelled(journey):
+    now = timezone.now()
+    Journey.objects.filter(pk=journey.pk, cancelled_at__isnull=True).update(
+        cancelled_at=now, updated_at=now
+    )
+    invalidate("departures", journey.route.source_id)
+    invalidate("journey-list")
+    invalidate("fare-quotes", journey.pk)
+    mark_route_changed(journey.route_id)
+
+
+def enqueue_notifications(journey):
+    """Queue one journey_cancelled notification per order with tickets."""
+    notification_table = OrderNotification._meta.db_table
+    created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {notification_table} "
+            "(order_id, journey_id, kind, created_at) "
+            "SELECT DISTINCT order_id, journey_id, %s, %s "
+            f"FROM {Ticket._meta.db_table} WHERE journey_id = %s "
+            "ON CONFLICT (order_id, journey_id, kind) DO NOTHING",
+            [OrderNotification.JOURNEY_CANCELLED, created_at, journey.pk],
+        )
+        return cursor.rowcount
+
+
+def cancel_journey(journey, batch_size, progress=None):
+    """Cancel ``journey`` and release its tickets ``batch_size`` at a time.
+
+    ``progress(released, total)`` is called after every batch. Returns the
+    number of tickets released.
+    """
+    mark_cancelled(journey)
+    enqueue_notifications(journey)
+
+    tickets = Ticket.objects.filter(journey=journey)
+    total = tickets.count()
+    released = 0
+    while moved := archive_batch(tickets, batch_size, cancelled=True):
+        released += moved
+        if progress is not None:
+            progress(released, total)
+
+    SeatOccupancy.objects.filter(journey=journey).delete()
+    invalidate("journey-list")
+    transaction.on_commit(partial(publish_resync, [journey.pk]))
+    return released
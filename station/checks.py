@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.security)
+def check_ticket_token_key(app_configs, **kwargs):
+    if settings.TICKET_TOKEN_KEY:
+        return []
+    return [
+        Warning(
+            "TICKET_TOKEN_KEY is not set.",
+            hint=(
+                "Orders cannot render ticket tokens and check-ins cannot "
+                "verify them until a key separate from SECRET_KEY is set."
+            ),
+            id="station.W001",
+        )
+    ]
@@ -0,0 +1,97 @@
+"""Single-flight coalescing of identical read requests.
+
+While one request computes a response, identical requests arriving in the
+same process wait for it and reuse its data instead of running the same
+queries again. Nothing is kept once the computation finishes, so no response
+is older than the request that receives it. Authentication, permissions and
+throttling still run for every request; only the handler is shared.
+"""
+
+import threading
+from functools import wraps
+
+from django.conf import settings
+from rest_framework.response import Response
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.failed = False
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function, timeout=None):
+        """Run ``function`` once for concurrent callers with the same key.
+
+        A follower whose leader failed or took longer than ``timeout``
+        runs ``function`` itself.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if call.done.wait(timeout) and not call.failed:
+                return call.result
+            return function()
+
+        try:
+            call.result = function()
+        except BaseException:
+            call.failed = True
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+flight = SingleFlight()
+
+
+def coalesce(handler):
+    """Share the result of a viewset GET handler between identical requests.
+
+    Requests are identical when they reach the same viewset action with the
+    same path, query string and permission classes.
+    """
+
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        if request.method != "GET":
+            return handler(self, request, *args, **kwargs)
+
+        key = (
+            type(self).__qualname__,
+            self.action,
+            request.get_full_path(),
+            tuple(
+                permission.__class__.__qualname__
+                for permission in self.get_permissions()
+            ),
+        )
+
+        def compute():
+            response = handler(self, request, *args, **kwargs)
+            headers = {
+                name: value
+                for name, value in response.items()
+                if name.lower() != "content-type"
+            }
+            return response.data, response.status_code, headers
+
+        data, status_code, headers = flight.do(
+            key, compute, timeout=settings.COALESCE_WAIT_SECONDS
+        )
+        return Response(data, status=status_code, headers=headers)
+
+    return wrapper
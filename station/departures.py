@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F
+from django.utils import timezone
+
+from station.invalidation import register
+from station.models import Journey
+from station.notify import ensure_listener
+
+DEPARTURES_CACHE_KEY = "station-departures:{station_id}"
+
+
+def departures_cache_key(station_id):
+    return DEPARTURES_CACHE_KEY.format(station_id=station_id)
+
+
+def query_departures(station_id, limit):
+    return list(
+        Journey.objects.filter(
+            route__source_id=station_id,
+            departure_time__gt=timezone.now(),
+            cancelled_at__isnull=True,
+        )
+        .order_by("departure_time")
+        .annotate(
+            seats_available=(
+                F("train__cargo_num") * F("train__places_in_cargo")
+                - Count("occupied_seats")
+            )
+        )
+        .values(
+            "id",
+            "departure_time",
+            "arrival_time",
+            "seats_available",
+            train_name=F("train__name"),
+            destination=F("route__destination__name"),
+        )[:limit]
+    )
+
+
+def get_departures(station_id, limit):
+    """Upcoming departures from a station, served from a per-station cache.
+
+    The cache holds the first DEPARTURE_BOARD_MAX_ROWS rows and is dropped in
+    every worker over the invalidation bus whenever a journey or ticket of
+    the station changes.
+    """
+    ensure_listener()
+    key = departures_cache_key(station_id)
+    departures = cache.get(key)
+    if departures is None:
+        departures = query_departures(station_id, settings.DEPARTURE_BOARD_MAX_ROWS)
+        cache.set(key, departures, timeout=settings.DEPARTURE_BOARD_CACHE_SECONDS)
+
+    now = timezone.now()
+    return [
+        departure for departure in departures if departure["departure_time"] > now
+    ][:limit]
+
+
+def invalidate_departures(*station_ids):
+    cache.delete_many([departures_cache_key(station_id) for station_id in station_ids])
+
+
+register("departures", lambda station_ids: invalidate_departures(*station_ids))
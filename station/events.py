@@ -0,0 +1,94 @@
+"""Seat availability events for the journey SSE stream.
+
+Order commits publish "taken"/"freed" deltas of seat legs: a seat entry
+names its cargo, seat and the from_stop/to_stop range it is sold for, so a
+seat resold for disjoint legs shows up once per ticket. On Postgres they travel through
+pg_notify on SEAT_EVENTS_CHANNEL and a LISTEN thread in every worker feeds the
+in-process broker, so subscribers on any worker see every commit. Other
+backends publish straight to the local broker.
+"""
+
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from station.notify import listen, notify
+
+SEAT_EVENTS_CHANNEL = "station_seat_events"
+SEAT_FIELDS = ("cargo", "seat", "from_stop", "to_stop")
+# pg_notify payloads must stay below 8000 bytes.
+MAX_SEATS_PER_NOTIFY = 100
+
+
+class SeatEventBroker:
+    """In-process fan-out of seat events to asyncio subscriber queues."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, journey_id, maxsize=100):
+        queue = asyncio.Queue(maxsize=maxsize)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers[journey_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, journey_id, subscriber):
+        with self._lock:
+            self._subscribers[journey_id].discard(subscriber)
+            if not self._subscribers[journey_id]:
+                del self._subscribers[journey_id]
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(event["journey"], ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._deliver, queue, event)
+
+    @staticmethod
+    def _deliver(queue, event):
+        # A subscriber that stopped reading loses its pending deltas rather
+        # than memory, and is told to resync: the stream ends and the client
+        # reconnects for a fresh snapshot.
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"journey": event["journey"], "type": "resync"})
+        else:
+            queue.put_nowait(event)
+
+
+broker = SeatEventBroker()
+
+
+def seat_events(journey_id, kind, seats):
+    seats = sorted(seats)
+    for start in range(0, len(seats), MAX_SEATS_PER_NOTIFY):
+        yield {
+            "journey": journey_id,
+            "type": kind,
+            "seats": [
+                dict(zip(SEAT_FIELDS, seat))
+                for seat in seats[start:start + MAX_SEATS_PER_NOTIFY]
+            ],
+        }
+
+
+def publish_seat_change(journey_id, kind, seats):
+    """Send seat deltas once the surrounding transaction has committed."""
+    for event in seat_events(journey_id, kind, seats):
+        notify(SEAT_EVENTS_CHANNEL, json.dumps(event))
+
+
+def publish_resync(journey_ids):
+    """Tell streams of ``journey_ids`` to reload after bulk seat changes that
+    bypass the ticket signals, such as cancellation and archiving."""
+    for journey_id in journey_ids:
+        notify(
+            SEAT_EVENTS_CHANNEL, json.dumps({"journey": journey_id, "type": "resync"})
+        )
+
+
+listen(SEAT_EVENTS_CHANNEL, lambda payload: broker.publish(json.loads(payload)))
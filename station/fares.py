@@ -0,0 +1,117 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F
+
+from station.invalidation import register
+from station.models import Fare, Journey
+from station.notify import ensure_listener
+
+FARE_QUOTE_CACHE_KEY = "fare-quote:{generation}:{journey_id}"
+FARE_QUOTE_GENERATION_KEY = "fare-quote:generation"
+CENTS = Decimal("0.01")
+
+
+def occupancy_multiplier(occupancy):
+    multiplier = Decimal("1.00")
+    for threshold, tier_multiplier in settings.FARE_OCCUPANCY_MULTIPLIERS:
+        if occupancy >= threshold:
+            multiplier = Decimal(tier_multiplier)
+    return multiplier
+
+
+def seat_price(fare, distance, cargo_class, multiplier):
+    price = fare.base_price + fare.price_per_km * distance
+    if cargo_class == "first":
+        price *= fare.first_class_multiplier
+    return (price * multiplier).quantize(CENTS)
+
+
+def compute_quotes(journey_ids):
+    """Price journeys in bulk: one fare table read and one journey query."""
+    fares = {fare.train_type_id: fare for fare in Fare.objects.all()}
+    journeys = (
+        Journey.objects.filter(id__in=journey_ids)
+        .order_by()
+        .annotate(taken=Count("occupied_seats"))
+        .values(
+            "id",
+            "taken",
+            distance=F("route__distance"),
+            train_type_id=F("train__train_type_id"),
+            capacity=F("train__cargo_num") * F("train__places_in_cargo"),
+        )
+    )
+
+    quotes = {}
+    for journey in journeys:
+        fare = fares.get(journey["train_type_id"]) or Fare()
+        occupancy = journey["taken"] / journey["capacity"] if journey["capacity"] else 1
+        multiplier = occupancy_multiplier(occupancy)
+        quotes[journey["id"]] = {
+            "journey": journey["id"],
+            "fare": fare,
+            "multiplier": multiplier,
+            "occupancy": round(occupancy, 4),
+            "first_class_cargos": fare.first_class_cargos,
+            "standard": seat_price(fare, journey["distance"], "standard", multiplier),
+            "first": seat_price(fare, journey["distance"], "first", multiplier),
+        }
+    return quotes
+
+
+def fare_quote_keys(journey_ids):
+    generation = cache.get_or_set(FARE_QUOTE_GENERATION_KEY, 0, timeout=None)
+    return {
+        journey_id: FARE_QUOTE_CACHE_KEY.format(
+            generation=generation, journey_id=journey_id
+        )
+        for journey_id in journey_ids
+    }
+
+
+def invalidate_quotes(journey_ids):
+    """Drop the quotes of ``journey_ids``, or of every journey when empty."""
+    if journey_ids:
+        cache.delete_many(fare_quote_keys(journey_ids).values())
+        return
+    try:
+        cache.incr(FARE_QUOTE_GENERATION_KEY)
+    except ValueError:
+        cache.set(FARE_QUOTE_GENERATION_KEY, 1, timeout=None)
+
+
+def get_quotes(journey_ids):
+    """Quotes keyed by journey id, cached for FARE_QUOTE_CACHE_SECONDS.
+
+    Journeys that do not exist are left out of the result.
+    """
+    ensure_listener()
+    keys = fare_quote_keys(set(journey_ids))
+    cached = cache.get_many(keys.values())
+    quotes = {
+        journey_id: cached[key] for journey_id, key in keys.items() if key in cached
+    }
+
+    missing = [journey_id for journey_id in keys if journey_id not in quotes]
+    if missing:
+        fresh = compute_quotes(missing)
+        cache.set_many(
+            {keys[journey_id]: quote for journey_id, quote in fresh.items()},
+            timeout=settings.FARE_QUOTE_CACHE_SECONDS,
+        )
+        quotes.update(fresh)
+
+    return quotes
+
+
+def ticket_price(quote, cargo, distance=None):
+    """Price of a seat for the whole route, or for a leg of ``distance`` km."""
+    cargo_class = "first" if cargo <= quote["first_class_cargos"] else "standard"
+    if distance is None:
+        return quote[cargo_class]
+    return seat_price(quote["fare"], distance, cargo_class, quote["multiplier"])
+
+
+register("fare-quotes", invalidate_quotes)
@@ -0,0 +1,250 @@
+"""Static GTFS export of the timetable.
+
+Each GTFS file is written row by row from a server-side cursor into a zip
+member, so memory stays flat however many journeys there are; only the stop
+list of every route is held in memory. Routes are GTFS routes, journeys are
+trips running on the service day of their local departure date, and times at
+intermediate stops are interpolated by distance. Stop times are computed in
+UTC and measured from the service day's "noon minus 12h", as GTFS defines
+them, so they stay right on daylight saving days.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import zipfile
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from station.models import Journey, Route, RouteStop, Station, Train
+
+ITERATOR_CHUNK_SIZE = 2000
+# Rows written between two yields of write_file().
+FLUSH_ROWS = 500
+RAIL_ROUTE_TYPE = 2
+
+
+def agency_zone():
+    return ZoneInfo(settings.GTFS_AGENCY["timezone"])
+
+
+def service_day_reference(day, zone):
+    """Noon minus 12h of ``day`` in ``zone``, in UTC; GTFS times count from it."""
+    noon = datetime.combine(day, time(12), zone).astimezone(timezone.utc)
+    return noon - timedelta(hours=12)
+
+
+def gtfs_time(moment, reference):
+    """HH:MM:SS since the service day reference; may pass 24:00:00."""
+    seconds = int((moment - reference).total_seconds())
+    return f"{seconds // 3600:02}:{seconds % 3600 // 60:02}:{seconds % 60:02}"
+
+
+def scheduled_journeys():
+    return Journey.objects.filter(cancelled_at__isnull=True)
+
+
+def agency_rows():
+    agency = settings.GTFS_AGENCY
+    yield [agency["id"], agency["name"], agency["url"], agency["timezone"]]
+
+
+def stop_rows():
+    yield from Station.objects.order_by("id").values_list(
+        "id", "name", "latitude", "longitude"
+    ).iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+
+
+def route_rows():
+    agency_id = settings.GTFS_AGENCY["id"]
+    routes = Route.objects.order_by("id").values_list(
+        "id", "source__name", "destination__name"
+    )
+    for route_id, source, destination in routes.iterator(
+        chunk_size=ITERATOR_CHUNK_SIZE
+    ):
+        yield [route_id, agency_id, f"{source} - {destination}", RAIL_ROUTE_TYPE]
+
+
+def trip_rows():
+    zone = agency_zone()
+    journeys = scheduled_journeys().order_by("id").values_list(
+        "id", "route_id", "departure_time", "train__name"
+    )
+    for journey_id, route_id, departure_time, train_name in journeys.iterator(
+        chunk_size=ITERATOR_CHUNK_SIZE
+    ):
+        service_id = departure_time.astimezone(zone).strftime("%Y%m%d")
+        yield [route_id, service_id, journey_id, train_name]
+
+
+def calendar_date_rows():
+    zone = agency_zone()
+    previous = None
+    departures = (
+        scheduled_journeys()
+        .order_by("departure_time")
+        .values_list("departure_time", flat=True)
+    )
+    for departure_time in departures.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        service_id = departure_time.astimezone(zone).strftime("%Y%m%d")
+        if service_id != previous:
+            yield [service_id, service_id, 1]
+            previous = service_id
+
+
+def route_stops():
+    """Map route id to its (station id, km from source) stops, ends included."""
+    routes = {
+        route_id: [(source_id, 0), (destination_id, distance)]
+        for route_id, source_id, destination_id, distance in Route.objects.values_list(
+            "id", "source_id", "destination_id", "distance"
+        ).iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    }
+    stops = RouteStop.objects.order_by("route_id", "position").values_list(
+        "route_id", "station_id", "distance"
+    )
+    for route_id, station_id, distance in stops.iterator(
+        chunk_size=ITERATOR_CHUNK_SIZE
+    ):
+        routes[route_id].insert(-1, (station_id, distance))
+    return routes
+
+
+def stop_time_rows():
+    zone = agency_zone()
+    routes = route_stops()
+    journeys = scheduled_journeys().order_by("id").values_list(
+        "id", "route_id", "departure_time", "arrival_time"
+    )
+    for journey_id, route_id, departure_time, arrival_time in journeys.iterator(
+        chunk_size=ITERATOR_CHUNK_SIZE
+    ):
+        # Aware datetimes in one zone subtract as wall clock times.
+        departure_time = departure_time.astimezone(timezone.utc)
+        reference = service_day_reference(
+            departure_time.astimezone(zone).date(), zone
+        )
+        stops = routes[route_id]
+        length = stops[-1][1] or 1
+        travel = arrival_time - departure_time
+        for sequence, (station_id, distance) in enumerate(stops, 1):
+            at = gtfs_time(departure_time + travel * (distance / length), reference)
+            yield [journey_id, at, at, station_id, sequence, distance]
+
+
+def table_version(queryset):
+    stats = queryset.aggregate(rows=Count("pk"), changed=Max("updated_at"))
+    changed = stats["changed"].isoformat() if stats["changed"] else ""
+    return f"{stats['rows']}:{changed}"
+
+
+def agency_version():
+    return hashlib.sha256(
+        json.dumps(settings.GTFS_AGENCY, sort_keys=True).encode()
+    ).hexdigest()[:16]
+
+
+# File name, header, row source and the tables it depends on. RouteStop edits
+# touch their route's updated_at, so Route covers them.
+GTFS_FILES = {
+    "agency.txt": (
+        ["agency_id", "agency_name", "agency_url", "agency_timezone"],
+        agency_rows,
+        (),
+    ),
+    "stops.txt": (
+        ["stop_id", "stop_name", "stop_lat", "stop_lon"],
+        stop_rows,
+        (Station,),
+    ),
+    "routes.txt": (
+        ["route_id", "agency_id", "route_long_name", "route_type"],
+        route_rows,
+        (Route, Station),
+    ),
+    "trips.txt": (
+        ["route_id", "service_id", "trip_id", "trip_short_name"],
+        trip_rows,
+        (Journey, Train),
+    ),
+    "calendar_dates.txt": (
+        ["service_id", "date", "exception_type"],
+        calendar_date_rows,
+        (Journey,),
+    ),
+    "stop_times.txt": (
+        [
+            "trip_id",
+            "arrival_time",
+            "departure_time",
+            "stop_id",
+            "stop_sequence",
+            "shape_dist_traveled",
+        ],
+        stop_time_rows,
+        (Journey, Route),
+    ),
+}
+
+
+def feed_versions():
+    """A version string per file that changes whenever its content can."""
+    versions = {}
+    for name, (_, _, models) in GTFS_FILES.items():
+        parts = [table_version(model.objects.all()) for model in models]
+        versions[name] = "|".join(parts) if models else agency_version()
+    return versions
+
+
+def feed_etag(versions):
+    digest = hashlib.sha256(json.dumps(versions, sort_keys=True).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def write_file(archive, name):
+    """Write one GTFS file into ``archive``, yielding every FLUSH_ROWS rows."""
+    header, rows, _ = GTFS_FILES[name]
+    with archive.open(name, "w", force_zip64=True) as member:
+        with io.TextIOWrapper(member, encoding="utf-8", newline="") as text:
+            writer = csv.writer(text)
+            writer.writerow(header)
+            for written, row in enumerate(rows(), 1):
+                writer.writerow(row)
+                if written % FLUSH_ROWS == 0:
+                    text.flush()
+                    yield
+
+
+class ZipSink:
+    """Unseekable file object collecting zip output between drains."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def stream_feed():
+    """Yield the zipped feed in pieces as it is written."""
+    sink = ZipSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name in GTFS_FILES:
+            for _ in write_file(archive, name):
+                if sink.chunks:
+                    yield sink.drain()
+    yield sink.drain()
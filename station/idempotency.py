@@ -0,0 +1,128 @@
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from station.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def request_fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(f"{request.path}\n{body}".encode()).hexdigest()
+
+
+def claim_key(user, key, fingerprint):
+    """Insert an in-flight record for the key, or return the existing one.
+
+    The row is committed before the handler runs, so duplicates arriving on
+    other workers see it immediately. A record still incomplete after
+    IDEMPOTENCY_IN_FLIGHT_SECONDS belongs to a worker that died and is taken
+    over.
+    """
+    now = timezone.now()
+    expired_before = now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    stalled_before = now - timedelta(seconds=settings.IDEMPOTENCY_IN_FLIGHT_SECONDS)
+    IdempotencyKey.objects.filter(
+        Q(created_at__lt=expired_before)
+        | Q(status_code__isnull=True, created_at__lt=stalled_before),
+        user=user,
+        key=key,
+    ).delete()
+
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                user=user, key=key, fingerprint=fingerprint
+            ), True
+    except IntegrityError:
+        return IdempotencyKey.objects.filter(user=user, key=key).first(), False
+
+
+def wait_for_result(record):
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while not record.completed and time.monotonic() < deadline:
+        time.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+        record = IdempotencyKey.objects.filter(pk=record.pk).first()
+        if record is None:
+            return None
+    return record
+
+
+def store_response(record, response):
+    """Complete ``record``; False if it was taken over in the meantime."""
+    return IdempotencyKey.objects.filter(
+        pk=record.pk, status_code__isnull=True
+    ).update(status_code=response.status_code, response_body=response.data)
+
+
+def in_progress():
+    response = Response(
+        {"detail": "A request with this key is still in progress"},
+        status=status.HTTP_409_CONFLICT,
+    )
+    response["Retry-After"] = str(settings.IDEMPOTENCY_WAIT_SECONDS)
+    return response
+
+
+def replay(record):
+    response = Response(record.response_body, status=record.status_code)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent_response(request, handler):
+    """Run handler once per (user, Idempotency-Key) and replay its response.
+
+    Requests without the header go straight to the handler. Server errors
+    are not stored, so the client may retry them with the same key. The
+    response is stored in the handler's transaction: an order is never
+    committed without it, and a handler whose key was taken over rolls back.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return handler()
+
+    if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+        return Response(
+            {"detail": f"{IDEMPOTENCY_HEADER} is too long"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    fingerprint = request_fingerprint(request)
+    record, created = claim_key(request.user, key, fingerprint)
+
+    if not created:
+        if record is not None and record.fingerprint != fingerprint:
+            return Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} was used with a different request"},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        record = wait_for_result(record) if record is not None else None
+        if record is None or not record.completed:
+            return in_progress()
+        return replay(record)
+
+    try:
+        with transaction.atomic():
+            response = handler()
+            if response.status_code < 500 and not store_response(record, response):
+                transaction.set_rollback(True)
+                return in_progress()
+    except Exception:
+        record.delete()
+        raise
+
+    if response.status_code >= 500:
+        record.delete()
+
+    return response
@@ -0,0 +1,96 @@
+from collections import defaultdict
+
+
+class IntervalTree:
+    """Centered interval tree over half-open [start, end) intervals.
+
+    Built once from a batch of intervals and queried for overlaps in
+    O(log n + k), so batch validation never compares every pair.
+    """
+
+    def __init__(self, intervals):
+        intervals = [interval for interval in intervals if interval[0] < interval[1]]
+        self.center = None
+        self.left = None
+        self.right = None
+        self.by_start = []
+        self.by_end = []
+
+        if not intervals:
+            return
+
+        starts = sorted(start for start, _, _ in intervals)
+        self.center = starts[len(starts) // 2]
+
+        left, right, overlapping = [], [], []
+        for interval in intervals:
+            start, end, _ = interval
+            if end <= self.center:
+                left.append(interval)
+            elif start > self.center:
+                right.append(interval)
+            else:
+                overlapping.append(interval)
+
+        self.by_start = sorted(overlapping, key=lambda interval: interval[0])
+        self.by_end = sorted(overlapping, key=lambda interval: interval[1], reverse=True)
+        self.left = IntervalTree(left) if left else None
+        self.right = IntervalTree(right) if right else None
+
+    def overlapping(self, start, end):
+        """Return (start, end, data) tuples overlapping [start, end)."""
+        result = []
+        stack = [self]
+
+        while stack:
+            node = stack.pop()
+            if node is None or node.center is None:
+                continue
+
+            if end <= node.center:
+                for interval in node.by_start:
+                    if interval[0] >= end:
+                        break
+                    if interval[1] > start:
+                        result.append(interval)
+                stack.append(node.left)
+            elif start > node.center:
+                for interval in node.by_end:
+                    if interval[1] <= start:
+                        break
+                    if interval[0] < end:
+                        result.append(interval)
+                stack.append(node.right)
+            else:
+                result.extend(
+                    interval
+                    for interval in node.by_start
+                    if interval[0] < end and interval[1] > start
+                )
+                stack.append(node.left)
+                stack.append(node.right)
+
+        return result
+
+
+def find_conflicts(intervals_by_key, candidates):
+    """Match every candidate against the intervals sharing its key.
+
+    ``intervals_by_key`` maps a resource key (e.g. ``("train", 3)``) to
+    ``(start, end, data)`` tuples, candidates included. ``candidates`` is an
+    iterable of ``(key, start, end, data)``. Yields ``(key, data, other)``
+    for each overlap found, ``other`` being the conflicting interval's data.
+    """
+    trees = {key: IntervalTree(intervals) for key, intervals in intervals_by_key.items()}
+
+    for key, start, end, data in candidates:
+        for _, _, other in trees[key].overlapping(start, end):
+            if other != data:
+                yield key, data, other
+
+
+def group_intervals(rows):
+    grouped = defaultdict(list)
+    for key, start, end, data in rows:
+        grouped[key].append((start, end, data))
+    return grouped
@@ -0,0 +1,85 @@
+"""Cross-worker invalidation of process-local caches.
+
+Model signal handlers call invalidate(namespace, *keys); once the transaction
+commits, a compact message goes out over pg_notify and every worker's
+listener thread runs the handler registered for the namespace. Delivery is
+best effort: a worker that is reconnecting misses messages, so every cache
+on the bus must also expire on its own fallback TTL.
+"""
+
+import json
+import logging
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+from station.notify import listen, notify
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "station_invalidation"
+
+_handlers = {}
+
+
+class DeliveryStats:
+    """Publish-to-eviction latency of invalidation messages in this worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, latency):
+        with self._lock:
+            self.count += 1
+            self.total += latency
+            self.max = max(self.max, latency)
+        if latency > settings.INVALIDATION_SLOW_SECONDS:
+            logger.warning("Invalidation delivered after %.3fs", latency)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "count": self.count,
+                "mean": self.total / self.count if self.count else 0.0,
+                "max": self.max,
+            }
+
+
+stats = DeliveryStats()
+
+
+def register(namespace, handler):
+    """Call ``handler(keys)`` in every worker when ``namespace`` is invalidated.
+
+    An empty ``keys`` list means the whole namespace.
+    """
+    _handlers[namespace] = handler
+
+
+def publish(namespace, keys):
+    notify(
+        INVALIDATION_CHANNEL,
+        json.dumps({"n": namespace, "k": list(keys), "t": time.time()}),
+    )
+
+
+def invalidate(namespace, *keys):
+    """Evict ``keys`` of ``namespace`` everywhere after the current commit."""
+    transaction.on_commit(partial(publish, namespace, keys))
+
+
+def deliver(payload):
+    message = json.loads(payload)
+    handler = _handlers.get(message["n"])
+    if handler is not None:
+        handler(message["k"])
+    stats.record(max(time.time() - message["t"], 0.0))
+
+
+listen(INVALIDATION_CHANNEL, deliver)
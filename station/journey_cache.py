@@ -0,0 +1,203 @@
+"""Stale-while-revalidate cache for the journey list.
+
+An entry is fresh for JOURNEY_LIST_FRESH_SECONDS. After that it is still
+served, for at most JOURNEY_LIST_STALE_SECONDS more, while a single
+background thread recomputes it, so a busy date never makes many requests
+wait on the database at once. Past the stale bound an entry is gone and the
+next request computes it inline.
+
+Journey, ticket and cancellation changes invalidate the "journey-list"
+namespace on the invalidation bus. A list entry cannot be traced back to the
+journeys it contains, so every worker bumps a generation number that is part
+of each key and the old entries age out on their TTL.
+
+With the default per-process cache, warming only helps the process that does
+it, so JOURNEY_CACHE_WARM_ON_STARTUP makes every web worker warm its own cache
+in the background when it serves its first request. `manage.py warm_cache`
+does the same from outside and is only useful with a shared CACHES backend.
+"""
+
+import gzip
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from urllib.parse import parse_qsl
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_started
+from django.db import connection
+from django.utils import timezone
+
+from station.invalidation import register
+from station.notify import ensure_listener
+
+logger = logging.getLogger(__name__)
+
+JOURNEY_LIST_CACHE_KEY = "journey-list:{generation}:{digest}"
+JOURNEY_LIST_GENERATION_KEY = "journey-list:generation"
+JOURNEY_LIST_FILTERS = ("train", "departure_time", "arrival_time")
+JOURNEY_LIST_REQUEST = re.compile(
+    r'"GET (?P<path>/api/station/journeys/)(?:\?(?P<query>[^ "]*))? HTTP'
+)
+
+
+def normalize_params(query_params):
+    """Keep only the filters that change the list, in a canonical form."""
+    params = {}
+    for name in JOURNEY_LIST_FILTERS:
+        value = query_params.get(name)
+        if not value:
+            continue
+        if name == "train":
+            value = ",".join(sorted(set(value.split(",")), key=str))
+        params[name] = value
+    return params
+
+
+def journey_list_key(params):
+    canonical = "&".join(f"{name}={params[name]}" for name in sorted(params))
+    digest = hashlib.sha256(canonical.encode()).hexdigest()[:32]
+    generation = cache.get_or_set(JOURNEY_LIST_GENERATION_KEY, 0, timeout=None)
+    return JOURNEY_LIST_CACHE_KEY.format(generation=generation, digest=digest)
+
+
+def invalidate_journey_lists():
+    try:
+        cache.incr(JOURNEY_LIST_GENERATION_KEY)
+    except ValueError:
+        cache.set(JOURNEY_LIST_GENERATION_KEY, 1, timeout=None)
+
+
+def store(key, data):
+    now = time.time()
+    cache.set(
+        key,
+        {"data": data, "fresh_until": now + settings.JOURNEY_LIST_FRESH_SECONDS},
+        timeout=(
+            settings.JOURNEY_LIST_FRESH_SECONDS + settings.JOURNEY_LIST_STALE_SECONDS
+        ),
+    )
+
+
+def start_refresh(function):
+    threading.Thread(target=function, daemon=True).start()
+
+
+def refresh(key, compute):
+    try:
+        store(key, compute())
+    except Exception:
+        logger.exception("Refreshing %s failed", key)
+    finally:
+        cache.delete(key + ":refresh")
+        connection.close()
+
+
+def get_journey_list(params, compute):
+    """Journey list data for normalized ``params``.
+
+    ``compute`` builds the data from the database; it runs inline on a miss
+    and in a background thread when a stale entry is served.
+    """
+    ensure_listener()
+    key = journey_list_key(params)
+    entry = cache.get(key)
+    if entry is None:
+        data = compute()
+        store(key, data)
+        return data
+
+    if entry["fresh_until"] <= time.time() and cache.add(
+        key + ":refresh", True, timeout=settings.JOURNEY_LIST_STALE_SECONDS
+    ):
+        start_refresh(lambda: refresh(key, compute))
+    return entry["data"]
+
+
+def warm(params, compute):
+    store(journey_list_key(params), compute())
+
+
+def read_lines(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", errors="replace") as log:
+        yield from log
+
+
+def is_current(params, today):
+    """Skip filters for past dates and values the list would reject."""
+    try:
+        for name in ("departure_time", "arrival_time"):
+            if name in params and date.fromisoformat(params[name]) < today:
+                return False
+        if "train" in params:
+            [int(train_id) for train_id in params["train"].split(",")]
+    except ValueError:
+        return False
+    return True
+
+
+def warm_targets(logs, top, days):
+    """The unfiltered list, the next ``days`` dates and the ``top`` logged
+    filters, without duplicates."""
+    today = timezone.localdate()
+    targets = [{}]
+    targets += [
+        {"departure_time": (today + timedelta(days=offset)).isoformat()}
+        for offset in range(days)
+    ]
+
+    popular = Counter()
+    for path in logs:
+        for line in read_lines(path):
+            match = JOURNEY_LIST_REQUEST.search(line)
+            if match:
+                params = normalize_params(dict(parse_qsl(match["query"] or "")))
+                if is_current(params, today):
+                    popular[tuple(sorted(params.items()))] += 1
+    targets += [dict(params) for params, _ in popular.most_common(top)]
+
+    unique = {tuple(sorted(params.items())): params for params in targets}
+    return list(unique.values())
+
+
+def warm_all(targets):
+    from station.views import JourneyViewSet
+
+    for params in targets:
+        warm(params, lambda: JourneyViewSet.journey_list_data(params))
+    return len(targets)
+
+
+def warm_worker():
+    try:
+        warm_all(
+            warm_targets(
+                settings.JOURNEY_CACHE_WARM_LOGS,
+                settings.JOURNEY_CACHE_WARM_TOP,
+                settings.JOURNEY_CACHE_WARM_DAYS,
+            )
+        )
+    except Exception:
+        logger.exception("Warming the journey list cache failed")
+    finally:
+        connection.close()
+
+
+def warm_on_first_request(sender, **kwargs):
+    # Management commands never serve a request, so only web workers warm.
+    request_started.disconnect(warm_on_first_request)
+    start_refresh(warm_worker)
+
+
+def warm_on_startup():
+    if settings.JOURNEY_CACHE_WARM_ON_STARTUP:
+        request_started.connect(warm_on_first_request)
+
+
+register("journey-list", lambda keys: invalidate_journey_lists())
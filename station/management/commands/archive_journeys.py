@@ -0,0 +1,57 @@
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from station.archive import archive_batch
+from station.events import publish_resync
+from station.invalidation import invalidate
+from station.models import SeatOccupancy, Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Move tickets of journeys that arrived more than --days ago into the "
+        "archive table, in batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.TICKET_ARCHIVE_AFTER_DAYS,
+            help="Archive journeys that arrived at least this many days ago",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.TICKET_ARCHIVE_BATCH_SIZE,
+            help="Tickets moved per transaction",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        batch_size = options["batch_size"]
+        archived = 0
+        journey_ids = set()
+
+        while True:
+            moved = archive_batch(
+                Ticket.objects.filter(journey__arrival_time__lt=cutoff),
+                batch_size,
+                journey_ids=journey_ids,
+            )
+            if not moved:
+                break
+            archived += moved
+            self.stdout.write(f"Archived {archived} tickets")
+
+        SeatOccupancy.objects.filter(journey__arrival_time__lt=cutoff).delete()
+        if journey_ids:
+            invalidate("journey-list")
+            invalidate("fare-quotes", *sorted(journey_ids))
+            transaction.on_commit(partial(publish_resync, sorted(journey_ids)))
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} tickets in total"))
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from station.cancellation import cancel_journey
+from station.models import Journey
+
+
+class Command(BaseCommand):
+    help = (
+        "Cancel journeys: stop bookings, queue a notification per affected "
+        "order and move their tickets to the archive in batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("journey_ids", nargs="+", type=int)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.JOURNEY_CANCEL_BATCH_SIZE,
+            help="Tickets released per transaction",
+        )
+
+    def handle(self, *args, **options):
+        journeys = Journey.objects.select_related("route").in_bulk(
+            options["journey_ids"]
+        )
+        missing = set(options["journey_ids"]) - set(journeys)
+        if missing:
+            raise CommandError(
+                f"Unknown journeys: {', '.join(map(str, sorted(missing)))}"
+            )
+
+        for journey in journeys.values():
+            released = cancel_journey(
+                journey,
+                options["batch_size"],
+                progress=lambda done, total: self.stdout.write(
+                    f"Journey {journey.pk}: released {done}/{total} tickets"
+                ),
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Cancelled journey {journey.pk}, released {released} tickets"
+                )
+            )
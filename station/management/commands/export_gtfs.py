@@ -0,0 +1,62 @@
+import json
+import os
+import zipfile
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from station.gtfs import GTFS_FILES, feed_versions, write_file
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the timetable as a static GTFS zip. With --incremental, files "
+        "whose source tables did not change since the last export are copied "
+        "from it instead of being rebuilt"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Path of the zip file to write")
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Reuse unchanged files from the existing export",
+        )
+
+    def handle(self, *args, **options):
+        output = Path(options["output"])
+        manifest = output.with_name(output.name + ".manifest.json")
+        versions = feed_versions()
+
+        unchanged = set()
+        if options["incremental"] and output.exists() and manifest.exists():
+            previous = json.loads(manifest.read_text())
+            unchanged = {
+                name for name, version in versions.items()
+                if previous.get(name) == version
+            }
+
+        partial = output.with_name(output.name + ".partial")
+        with zipfile.ZipFile(partial, "w", zipfile.ZIP_DEFLATED) as archive, (
+            zipfile.ZipFile(output) if unchanged else nullcontext()
+        ) as previous_archive:
+            for name in GTFS_FILES:
+                if name in unchanged:
+                    with previous_archive.open(name) as source, archive.open(
+                        name, "w", force_zip64=True
+                    ) as target:
+                        while chunk := source.read(1 << 20):
+                            target.write(chunk)
+                else:
+                    for _ in write_file(archive, name):
+                        pass
+        os.replace(partial, output)
+        manifest.write_text(json.dumps(versions, indent=2))
+
+        rebuilt = [name for name in GTFS_FILES if name not in unchanged]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {output}; rebuilt {', '.join(rebuilt) or 'nothing'}"
+            )
+        )
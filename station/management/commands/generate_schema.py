@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from train_station_api_service.schema import write_schema
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema served by /api/schema/"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="Output path (default OPENAPI_SCHEMA_FILE)")
+
+    def handle(self, *args, **options):
+        artifact = write_schema(options["file"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {artifact.path} (sha256 {artifact.digest})")
+        )
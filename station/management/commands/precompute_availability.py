@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from station.availability import precompute, stale_origins
+from station.models import Station
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute the station-pair availability matrix. Run it nightly with "
+        "--full to move the booking horizon, and often without it to refresh "
+        "origins whose journeys or bookings changed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute every origin instead of only the stale ones",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.AVAILABILITY_WORKERS,
+            help="Worker processes; 0 or 1 computes in this process",
+        )
+
+    def handle(self, *args, **options):
+        if options["full"]:
+            origin_ids = list(Station.objects.values_list("id", flat=True))
+        else:
+            origin_ids = list(stale_origins())
+
+        started = time.monotonic()
+        stored = precompute(origin_ids, workers=options["workers"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Computed availability for {stored} origins "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        )
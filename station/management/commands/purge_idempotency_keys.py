@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from station.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete idempotency keys older than IDEMPOTENCY_KEY_TTL"
+
+    def handle(self, *args, **options):
+        expired_before = timezone.now() - timedelta(
+            seconds=settings.IDEMPOTENCY_KEY_TTL
+        )
+        deleted, _ = IdempotencyKey.objects.filter(
+            created_at__lt=expired_before
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} idempotency keys"))
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from station.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = "Delete tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS"
+
+    def handle(self, *args, **options):
+        expired_before = timezone.now() - timedelta(
+            days=settings.SYNC_TOMBSTONE_RETENTION_DAYS
+        )
+        deleted, _ = Tombstone.objects.filter(
+            deleted_at__lt=expired_before
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones"))
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+from station.models import SlowQuery
+
+
+class Command(BaseCommand):
+    help = "Summarize logged slow queries by fingerprint, slowest total first"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=7, help="Only look at this many days"
+        )
+        parser.add_argument(
+            "--top", type=int, default=20, help="Number of fingerprints to show"
+        )
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="Print the latest captured EXPLAIN plan of each fingerprint",
+        )
+        parser.add_argument(
+            "--purge",
+            action="store_true",
+            help="Delete entries older than SLOW_QUERY_RETENTION_DAYS first",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        if options["purge"]:
+            deleted, _ = SlowQuery.objects.filter(
+                created_at__lt=now - timedelta(days=settings.SLOW_QUERY_RETENTION_DAYS)
+            ).delete()
+            self.stdout.write(f"Deleted {deleted} old slow queries")
+
+        queries = SlowQuery.objects.filter(
+            created_at__gte=now - timedelta(days=options["days"])
+        )
+        summary = (
+            queries.values("fingerprint")
+            .annotate(
+                total=Sum("duration_ms"),
+                calls=Count("id"),
+                mean=Avg("duration_ms"),
+                slowest=Max("duration_ms"),
+            )
+            .order_by("-total")[: options["top"]]
+        )
+
+        self.stdout.write(
+            f"{'total ms':>12} {'calls':>7} {'mean ms':>9} {'max ms':>9}  fingerprint"
+        )
+        for row in summary:
+            same = queries.filter(fingerprint=row["fingerprint"])
+            latest = same.latest("id")
+            views = sorted(set(same.values_list("view_name", flat=True)))
+            self.stdout.write(
+                f"{row['total']:>12.1f} {row['calls']:>7} {row['mean']:>9.1f} "
+                f"{row['slowest']:>9.1f}  {row['fingerprint']}  {', '.join(views)}"
+            )
+            self.stdout.write(f"    {latest.sql}")
+            if options["plans"]:
+                planned = same.exclude(plan="").order_by("-id").first()
+                if planned is not None:
+                    for line in planned.plan.splitlines():
+                        self.stdout.write(f"      {line}")
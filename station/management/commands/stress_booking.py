@@ -0,0 +1,133 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from station.models import Journey, Route, Station, Train, TrainType
+from station.stress import run_level, stress_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Book one journey from many concurrent clients through the order API, "
+        "then check that no seat was sold twice and every failure was a clean "
+        "4xx. Meant for a local Postgres, never production"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--levels",
+            default="10,50,200",
+            help="Comma separated numbers of concurrent clients",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=5, help="Bookings per client"
+        )
+        parser.add_argument(
+            "--hot-seats",
+            type=int,
+            default=4,
+            help="Seats of the first cargo every client fights over",
+        )
+        parser.add_argument(
+            "--hot-share",
+            type=float,
+            default=0.5,
+            help="Share of bookings aimed at the hot seats",
+        )
+        parser.add_argument(
+            "--cargos", type=int, default=4, help="Cargos of the stress train"
+        )
+        parser.add_argument(
+            "--places", type=int, default=50, help="Places per cargo"
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the clients' seat choices"
+        )
+        parser.add_argument(
+            "--load-shedding",
+            action="store_true",
+            help="Keep the load shedder on; its 503s are counted as shed",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the stress journeys, orders and users afterwards",
+        )
+        parser.add_argument(
+            "--allow-non-postgres",
+            action="store_true",
+            help="Run on another database backend anyway",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql" and not options["allow_non_postgres"]:
+            raise CommandError(
+                "The stress test needs Postgres row locking to mean anything; "
+                "pass --allow-non-postgres to run it anyway."
+            )
+        try:
+            levels = [int(level) for level in options["levels"].split(",")]
+        except ValueError:
+            raise CommandError("--levels must be comma separated integers")
+
+        users = stress_users(max(levels))
+        route, train = self.create_fixture(options["cargos"], options["places"])
+        failed = False
+        try:
+            for level in levels:
+                # A fresh journey per level keeps levels comparable.
+                departure_time = timezone.now() + timedelta(days=1)
+                journey = Journey.objects.create(
+                    route=route,
+                    train=train,
+                    departure_time=departure_time,
+                    arrival_time=departure_time + timedelta(hours=5),
+                )
+                result = run_level(
+                    journey,
+                    users[:level],
+                    options["requests"],
+                    options["hot_seats"],
+                    options["hot_share"],
+                    seed=options["seed"],
+                    load_shedding=options["load_shedding"],
+                )
+                self.stdout.write(result.summary())
+                for error in result.errors[:5]:
+                    self.stdout.write(self.style.ERROR(f"  {error}"))
+                failed |= not result.ok
+        finally:
+            if not options["keep"]:
+                Station.objects.filter(
+                    pk__in=[route.source_id, route.destination_id]
+                ).delete()
+                train.delete()
+                for user in users:
+                    user.delete()
+
+        if failed:
+            raise CommandError(
+                "Stress test failed: double sales, errors or non-4xx failures"
+            )
+        self.stdout.write(self.style.SUCCESS("No seat sold twice, no 5xx"))
+
+    @staticmethod
+    def create_fixture(cargos, places):
+        route = Route.objects.create(
+            source=Station.objects.create(
+                name="Stress origin", latitude=0, longitude=0
+            ),
+            destination=Station.objects.create(
+                name="Stress destination", latitude=0, longitude=1
+            ),
+            distance=100,
+        )
+        train = Train.objects.create(
+            name="Stress train",
+            cargo_num=cargos,
+            places_in_cargo=places,
+            train_type=TrainType.objects.get_or_create(name="Stress")[0],
+        )
+        return route, train
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from station.journey_cache import warm_all, warm_targets
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render the journey list cache for the unfiltered list, the next "
+        "--days departure dates and the --top filters found in access logs. "
+        "Only reaches the web workers with a shared CACHES backend; otherwise "
+        "set JOURNEY_CACHE_WARM_ON_STARTUP"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "logs", nargs="*", help="Access log files (plain or .gz) to mine"
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=settings.JOURNEY_CACHE_WARM_TOP,
+            help="Number of most requested filter combinations to warm",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.JOURNEY_CACHE_WARM_DAYS,
+            help="Warm departure_time filters for this many days from today",
+        )
+
+    def handle(self, *args, **options):
+        warmed = warm_all(
+            warm_targets(options["logs"], options["top"], options["days"])
+        )
+        self.stdout.write(self.style.SUCCESS(f"Warmed {warmed} journey list entries"))
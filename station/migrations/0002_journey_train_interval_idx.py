@@ -0,0 +1,20 @@
+# Generated by Django 5.1.3 on 2026-10-19 02:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["train", "departure_time", "arrival_time"],
+                name="journey_train_interval_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-19 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0003_order_user_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["route", "departure_time"], name="journey_route_departure_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.1.3 on 2026-10-19 02:52
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0004_journey_route_departure_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="price",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=10, null=True
+            ),
+        ),
+        migrations.CreateModel(
+            name="Fare",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "base_price",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("50.00"), max_digits=8
+                    ),
+                ),
+                (
+                    "price_per_km",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("1.00"), max_digits=8
+                    ),
+                ),
+                ("first_class_cargos", models.PositiveIntegerField(default=0)),
+                (
+                    "first_class_multiplier",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("1.50"), max_digits=4
+                    ),
+                ),
+                (
+                    "train_type",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fare",
+                        to="station.traintype",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.3 on 2026-10-19 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0008_order_created_at_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=32)),
+                ("object_id", models.PositiveBigIntegerField()),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="journey",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="route",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="station",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="train",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(fields=["updated_at", "id"], name="journey_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="route",
+            index=models.Index(fields=["updated_at", "id"], name="route_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="station",
+            index=models.Index(fields=["updated_at", "id"], name="station_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="train",
+            index=models.Index(fields=["updated_at", "id"], name="train_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["deleted_at", "id"], name="tombstone_deleted_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,140 @@
+# Generated by Django 5.1.3 on 2026-10-19 03:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_segments(apps, schema_editor):
+    """Existing routes have no intermediate stops: every ticket covers the
+    single segment 0 -> 1."""
+    Ticket = apps.get_model("station", "Ticket")
+    ArchivedTicket = apps.get_model("station", "ArchivedTicket")
+    SeatOccupancy = apps.get_model("station", "SeatOccupancy")
+
+    Ticket.objects.update(to_stop=1)
+    ArchivedTicket.objects.update(to_stop=1)
+    tickets = Ticket.objects.values_list("journey_id", "cargo", "seat").iterator()
+    batch = []
+    for journey_id, cargo, seat in tickets:
+        batch.append(
+            SeatOccupancy(journey_id=journey_id, cargo=cargo, seat=seat, segments=1)
+        )
+        if len(batch) == 5000:
+            SeatOccupancy.objects.bulk_create(batch)
+            batch = []
+    SeatOccupancy.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0010_archivedticket"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RouteStop",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("position", models.PositiveSmallIntegerField()),
+                (
+                    "distance",
+                    models.IntegerField(help_text="Kilometres from the route source"),
+                ),
+            ],
+            options={
+                "ordering": ["position"],
+            },
+        ),
+        migrations.CreateModel(
+            name="SeatOccupancy",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cargo", models.IntegerField()),
+                ("seat", models.IntegerField()),
+                ("segments", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name="ticket",
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name="archivedticket",
+            name="from_stop",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="archivedticket",
+            name="to_stop",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="from_stop",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="to_stop",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["journey", "cargo", "seat"], name="ticket_journey_seat_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="routestop",
+            name="route",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="stops",
+                to="station.route",
+            ),
+        ),
+        migrations.AddField(
+            model_name="routestop",
+            name="station",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="route_stops",
+                to="station.station",
+            ),
+        ),
+        migrations.AddField(
+            model_name="seatoccupancy",
+            name="journey",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="occupied_seats",
+                to="station.journey",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="routestop",
+            unique_together={("route", "position")},
+        ),
+        migrations.AlterUniqueTogether(
+            name="seatoccupancy",
+            unique_together={("journey", "cargo", "seat")},
+        ),
+        migrations.RunPython(backfill_segments, migrations.RunPython.noop),
+    ]
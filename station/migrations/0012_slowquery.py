@@ -0,0 +1,39 @@
+# Generated by Django 5.1.3 on 2026-10-19 03:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0011_route_stops_seat_occupancy"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fingerprint", models.CharField(max_length=16)),
+                ("sql", models.TextField()),
+                ("view_name", models.CharField(blank=True, max_length=255)),
+                ("database", models.CharField(max_length=32)),
+                ("duration_ms", models.FloatField()),
+                ("plan", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["created_at"], name="slowquery_created_idx")
+                ],
+            },
+        ),
+    ]
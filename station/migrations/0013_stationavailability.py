@@ -0,0 +1,35 @@
+# Generated by Django 5.1.3 on 2026-10-19 03:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0012_slowquery"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StationAvailability",
+            fields=[
+                (
+                    "origin",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="availability",
+                        serialize=False,
+                        to="station.station",
+                    ),
+                ),
+                ("matrix", models.JSONField(default=dict)),
+                ("computed_at", models.DateTimeField()),
+                ("changed_at", models.DateTimeField(null=True)),
+            ],
+            options={
+                "verbose_name_plural": "station availabilities",
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.3 on 2026-10-19 03:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0014_journey_cancellation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedticket",
+            name="cancelled",
+            field=models.BooleanField(
+                default=False, help_text="Released because the journey was cancelled"
+            ),
+        ),
+    ]
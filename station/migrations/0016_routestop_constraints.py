@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-19 03:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0015_archivedticket_cancelled"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="routestop",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("position__gte", 1), ("position__lt", 63)),
+                name="routestop_position_range",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="routestop",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("distance__gt", 0)),
+                name="routestop_distance_positive",
+            ),
+        ),
+    ]
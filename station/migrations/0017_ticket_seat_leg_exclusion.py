@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+def add_seat_leg_exclusion(apps, schema_editor):
+    """Refuse two tickets for overlapping legs of one seat in the database.
+
+    SeatOccupancy.reserve guards bookings made through Ticket.save; this
+    covers bulk inserts and raw SQL. A null to_stop is the route destination,
+    which int4range reads as an open upper bound. Postgres only.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        "ALTER TABLE station_ticket ADD CONSTRAINT ticket_seat_leg_excl "
+        "EXCLUDE USING gist (journey_id WITH =, cargo WITH =, seat WITH =, "
+        "int4range(from_stop, to_stop) WITH &&)"
+    )
+
+
+def drop_seat_leg_exclusion(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE station_ticket DROP CONSTRAINT IF EXISTS ticket_seat_leg_excl"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0016_routestop_constraints"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_seat_leg_exclusion, drop_seat_leg_exclusion),
+    ]
@@ -6,9 +6,13 @@ from django.contrib.auth.models import User
 
 import os
 import uuid
+from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
 from django.utils.text import slugify
 
 
@@ -16,6 +20,12 @@ class Station(models.Model):
     name = models.CharField(max_length=255)
     latitude = models.FloatField()
     longitude = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="station_updated_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -29,11 +39,129 @@ class Route(models.Model):
         Station, related_name="arrival_station", on_delete=models.CASCADE
     )
     distance = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
 
+    # Seat inventory keeps one bit per segment in a bigint.
+    MAX_SEGMENTS = 63
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="route_updated_idx"),
+        ]
 
     def __str__(self):
         return f"{self.source} - {self.destination} ({self.distance} km)"
 
+    def clean(self):
+        if self.pk and self.stops.filter(distance__gte=self.distance).exists():
+            raise ValidationError(
+                {"distance": "distance must be longer than the last stop's"}
+            )
+
+    def stop_distances(self):
+        """Kilometres from the source for every stop, source and destination
+        included; stop numbers index this list."""
+        return [0, *(stop.distance for stop in self.stops.all()), self.distance]
+
+    @property
+    def last_stop(self):
+        return len(self.stops.all()) + 1
+
+
+class RouteStop(models.Model):
+    """Intermediate call of a route. Stop 0 is the route source and the stop
+    after the last intermediate one is its destination."""
+
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="stops")
+    station = models.ForeignKey(
+        Station, on_delete=models.CASCADE, related_name="route_stops"
+    )
+    position = models.PositiveSmallIntegerField()
+    distance = models.IntegerField(help_text="Kilometres from the route source")
+
+    class Meta:
+        ordering = ["position"]
+        unique_together = ("route", "position")
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(position__gte=1, position__lt=63),
+                name="routestop_position_range",
+            ),
+            models.CheckConstraint(
+                condition=Q(distance__gt=0), name="routestop_distance_positive"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.route}: {self.position}. {self.station}"
+
+    @staticmethod
+    def validate_unbooked(route_id):
+        """Stop numbers are baked into sold tickets and seat occupancy, so the
+        stop list of a route with tickets on upcoming journeys is frozen."""
+        if Ticket.objects.filter(
+            journey__route_id=route_id, journey__arrival_time__gt=timezone.now()
+        ).exists():
+            raise ValidationError(
+                "stops cannot be added, removed or renumbered "
+                "while upcoming journeys on the route have tickets"
+            )
+
+    def clean(self):
+        if not 1 <= self.position < Route.MAX_SEGMENTS:
+            raise ValidationError(
+                {"position": f"position must be in range (1, {Route.MAX_SEGMENTS - 1})"}
+            )
+
+        others = RouteStop.objects.filter(route_id=self.route_id).exclude(pk=self.pk)
+        before = (
+            others.filter(position__lt=self.position)
+            .order_by("-position")
+            .values_list("distance", flat=True)
+            .first()
+        )
+        after = (
+            others.filter(position__gt=self.position)
+            .order_by("position")
+            .values_list("distance", flat=True)
+            .first()
+        )
+        before = 0 if before is None else before
+        after = self.route.distance if after is None else after
+        if not before < self.distance < after:
+            raise ValidationError(
+                {
+                    "distance": f"distance must grow with position: "
+                    f"{before} < distance < {after}"
+                }
+            )
+
+        previous = (
+            RouteStop.objects.filter(pk=self.pk)
+            .values_list("route_id", "position")
+            .first()
+        )
+        if previous != (self.route_id, self.position):
+            RouteStop.validate_unbooked(self.route_id)
+            if previous:
+                RouteStop.validate_unbooked(previous[0])
+
+    def save(
+        self,
+        force_insert=False,
+        force_update=False,
+        using=None,
+        update_fields=None,
+    ):
+        self.full_clean()
+        return super(RouteStop, self).save(
+            force_insert, force_update, using, update_fields
+        )
+
+    def delete(self, using=None, keep_parents=False):
+        RouteStop.validate_unbooked(self.route_id)
+        return super(RouteStop, self).delete(using, keep_parents)
+
 
 class Crew(models.Model):
     first_name = models.CharField(max_length=255)
@@ -54,6 +182,25 @@ class TrainType(models.Model):
         return self.name
 
 
+class Fare(models.Model):
+    train_type = models.OneToOneField(
+        TrainType, on_delete=models.CASCADE, related_name="fare"
+    )
+    base_price = models.DecimalField(
+        max_digits=8, decimal_places=2, default=Decimal("50.00")
+    )
+    price_per_km = models.DecimalField(
+        max_digits=8, decimal_places=2, default=Decimal("1.00")
+    )
+    first_class_cargos = models.PositiveIntegerField(default=0)
+    first_class_multiplier = models.DecimalField(
+        max_digits=4, decimal_places=2, default=Decimal("1.50")
+    )
+
+    def __str__(self):
+        return f"{self.train_type} ({self.base_price} + {self.price_per_km}/km)"
+
+
 def train_image_file_path(instance, filename):
     _, extension = os.path.splitext(filename)
     filename = f"{slugify(instance.name)}_{uuid.uuid4()}.{extension}"
@@ -69,6 +216,12 @@ class Train(models.Model):
         TrainType, on_delete=models.CASCADE, related_name="trains"
     )
     image = models.ImageField(null=True, upload_to=train_image_file_path)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="train_updated_idx"),
+        ]
 
     @property
     def capacity(self) -> int:
@@ -84,21 +237,58 @@ class Journey(models.Model):
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crews = models.ManyToManyField(Crew, related_name="journeys")
+    updated_at = models.DateTimeField(auto_now=True)
+    cancelled_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         verbose_name_plural = "journeys"
         ordering = ["-departure_time"]
+        indexes = [
+            models.Index(
+                fields=["train", "departure_time", "arrival_time"],
+                name="journey_train_interval_idx",
+            ),
+            models.Index(
+                fields=["route", "departure_time"],
+                name="journey_route_departure_idx",
+            ),
+            models.Index(fields=["updated_at", "id"], name="journey_updated_idx"),
+        ]
 
     def __str__(self):
         return self.train.name + " " + str(self.departure_time)
 
+    @staticmethod
+    def overlapping(departure_time, arrival_time):
+        return Journey.objects.filter(
+            departure_time__lt=arrival_time, arrival_time__gt=departure_time
+        )
+
+    @staticmethod
+    def lock_schedules(train_ids, crew_ids):
+        """Lock trains, then crews, in id order so overlap checks for the same
+        train or crew run one at a time; call inside a transaction."""
+        for model, ids in ((Train, train_ids), (Crew, crew_ids)):
+            list(
+                model.objects.select_for_update()
+                .filter(pk__in=ids)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+
 
 class Order(models.Model):
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="order_user_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return str(self.created_at)
@@ -111,13 +301,12 @@ class Ticket(models.Model):
         Journey, on_delete=models.CASCADE, related_name="tickets"
     )
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="tickets")
-
-    class Meta:
-        unique_together = ("cargo", "seat", "journey")
-        ordering = ("cargo", "seat")
-
-    def __str__(self):
-        return f"{self.journey} - (seat: {self.seat})"
+    price = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
+    from_stop = models.PositiveSmallIntegerField(default=0)
+    # Empty means the route destination.
+    to_stop = models.PositiveSmallIntegerField(null=True, blank=True)
 
     @staticmethod
     def validate_ticket(cargo, seat, train, error_to_raise):
@@ -136,13 +325,32 @@ class Ticket(models.Model):
                     }
                 )
 
+    @staticmethod
+    def validate_stops(from_stop, to_stop, route, error_to_raise):
+        last_stop = route.last_stop
+        if not 0 <= from_stop < to_stop <= last_stop:
+            raise error_to_raise(
+                {
+                    "to_stop": f"stops must satisfy "
+                    f"0 <= from_stop < to_stop <= {last_stop}"
+                }
+            )
+
     def clean(self):
+        if self.to_stop is None:
+            self.to_stop = self.journey.route.last_stop
         Ticket.validate_ticket(
             self.cargo,
             self.seat,
             self.journey.train,
             ValidationError,
         )
+        Ticket.validate_stops(
+            self.from_stop,
+            self.to_stop,
+            self.journey.route,
+            ValidationError,
+        )
 
     def save(
         self,
@@ -152,13 +360,283 @@ class Ticket(models.Model):
         update_fields=None,
     ):
         self.full_clean()
-        return super(Ticket, self).save(
-            force_insert, force_update, using, update_fields
-        )
+        with transaction.atomic(using=using):
+            if self.pk:
+                previous = (
+                    Ticket.objects.filter(pk=self.pk)
+                    .values("journey_id", "cargo", "seat", "from_stop", "to_stop")
+                    .first()
+                )
+                if previous:
+                    SeatOccupancy.release(**previous)
+            SeatOccupancy.reserve(
+                self.journey_id, self.cargo, self.seat, self.from_stop, self.to_stop
+            )
+            return super(Ticket, self).save(
+                force_insert, force_update, using, update_fields
+            )
 
     def __str__(self):
         return f"{str(self.journey)} (cargo: {self.cargo}, seat: {self.seat})"
 
+    class Meta:
+        ordering = ["cargo", "seat"]
+        indexes = [
+            models.Index(
+                fields=["journey", "cargo", "seat"], name="ticket_journey_seat_idx"
+            ),
+        ]
+        # On Postgres, migration 0017 adds ticket_seat_leg_excl: no two
+        # tickets of a seat may cover overlapping legs of a journey.
+
+
+def segment_mask(from_stop, to_stop):
+    """Bits of the segments between two stops; segment i runs from stop i."""
+    return (1 << to_stop) - (1 << from_stop)
+
+
+class SeatOccupancy(models.Model):
+    """Segments of a journey already sold for one seat, as a bitset.
+
+    A seat can be sold again for any part of the route whose mask does not
+    intersect ``segments``, so availability for a leg is one bitwise AND per
+    occupied seat instead of comparing ticket ranges. Maintained by
+    Ticket.save and the ticket delete signal.
+    """
+
+    journey = models.ForeignKey(
+        Journey, on_delete=models.CASCADE, related_name="occupied_seats"
+    )
+    cargo = models.IntegerField()
+    seat = models.IntegerField()
+    segments = models.BigIntegerField(default=0)
+
     class Meta:
         unique_together = ("journey", "cargo", "seat")
+
+    def __str__(self):
+        return f"{self.journey_id} (cargo: {self.cargo}, seat: {self.seat})"
+
+    @staticmethod
+    def taken(journey_id, from_stop, to_stop):
+        """Seats of a journey that are sold on any segment of the leg."""
+        return (
+            SeatOccupancy.objects.filter(journey_id=journey_id)
+            .alias(overlap=F("segments").bitand(segment_mask(from_stop, to_stop)))
+            .exclude(overlap=0)
+        )
+
+    @staticmethod
+    def reserve(journey_id, cargo, seat, from_stop, to_stop):
+        """Mark a leg of a seat as sold; call inside a transaction."""
+        mask = segment_mask(from_stop, to_stop)
+        occupancy, _ = SeatOccupancy.objects.select_for_update().get_or_create(
+            journey_id=journey_id, cargo=cargo, seat=seat
+        )
+        if occupancy.segments & mask:
+            raise ValidationError(
+                {"seat": "seat is already taken on this part of the route"}
+            )
+        occupancy.segments |= mask
+        occupancy.save(update_fields=["segments"])
+
+    @staticmethod
+    def release(journey_id, cargo, seat, from_stop, to_stop):
+        seats = SeatOccupancy.objects.filter(
+            journey_id=journey_id, cargo=cargo, seat=seat
+        )
+        seats.update(
+            segments=F("segments").bitand(~segment_mask(from_stop, to_stop))
+        )
+        seats.filter(segments=0).delete()
+
+
+class ArchivedTicket(models.Model):
+    """Ticket of a finished or cancelled journey, moved here by
+    archive_journeys or cancel_journey.
+
+    Keeps the original ticket id and check-in time so the hot ticket table and
+    its unique index only hold journeys that can still be booked.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    cargo = models.IntegerField()
+    seat = models.IntegerField()
+    journey = models.ForeignKey(
+        Journey, on_delete=models.CASCADE, related_name="archived_tickets"
+    )
+    order = models.ForeignKey(
+        Order, on_delete=models.CASCADE, related_name="archived_tickets"
+    )
+    price = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
+    from_stop = models.PositiveSmallIntegerField(default=0)
+    to_stop = models.PositiveSmallIntegerField(null=True, blank=True)
+    checked_in_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    cancelled = models.BooleanField(
+        default=False, help_text="Released because the journey was cancelled"
+    )
+
+    class Meta:
         ordering = ["cargo", "seat"]
+
+    def __str__(self):
+        return f"{self.journey_id} (cargo: {self.cargo}, seat: {self.seat})"
+
+
+class TicketCheckIn(models.Model):
+    ticket = models.OneToOneField(
+        Ticket, on_delete=models.CASCADE, related_name="check_in"
+    )
+    checked_in_at = models.DateTimeField()
+    checked_in_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="+",
+    )
+
+    def __str__(self):
+        return f"{self.ticket} checked in at {self.checked_in_at}"
+
+    @staticmethod
+    def record_earliest(check_ins, batch_size=1000):
+        """Insert check-ins; on an existing one keep whichever scan came first.
+
+        Re-scans and uploads from other conductors never move a check-in
+        later or change who made it.
+        """
+        table = TicketCheckIn._meta.db_table
+        adapt = connection.ops.adapt_datetimefield_value
+        with connection.cursor() as cursor:
+            for start in range(0, len(check_ins), batch_size):
+                batch = check_ins[start:start + batch_size]
+                rows = ", ".join(["(%s, %s, %s)"] * len(batch))
+                cursor.execute(
+                    f"INSERT INTO {table} "
+                    "(ticket_id, checked_in_at, checked_in_by_id) "
+                    f"VALUES {rows} "
+                    "ON CONFLICT (ticket_id) DO UPDATE SET "
+                    "checked_in_at = excluded.checked_in_at, "
+                    "checked_in_by_id = excluded.checked_in_by_id "
+                    f"WHERE excluded.checked_in_at < {table}.checked_in_at",
+                    [
+                        value
+                        for check_in in batch
+                        for value in (
+                            check_in.ticket_id,
+                            adapt(check_in.checked_in_at),
+                            check_in.checked_in_by_id,
+                        )
+                    ],
+                )
+
+
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        unique_together = ("user", "key")
+
+    def __str__(self):
+        return f"{self.user_id}: {self.key}"
+
+    @property
+    def completed(self):
+        return self.status_code is not None
+
+
+class Tombstone(models.Model):
+    """Marks a deleted row so delta sync clients can drop it."""
+
+    model = models.CharField(max_length=32)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["deleted_at", "id"], name="tombstone_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted at {self.deleted_at}"
+
+
+class SlowQuery(models.Model):
+    """A query that ran over SLOW_QUERY_THRESHOLD_MS during a request."""
+
+    fingerprint = models.CharField(max_length=16)
+    sql = models.TextField()
+    view_name = models.CharField(max_length=255, blank=True)
+    database = models.CharField(max_length=32)
+    duration_ms = models.FloatField()
+    plan = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"], name="slowquery_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.fingerprint} {self.duration_ms:.0f} ms in {self.view_name}"
+
+
+class StationAvailability(models.Model):
+    """Precomputed availability of every trip leaving one station.
+
+    ``matrix`` maps destination id to date to ``[earliest departure,
+    journeys, minimum free seats]``; see station.availability. The row is
+    stale once ``changed_at`` passes ``computed_at``.
+    """
+
+    origin = models.OneToOneField(
+        Station,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="availability",
+    )
+    matrix = models.JSONField(default=dict)
+    computed_at = models.DateTimeField()
+    changed_at = models.DateTimeField(null=True)
+
+    class Meta:
+        verbose_name_plural = "station availabilities"
+
+    def __str__(self):
+        return f"Availability from {self.origin_id} at {self.computed_at}"
+
+
+class OrderNotification(models.Model):
+    """Outbox of messages to send to an order's customer."""
+
+    JOURNEY_CANCELLED = "journey_cancelled"
+    KIND_CHOICES = ((JOURNEY_CANCELLED, "Journey cancelled"),)
+
+    order = models.ForeignKey(
+        Order, on_delete=models.CASCADE, related_name="notifications"
+    )
+    journey = models.ForeignKey(
+        Journey, on_delete=models.CASCADE, related_name="notifications"
+    )
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    created_at = models.DateTimeField()
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("order", "journey", "kind")
+        indexes = [
+            models.Index(fields=["sent_at", "id"], name="notification_pending_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for order {self.order_id}"
@@ -0,0 +1,80 @@
+"""Postgres NOTIFY fan-out between worker processes.
+
+Each process runs at most one listener thread, on its own connection, that
+LISTENs on every registered channel and hands payloads to the channel's
+callback. On other database backends there is no cross-process channel and
+notify() delivers to the local callback directly.
+"""
+
+import logging
+import threading
+import time
+
+from django.db import connection, connections
+
+logger = logging.getLogger(__name__)
+
+_callbacks = {}
+
+
+def listen(channel, callback):
+    """Deliver payloads sent on ``channel`` to ``callback(payload)``."""
+    _callbacks[channel] = callback
+
+
+def is_postgres():
+    return connection.vendor == "postgresql"
+
+
+def notify(channel, payload):
+    if is_postgres():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [channel, payload])
+    else:
+        _callbacks[channel](payload)
+
+
+class NotifyListener(threading.Thread):
+    """Worker thread bridging Postgres NOTIFY into local callbacks."""
+
+    reconnect_delay = 1
+
+    def __init__(self):
+        super().__init__(name="pg-notify-listener", daemon=True)
+
+    def run(self):
+        import psycopg
+
+        while True:
+            try:
+                params = connections["default"].get_connection_params()
+                with psycopg.connect(autocommit=True, **params) as listen_connection:
+                    for channel in _callbacks:
+                        listen_connection.execute(f"LISTEN {channel}")
+                    for notification in listen_connection.notifies():
+                        self.dispatch(notification.channel, notification.payload)
+            except Exception:
+                logger.exception("NOTIFY listener failed, reconnecting")
+                time.sleep(self.reconnect_delay)
+
+    @staticmethod
+    def dispatch(channel, payload):
+        try:
+            _callbacks[channel](payload)
+        except Exception:
+            logger.exception("Handling NOTIFY on %s failed", channel)
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def ensure_listener():
+    """Start this process's listener thread once; a no-op off Postgres."""
+    global _listener
+    if _listener is not None or not is_postgres():
+        return
+    with _listener_lock:
+        if _listener is None:
+            _listener = NotifyListener()
+            _listener.start()
@@ -1,15 +1,30 @@
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
+from django.db.models import Q
 
 from rest_framework import serializers
+from station.events import publish_seat_change
+from station.fares import get_quotes, ticket_price
+from station.intervals import find_conflicts, group_intervals
+from station.ticket_changes import batched as batched_ticket_changes
+from station.tickets import make_ticket_token
 from station.models import (
     Station,
     Route,
+    RouteStop,
     Crew,
     TrainType,
     Train,
     Journey,
     Order,
     Ticket,
+    ArchivedTicket,
+    SeatOccupancy,
+    Tombstone,
 )
 
 
@@ -20,6 +35,11 @@ class StationSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "latitude", "longitude")
 
 
+class StationAutocompleteSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+
+
 class RouteSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -36,13 +56,22 @@ class RouteListSerializer(RouteSerializer):
         fields = ["id", "source", "destination", "distance"]
 
 
+class RouteStopSerializer(serializers.ModelSerializer):
+    station = serializers.CharField(source="station.name", read_only=True)
+
+    class Meta:
+        model = RouteStop
+        fields = ("position", "station", "distance")
+
+
 class RouteDetailSerializer(RouteSerializer):
     source = StationSerializer(many=False, read_only=True)
     destination = StationSerializer(many=False, read_only=True)
+    stops = RouteStopSerializer(many=True, read_only=True)
 
     class Meta:
         model = Route
-        fields = ["id", "source", "destination", "distance"]
+        fields = ["id", "source", "destination", "distance", "stops"]
 
 
 class CrewSerializer(serializers.ModelSerializer):
@@ -87,24 +116,131 @@ class TrainImageSerializer(serializers.ModelSerializer):
 
 
 class TicketSerializer(serializers.ModelSerializer):
+    # Validation, Ticket.clean and leg pricing all read the route's stops.
+    journey = serializers.PrimaryKeyRelatedField(
+        queryset=Journey.objects.select_related("route", "train").prefetch_related(
+            "route__stops"
+        )
+    )
+
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
-        Ticket.validate_cargo(
+        journey = attrs["journey"]
+        if journey.cancelled_at is not None:
+            raise serializers.ValidationError({"journey": "journey is cancelled"})
+        Ticket.validate_ticket(
             attrs["cargo"],
-            attrs["journey"].train.cargo_num,
+            attrs["seat"],
+            journey.train,
             serializers.ValidationError,
         )
-        Ticket.validate_seat(
-            attrs["seat"],
-            attrs["journey"].train.places_in_cargo,
+        if data.get("to_stop") is None:
+            data["to_stop"] = journey.route.last_stop
+        Ticket.validate_stops(
+            data.get("from_stop", 0),
+            data["to_stop"],
+            journey.route,
             serializers.ValidationError,
         )
+        if (
+            SeatOccupancy.taken(journey.id, data.get("from_stop", 0), data["to_stop"])
+            .filter(cargo=attrs["cargo"], seat=attrs["seat"])
+            .exists()
+        ):
+            raise serializers.ValidationError(
+                {"seat": "seat is already taken on this part of the route"}
+            )
 
         return data
 
+    def create(self, validated_data):
+        # A concurrent booking can still take the seat after validation.
+        try:
+            return super(TicketSerializer, self).create(validated_data)
+        except DjangoValidationError as error:
+            raise serializers.ValidationError(error.message_dict)
+
     class Meta:
         model = Ticket
-        fields = ("id", "cargo", "seat", "journey", "order")
+        fields = (
+            "id",
+            "cargo",
+            "seat",
+            "from_stop",
+            "to_stop",
+            "journey",
+            "order",
+            "price",
+        )
+        read_only_fields = ("price",)
+
+
+class JourneyBulkSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        attrs = super(JourneyBulkSerializer, self).validate(attrs)
+        if not attrs:
+            return attrs
+
+        train_ids = {journey["train"].id for journey in attrs}
+        crew_ids = {
+            crew.id for journey in attrs for crew in journey.get("crews", [])
+        }
+        Journey.lock_schedules(train_ids, crew_ids)
+        existing = (
+            Journey.overlapping(
+                min(journey["departure_time"] for journey in attrs),
+                max(journey["arrival_time"] for journey in attrs),
+            )
+            .filter(Q(train_id__in=train_ids) | Q(crews__id__in=crew_ids))
+            .values_list("id", "train_id", "departure_time", "arrival_time")
+            .distinct()
+        )
+        crew_rows = Journey.crews.through.objects.filter(
+            journey_id__in=[row[0] for row in existing], crew_id__in=crew_ids
+        ).values_list("journey_id", "crew_id")
+
+        rows = []
+        times = {}
+        for journey_id, train_id, departure_time, arrival_time in existing:
+            times[journey_id] = (departure_time, arrival_time)
+            if train_id in train_ids:
+                rows.append(
+                    (
+                        ("train", train_id),
+                        departure_time,
+                        arrival_time,
+                        f"journey {journey_id}",
+                    )
+                )
+        for journey_id, crew_id in crew_rows:
+            rows.append((("crew", crew_id), *times[journey_id], f"journey {journey_id}"))
+
+        candidates = []
+        for index, journey in enumerate(attrs):
+            keys = [("train", journey["train"].id)] + [
+                ("crew", crew.id) for crew in journey.get("crews", [])
+            ]
+            for key in keys:
+                candidate = (
+                    key,
+                    journey["departure_time"],
+                    journey["arrival_time"],
+                    f"item {index}",
+                )
+                rows.append(candidate)
+                candidates.append(candidate)
+
+        errors = [
+            f"{data}: {kind} {resource_id} is already assigned to "
+            f"overlapping {other}"
+            for (kind, resource_id), data, other in find_conflicts(
+                group_intervals(rows), candidates
+            )
+        ]
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        return attrs
 
 
 class JourneySerializer(serializers.ModelSerializer):
@@ -119,6 +255,73 @@ class JourneySerializer(serializers.ModelSerializer):
             "route",
             "crews"
         )
+        list_serializer_class = JourneyBulkSerializer
+
+    def validate(self, attrs):
+        data = super(JourneySerializer, self).validate(attrs=attrs)
+        if attrs["departure_time"] >= attrs["arrival_time"]:
+            raise serializers.ValidationError(
+                {"arrival_time": "arrival_time must be later than departure_time"}
+            )
+
+        # Batches are checked together against one interval tree in
+        # JourneyBulkSerializer instead of one query per journey.
+        if isinstance(self.parent, serializers.ListSerializer):
+            return data
+
+        Journey.lock_schedules(
+            [attrs["train"].id], [crew.id for crew in attrs.get("crews", [])]
+        )
+        overlapping = Journey.overlapping(
+            attrs["departure_time"], attrs["arrival_time"]
+        )
+        if self.instance is not None:
+            overlapping = overlapping.exclude(pk=self.instance.pk)
+
+        if overlapping.filter(train=attrs["train"]).exists():
+            raise serializers.ValidationError(
+                {"train": "train is already assigned to an overlapping journey"}
+            )
+
+        busy_crews = Crew.objects.filter(
+            id__in=[crew.id for crew in attrs.get("crews", [])],
+            journeys__in=overlapping,
+        ).distinct()
+        if busy_crews:
+            raise serializers.ValidationError(
+                {
+                    "crews": "crews already assigned to an overlapping journey: "
+                    + ", ".join(crew.full_name for crew in busy_crews)
+                }
+            )
+
+        return data
+
+
+class DepartureSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    train = serializers.CharField(source="train_name")
+    destination = serializers.CharField()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    seats_available = serializers.IntegerField()
+
+
+class FareQuoteSerializer(serializers.Serializer):
+    journey = serializers.IntegerField()
+    occupancy = serializers.FloatField()
+    first_class_cargos = serializers.IntegerField()
+    standard = serializers.DecimalField(max_digits=10, decimal_places=2)
+    first = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
+class CrewRosterSerializer(serializers.ModelSerializer):
+    train = serializers.CharField(source="train.name", read_only=True)
+    route = serializers.StringRelatedField(read_only=True)
+
+    class Meta:
+        model = Journey
+        fields = ("id", "train", "route", "departure_time", "arrival_time")
 
 
 class JourneyListSerializer(JourneySerializer):
@@ -143,6 +346,7 @@ class JourneyListSerializer(JourneySerializer):
             "seats_places_in_cargo_available",
             "count_taken_seats",
             "count_taken_cargo",
+            "cancelled_at",
         )
 
 
@@ -173,24 +377,187 @@ class JourneyDetailSerializer(JourneySerializer):
             "tickets",
             "taken_seats",
             "taken_cargo",
+            "cancelled_at",
+        )
+
+
+class OrderTicketSerializer(TicketSerializer):
+    # Boarding tokens are only rendered to the order's owner.
+    token = serializers.SerializerMethodField()
+
+    def get_token(self, ticket) -> str:
+        return make_ticket_token(ticket)
+
+    class Meta(TicketSerializer.Meta):
+        fields = (
+            "id",
+            "cargo",
+            "seat",
+            "from_stop",
+            "to_stop",
+            "journey",
+            "price",
+            "token",
+        )
+
+
+class ArchivedTicketSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = ArchivedTicket
+        fields = (
+            "id",
+            "cargo",
+            "seat",
+            "from_stop",
+            "to_stop",
+            "journey",
+            "price",
+            "checked_in_at",
+            "cancelled",
         )
 
 
 class OrderSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+    tickets = OrderTicketSerializer(many=True, read_only=False, allow_empty=False)
+    archived_tickets = ArchivedTicketSerializer(many=True, read_only=True)
 
     class Meta:
         model = Order
-        fields = ("id", "created_at", "tickets")
+        fields = ("id", "created_at", "tickets", "archived_tickets")
+
+    @staticmethod
+    def leg_distance(journey, from_stop, to_stop, distances):
+        """Distance of a partial leg, or None when the ticket covers the route."""
+        if journey.route_id not in distances:
+            distances[journey.route_id] = journey.route.stop_distances()
+        stops = distances[journey.route_id]
+        if from_stop == 0 and to_stop == len(stops) - 1:
+            return None
+        return stops[to_stop] - stops[from_stop]
 
     def create(self, validated_data):
         with transaction.atomic():
             tickets_data = validated_data.pop("tickets")
+            journey_ids = {ticket_data["journey"].id for ticket_data in tickets_data}
+            # Validation read cancelled_at without a lock; re-check it under
+            # the row lock that cancel_journey's UPDATE has to wait for.
+            cancelled = (
+                Journey.objects.select_for_update(no_key=True)
+                .filter(pk__in=journey_ids)
+                .order_by("pk")
+                .values_list("cancelled_at", flat=True)
+            )
+            if any(cancelled):
+                raise serializers.ValidationError(
+                    {"tickets": [{"journey": "journey is cancelled"}]}
+                )
+            quotes = get_quotes(list(journey_ids))
             order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
+            taken_seats = defaultdict(list)
+            distances = {}
+            with batched_ticket_changes():
+                for ticket_data in tickets_data:
+                    journey = ticket_data["journey"]
+                    distance = self.leg_distance(
+                        journey,
+                        ticket_data.get("from_stop", 0),
+                        ticket_data["to_stop"],
+                        distances,
+                    )
+                    try:
+                        ticket = Ticket.objects.create(
+                            order=order,
+                            price=ticket_price(
+                                quotes[journey.id], ticket_data["cargo"], distance
+                            ),
+                            **ticket_data,
+                        )
+                    except DjangoValidationError as error:
+                        raise serializers.ValidationError(
+                            {"tickets": [error.message_dict]}
+                        )
+                    taken_seats[journey.id].append(
+                        (ticket.cargo, ticket.seat, ticket.from_stop, ticket.to_stop)
+                    )
+            for journey_id, seats in taken_seats.items():
+                transaction.on_commit(
+                    partial(publish_seat_change, journey_id, "taken", seats)
+                )
             return order
 
 
 class OrderListSerializer(OrderSerializer):
-    tickets = TicketSerializer(many=True, read_only=True)
+    tickets = OrderTicketSerializer(many=True, read_only=True)
+
+
+class TicketScanSerializer(serializers.Serializer):
+    token = serializers.CharField(max_length=128)
+    scanned_at = serializers.DateTimeField()
+
+
+class TicketCheckInSerializer(serializers.Serializer):
+    scans = TicketScanSerializer(many=True, allow_empty=False)
+
+    def validate_scans(self, scans):
+        if len(scans) > settings.TICKET_CHECK_IN_MAX_SCANS:
+            raise serializers.ValidationError(
+                f"At most {settings.TICKET_CHECK_IN_MAX_SCANS} scans per request"
+            )
+        return scans
+
+
+class TicketSummarySerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    cargo = serializers.IntegerField()
+    seat = serializers.IntegerField()
+    journey = serializers.IntegerField(source="journey_id")
+    train = serializers.CharField()
+    source = serializers.CharField()
+    destination = serializers.CharField()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    archived = serializers.BooleanField()
+    cancelled = serializers.BooleanField()
+
+
+class OrderHistorySerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    created_at = serializers.DateTimeField()
+    tickets = TicketSummarySerializer(many=True)
+
+
+class TombstoneSerializer(serializers.ModelSerializer):
+    type = serializers.CharField(source="model")
+    id = serializers.IntegerField(source="object_id")
+
+    class Meta:
+        model = Tombstone
+        fields = ("type", "id", "deleted_at")
+
+
+class SyncSerializer(serializers.Serializer):
+    stations = StationSerializer(many=True)
+    routes = RouteSerializer(many=True)
+    trains = TrainSerializer(many=True)
+    journeys = JourneySerializer(many=True)
+    deleted = TombstoneSerializer(many=True)
+    cursor = serializers.CharField(allow_null=True)
+    has_more = serializers.BooleanField()
+
+
+class StationAvailabilitySerializer(serializers.Serializer):
+    destination = serializers.IntegerField()
+    date = serializers.DateField()
+    earliest_departure = serializers.DateTimeField()
+    journeys = serializers.IntegerField()
+    min_free_seats = serializers.IntegerField()
+
+
+class SeatAvailabilitySerializer(serializers.Serializer):
+    journey = serializers.IntegerField()
+    from_stop = serializers.IntegerField()
+    to_stop = serializers.IntegerField()
+    capacity = serializers.IntegerField()
+    available = serializers.IntegerField()
+    taken = serializers.ListField(child=serializers.DictField())
@@ -0,0 +1,146 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from station import ticket_changes
+from station.availability import current_origins, mark_origins_changed
+from station.events import publish_seat_change
+from station.invalidation import invalidate
+from station.models import (
+    Fare,
+    Journey,
+    Route,
+    RouteStop,
+    SeatOccupancy,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+from station.sync import record_tombstone
+
+
+@receiver(post_save, sender=Journey)
+@receiver(post_delete, sender=Journey)
+def journey_changed(sender, instance, **kwargs):
+    station_id = (
+        Route.objects.filter(pk=instance.route_id)
+        .values_list("source_id", flat=True)
+        .first()
+    )
+    if station_id is not None:
+        invalidate("departures", station_id)
+    invalidate("journey-list")
+    invalidate("fare-quotes", instance.pk)
+
+
+@receiver(post_save, sender=Route)
+def route_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate("departures", instance.source_id)
+        invalidate("journey-list")
+        # Quotes are priced by route distance.
+        invalidate("fare-quotes")
+
+
+@receiver(post_save, sender=Fare)
+@receiver(post_delete, sender=Fare)
+def fare_changed(sender, instance, **kwargs):
+    invalidate("fare-quotes")
+
+
+@receiver(post_save, sender=RouteStop)
+@receiver(post_delete, sender=RouteStop)
+def route_stop_changed(sender, instance, **kwargs):
+    # Exports and sync clients see stop changes through the route.
+    Route.objects.filter(pk=instance.route_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def ticket_changed(sender, instance, **kwargs):
+    ticket_changes.ticket_changed(instance.journey_id)
+
+
+@receiver(post_save, sender=Station)
+@receiver(post_delete, sender=Station)
+def station_changed(sender, instance, **kwargs):
+    invalidate("stations")
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_freed(sender, instance, **kwargs):
+    SeatOccupancy.release(
+        instance.journey_id,
+        instance.cargo,
+        instance.seat,
+        instance.from_stop,
+        instance.to_stop,
+    )
+    transaction.on_commit(
+        partial(
+            publish_seat_change,
+            instance.journey_id,
+            "freed",
+            [(instance.cargo, instance.seat, instance.from_stop, instance.to_stop)],
+        )
+    )
+
+
+@receiver(post_delete, sender=Station)
+@receiver(post_delete, sender=Route)
+@receiver(post_delete, sender=Train)
+@receiver(post_delete, sender=Journey)
+def synced_row_deleted(sender, instance, **kwargs):
+    record_tombstone(instance)
+
+
+@receiver(m2m_changed, sender=Journey.crews.through)
+def journey_crews_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse and action in ("post_add", "post_remove", "post_clear"):
+        journeys = Journey.objects.filter(pk=instance.pk)
+    elif reverse and action in ("post_add", "post_remove"):
+        journeys = Journey.objects.filter(pk__in=pk_set)
+    elif reverse and action == "pre_clear":
+        journeys = Journey.objects.filter(crews=instance)
+    else:
+        return
+    journeys.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=TrainType)
+def train_type_changed(sender, instance, created, **kwargs):
+    # Trains are synced with their type name.
+    if not created:
+        Train.objects.filter(train_type=instance).update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=Journey)
+@receiver(pre_delete, sender=Journey)
+@receiver(pre_save, sender=Route)
+@receiver(pre_save, sender=RouteStop)
+@receiver(pre_delete, sender=RouteStop)
+def remember_availability_origins(sender, instance, **kwargs):
+    # A moved or deleted stop no longer joins to its old station afterwards.
+    instance._previous_origins = current_origins(sender, instance.pk)
+
+
+@receiver(post_save, sender=Journey)
+@receiver(post_delete, sender=Journey)
+@receiver(post_save, sender=Route)
+@receiver(post_save, sender=RouteStop)
+@receiver(post_delete, sender=RouteStop)
+def route_availability_changed(sender, instance, **kwargs):
+    mark_origins_changed(
+        getattr(instance, "_previous_origins", set())
+        | current_origins(sender, instance.pk)
+    )
@@ -0,0 +1,140 @@
+"""Slow query log with sampled EXPLAIN ANALYZE plans.
+
+During a request every database connection runs behind a SlowQueryRecorder.
+Queries slower than SLOW_QUERY_THRESHOLD_MS are saved as SlowQuery rows once
+the response is ready, keyed by a fingerprint of the SQL with its literals
+stripped. A SLOW_QUERY_EXPLAIN_SAMPLE_RATE share of slow plain SELECTs is
+re-run under EXPLAIN (ANALYZE, BUFFERS) in a read-only transaction that is
+rolled back, on a separate connection in a background thread; parameters are
+only kept in memory for that.
+"""
+
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, connections
+
+from station.models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+NORMALIZE = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"%s|\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),
+    (re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+"), "(?)"),
+    (re.compile(r"\s+"), " "),
+]
+
+LOCKING_CLAUSE = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+|KEY\s+)?(?:UPDATE|SHARE)\b")
+FROM_CLAUSE = re.compile(r"\bFROM\b")
+
+
+def normalize_sql(sql):
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:16]
+
+
+def explainable(sql, many):
+    """Plain reads only: EXPLAIN ANALYZE runs the statement, so row locks and
+    FROM-less function calls such as pg_notify() or nextval() are skipped."""
+    statement = sql.lstrip().upper()
+    return (
+        not many
+        and statement.startswith("SELECT")
+        and FROM_CLAUSE.search(statement) is not None
+        and LOCKING_CLAUSE.search(statement) is None
+    )
+
+
+class SlowQueryRecorder:
+    """Execute wrapper collecting queries slower than the threshold."""
+
+    def __init__(self):
+        self.threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= self.threshold:
+                self.slow.append(
+                    (sql, params, many, context["connection"].alias, duration)
+                )
+
+    def save(self, view_name):
+        """Store the collected queries and start EXPLAINs for a sample."""
+        for sql, params, many, alias, duration in self.slow:
+            normalized = normalize_sql(sql)
+            slow_query = SlowQuery.objects.create(
+                fingerprint=fingerprint(normalized),
+                sql=normalized,
+                view_name=view_name,
+                database=alias,
+                duration_ms=duration * 1000,
+            )
+            if (
+                explainable(sql, many)
+                and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+            ):
+                start_explain(partial(explain, slow_query.pk, alias, sql, params))
+
+
+def record(get_response, request):
+    """Run ``get_response`` with a recorder on every database connection."""
+    recorder = SlowQueryRecorder()
+    with ExitStack() as stack:
+        for database in connections.all():
+            stack.enter_context(database.execute_wrapper(recorder))
+        response = get_response(request)
+    if recorder.slow:
+        match = request.resolver_match
+        try:
+            recorder.save(match.view_name if match else request.path)
+        except Exception:
+            logger.exception("Could not store slow queries")
+    return response
+
+
+def start_explain(function):
+    threading.Thread(target=function, daemon=True).start()
+
+
+def explain(slow_query_id, alias, sql, params):
+    """Store the EXPLAIN ANALYZE plan of a slow SELECT; Postgres only."""
+    try:
+        if connections[alias].vendor != "postgresql":
+            return
+        import psycopg
+
+        connection_params = connections[alias].get_connection_params()
+        with psycopg.connect(**connection_params) as side:
+            # A read-only transaction that is always rolled back, in case a
+            # function in the query writes.
+            cursor = psycopg.ClientCursor(side)
+            try:
+                cursor.execute("SET TRANSACTION READ ONLY")
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+            finally:
+                side.rollback()
+        SlowQuery.objects.filter(pk=slow_query_id).update(plan=plan)
+    except Exception:
+        logger.exception("EXPLAIN of slow query %s failed", slow_query_id)
+    finally:
+        connection.close()
@@ -0,0 +1,208 @@
+"""Concurrent booking load for manage.py stress_booking.
+
+Each simulated client is a thread with its own APIClient, user and database
+connection, so OrderSerializer.create runs with real concurrency against the
+configured database. Clients book either a random seat or one of a few hot
+seats, and every response is classified: 201 is a sale, 400 a clean
+conflict, 429 throttling and 503 load shedding, anything else (or an
+exception) is an error. Levels run with the load shedder off unless asked
+for, and latency percentiles only cover requests that were not shed, whose
+instant 503s would otherwise flatter them.
+"""
+
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from station.models import Order, Ticket, segment_mask
+
+STRESS_USER_EMAIL = "stress-{index}@stress.invalid"
+
+
+@dataclass
+class LevelResult:
+    concurrency: int
+    elapsed: float = 0.0
+    # One latency per entry of statuses.
+    latencies: list = field(default_factory=list)
+    statuses: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+    double_sold: list = field(default_factory=list)
+
+    @property
+    def sold(self):
+        return self.statuses.count(201)
+
+    @property
+    def conflicts(self):
+        return self.statuses.count(400)
+
+    @property
+    def throttled(self):
+        return self.statuses.count(429)
+
+    @property
+    def shed(self):
+        return self.statuses.count(503)
+
+    @property
+    def failures(self):
+        return (
+            len(self.statuses)
+            - self.sold
+            - self.conflicts
+            - self.throttled
+            - self.shed
+        )
+
+    @property
+    def served_latencies(self):
+        return [
+            latency
+            for status, latency in zip(self.statuses, self.latencies)
+            if status != 503
+        ]
+
+    @property
+    def ok(self):
+        return not self.failures and not self.errors and not self.double_sold
+
+    def summary(self):
+        served = len(self.statuses) - self.shed
+        latencies = self.served_latencies
+        return (
+            f"clients={self.concurrency:<4} requests={len(self.statuses):<6} "
+            f"orders/s={self.sold / (self.elapsed or 1e-9):8.1f} "
+            f"conflicts={self.conflicts / (served or 1):6.1%} "
+            f"shed={self.shed:<4} throttled={self.throttled:<4} "
+            f"failures={self.failures + len(self.errors):<4} "
+            f"p50={percentile(latencies, 0.5) * 1000:7.1f}ms "
+            f"p99={percentile(latencies, 0.99) * 1000:7.1f}ms "
+            f"double_sold={len(self.double_sold)}"
+        )
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile; 0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def stress_users(count):
+    users = []
+    for index in range(count):
+        user, created = get_user_model().objects.get_or_create(
+            email=STRESS_USER_EMAIL.format(index=index)
+        )
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=["password"])
+        users.append(user)
+    return users
+
+
+def double_sold(journey):
+    """(cargo, seat) pairs sold more than once for an overlapping leg."""
+    last_stop = journey.route.last_stop
+    sold = {}
+    clashes = []
+    tickets = Ticket.objects.filter(journey=journey).values_list(
+        "cargo", "seat", "from_stop", "to_stop"
+    )
+    for cargo, seat, from_stop, to_stop in tickets.iterator():
+        mask = segment_mask(from_stop, last_stop if to_stop is None else to_stop)
+        taken = sold.get((cargo, seat), 0)
+        if taken & mask:
+            clashes.append((cargo, seat))
+        sold[(cargo, seat)] = taken | mask
+    return clashes
+
+
+def run_level(
+    journey,
+    users,
+    requests_per_client,
+    hot_seats,
+    hot_share,
+    seed=0,
+    load_shedding=False,
+):
+    """Book ``journey`` from one thread per user at once.
+
+    Client ``i`` draws its seats from ``Random(seed + i)``, so a run can be
+    repeated exactly. The load shedder only runs with ``load_shedding``.
+    """
+    result = LevelResult(concurrency=len(users))
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(users) + 1)
+    train = journey.train
+    url = reverse("station:order-list")
+    orders_before = Order.objects.filter(user__in=users).count()
+
+    def client(user, seed):
+        picker = random.Random(seed)
+        api = APIClient(HTTP_HOST="localhost")
+        api.raise_request_exception = False
+        api.force_authenticate(user)
+        barrier.wait()
+        try:
+            for _ in range(requests_per_client):
+                if picker.random() < hot_share:
+                    cargo, seat = 1, picker.randint(1, hot_seats)
+                else:
+                    cargo = picker.randint(1, train.cargo_num)
+                    seat = picker.randint(1, train.places_in_cargo)
+                started = time.perf_counter()
+                try:
+                    response = api.post(
+                        url,
+                        {
+                            "tickets": [
+                                {
+                                    "cargo": cargo,
+                                    "seat": seat,
+                                    "journey": journey.id,
+                                }
+                            ]
+                        },
+                        format="json",
+                    )
+                except Exception as error:
+                    with lock:
+                        result.errors.append(repr(error))
+                    continue
+                latency = time.perf_counter() - started
+                with lock:
+                    result.latencies.append(latency)
+                    result.statuses.append(response.status_code)
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=client, args=(user, seed + index))
+        for index, user in enumerate(users)
+    ]
+    with override_settings(LOAD_SHEDDING_ENABLED=load_shedding):
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        result.elapsed = time.perf_counter() - started
+
+    result.double_sold = double_sold(journey)
+    created = Order.objects.filter(user__in=users).count() - orders_before
+    if created != result.sold:
+        result.errors.append(f"{created} orders stored for {result.sold} sales")
+    return result
@@ -0,0 +1,154 @@
+"""Delta sync of stations, routes, trains and journeys.
+
+Every synced row carries updated_at and deletes leave a Tombstone. Changes
+are read in (changed_at, kind, id) order, so a cursor is the position of the
+last change a client has applied and each page is one index range scan per
+table. A cursor also carries synced_at, the time up to which the client has
+seen every change; it expires once tombstones newer than that may have been
+purged, however old the position itself is.
+"""
+
+from base64 import b64decode, b64encode
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from station.models import Station, Route, Train, Journey, Tombstone
+from station.serializers import (
+    StationSerializer,
+    RouteSerializer,
+    TrainSerializer,
+    JourneySerializer,
+    TombstoneSerializer,
+)
+
+SYNC_SOURCES = (
+    ("stations", Station.objects.all(), "updated_at", StationSerializer),
+    ("routes", Route.objects.all(), "updated_at", RouteSerializer),
+    (
+        "trains",
+        Train.objects.select_related("train_type"),
+        "updated_at",
+        TrainSerializer,
+    ),
+    (
+        "journeys",
+        Journey.objects.prefetch_related("crews"),
+        "updated_at",
+        JourneySerializer,
+    ),
+    ("deleted", Tombstone.objects.all(), "deleted_at", TombstoneSerializer),
+)
+SYNCED_MODELS = (Station, Route, Train, Journey)
+
+
+class SyncCursor(NamedTuple):
+    changed_at: object
+    kind: int
+    pk: int
+    synced_at: object = None
+
+
+class CursorExpired(Exception):
+    pass
+
+
+def encode_cursor(cursor):
+    if cursor is None:
+        return None
+    changed_at, kind, pk, synced_at = cursor
+    synced_at = synced_at or changed_at
+    return b64encode(
+        f"{changed_at.isoformat()}|{kind}|{pk}|{synced_at.isoformat()}".encode()
+    ).decode()
+
+
+def decode_cursor(encoded):
+    """Parse a cursor, raising ValueError if it is malformed.
+
+    Cursors issued before synced_at existed count as synced at their position.
+    """
+    try:
+        changed_at, kind, pk, *synced_at = (
+            b64decode(encoded.encode()).decode().split("|")
+        )
+        changed_at = parse_datetime(changed_at)
+        synced_at = parse_datetime(synced_at[0]) if synced_at else changed_at
+        cursor = SyncCursor(changed_at, int(kind), int(pk), synced_at)
+    except (TypeError, ValueError, IndexError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if (
+        cursor.changed_at is None
+        or cursor.synced_at is None
+        or not 0 <= cursor.kind < len(SYNC_SOURCES)
+    ):
+        raise ValueError("Invalid cursor")
+    return cursor
+
+
+def _after(cursor, kind, field):
+    """Rows of one source that sort after the cursor position."""
+    if cursor is None:
+        return Q()
+    newer = Q(**{f"{field}__gt": cursor.changed_at})
+    if kind < cursor.kind:
+        return newer
+    same_time = Q(**{field: cursor.changed_at})
+    if kind == cursor.kind:
+        same_time &= Q(pk__gt=cursor.pk)
+    return newer | same_time
+
+
+def changes_since(cursor, limit, context=None):
+    """Return up to ``limit`` changes after ``cursor`` and the next cursor.
+
+    Rows stamped within SYNC_SETTLE_SECONDS are held back until a later call,
+    so a transaction still committing with an earlier timestamp cannot slip
+    behind a cursor that has already moved past it.
+    """
+    now = timezone.now()
+    purged_before = now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    if cursor is not None and cursor.synced_at < purged_before:
+        raise CursorExpired()
+    settled = now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+
+    rows = []
+    for kind, (_, queryset, field, _) in enumerate(SYNC_SOURCES):
+        queryset = queryset.filter(
+            _after(cursor, kind, field), **{f"{field}__lte": settled}
+        ).order_by(field, "pk")
+        rows.extend(
+            (SyncCursor(getattr(obj, field), kind, obj.pk), obj)
+            for obj in queryset[: limit + 1]
+        )
+    rows.sort(key=lambda row: row[0])
+    page = rows[:limit]
+
+    changes = {name: [] for name, *_ in SYNC_SOURCES}
+    for position, obj in page:
+        changes[SYNC_SOURCES[position.kind][0]].append(obj)
+    for name, _, _, serializer_class in SYNC_SOURCES:
+        changes[name] = serializer_class(
+            changes[name], many=True, context=context
+        ).data
+
+    has_more = len(rows) > limit
+    position = page[-1][0] if page else cursor
+    if position is not None:
+        # A caught-up client has seen everything up to ``settled``.
+        position = position._replace(
+            synced_at=position.changed_at if has_more else settled
+        )
+    changes["cursor"] = encode_cursor(position)
+    changes["has_more"] = has_more
+    return changes
+
+
+def record_tombstone(instance):
+    Tombstone.objects.create(
+        model=instance._meta.model_name, object_id=instance.pk
+    )
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from station.models import Station, Route, TrainType, Train, Journey, Order, Ticket
+
+Ticket_CHANGELIST_URL = reverse("admin:station_ticket_changelist")
+Order_CHANGELIST_URL = reverse("admin:station_order_changelist")
+
+
+class StationAdminChangelistTests(TestCase):
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            email="admin@example.com", password="adminpassword"
+        )
+        self.client.force_login(self.admin_user)
+
+        station_1 = Station.objects.create(name="Kyiv", latitude=50.45, longitude=30.52)
+        station_2 = Station.objects.create(name="Lviv", latitude=49.84, longitude=24.03)
+        route = Route.objects.create(
+            source=station_1, destination=station_2, distance=540
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        self.train = Train.objects.create(
+            name="Train 1", cargo_num=5, places_in_cargo=50, train_type=train_type
+        )
+        self.route = route
+        self.order = Order.objects.create(user=self.admin_user)
+
+    def _add_journey_with_tickets(self, days, tickets):
+        departure_time = timezone.now() + timedelta(days=days)
+        journey = Journey.objects.create(
+            route=self.route,
+            train=self.train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+        for seat in range(1, tickets + 1):
+            Ticket.objects.create(cargo=1, seat=seat, journey=journey, order=self.order)
+        return journey
+
+    def _count_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(queries.captured_queries)
+
+    def test_ticket_changelist_queries_do_not_grow_with_rows(self):
+        self._add_journey_with_tickets(1, 2)
+        few = self._count_queries(Ticket_CHANGELIST_URL)
+
+        for days in range(2, 6):
+            self._add_journey_with_tickets(days, 3)
+        many = self._count_queries(Ticket_CHANGELIST_URL)
+
+        self.assertEqual(few, many)
+
+    def test_ticket_changelist_journey_id_filter(self):
+        journey = self._add_journey_with_tickets(1, 2)
+        self._add_journey_with_tickets(2, 3)
+
+        response = self.client.get(Ticket_CHANGELIST_URL, {"journey": journey.id})
+
+        self.assertEqual(response.context["cl"].result_count, 2)
+
+    def test_order_changelist_search_by_email(self):
+        response = self.client.get(Order_CHANGELIST_URL, {"q": "admin@"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cl"].result_count, 1)
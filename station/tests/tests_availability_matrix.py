@@ -0,0 +1,140 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station.availability import origin_matrix, precompute, stale_origins
+from station.models import (
+    Station,
+    Route,
+    RouteStop,
+    TrainType,
+    Train,
+    Journey,
+    Order,
+    Ticket,
+    StationAvailability,
+)
+
+
+def availability_url(station_id):
+    return reverse("station:station-availability", args=[station_id])
+
+
+class AvailabilityMatrixTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@test.com", password="testpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.kyiv, self.zhytomyr, self.lviv = [
+            Station.objects.create(name=name, latitude=50, longitude=30)
+            for name in ("Kyiv", "Zhytomyr", "Lviv")
+        ]
+        route = Route.objects.create(
+            source=self.kyiv, destination=self.lviv, distance=540
+        )
+        RouteStop.objects.create(
+            route=route, station=self.zhytomyr, position=1, distance=135
+        )
+        train = Train.objects.create(
+            name="Train 1",
+            cargo_num=1,
+            places_in_cargo=10,
+            train_type=TrainType.objects.create(name="Intercity"),
+        )
+        self.departure_time = (timezone.now() + timedelta(days=2)).replace(
+            hour=8, minute=0, second=0, microsecond=0
+        )
+        self.journeys = [
+            Journey.objects.create(
+                route=route,
+                train=train,
+                departure_time=self.departure_time + timedelta(hours=hours),
+                arrival_time=self.departure_time + timedelta(hours=hours + 4),
+            )
+            for hours in (0, 3)
+        ]
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(
+            cargo=1,
+            seat=1,
+            journey=self.journeys[1],
+            order=order,
+            from_stop=1,
+            to_stop=2,
+        )
+
+    def test_origin_matrix(self):
+        matrix = origin_matrix(self.kyiv.id, timezone.now(), horizon_days=10)
+
+        day = timezone.localtime(self.departure_time).date().isoformat()
+        self.assertEqual(
+            matrix[str(self.lviv.id)][day],
+            [self.departure_time.isoformat(), 2, 9],
+        )
+        self.assertEqual(matrix[str(self.zhytomyr.id)][day][1:], [2, 10])
+
+        matrix = origin_matrix(self.zhytomyr.id, timezone.now(), horizon_days=10)
+        self.assertEqual(list(matrix), [str(self.lviv.id)])
+        self.assertEqual(matrix[str(self.lviv.id)][day][1:], [2, 9])
+
+    def test_bookings_mark_origins_stale(self):
+        precompute(Station.objects.values_list("id", flat=True))
+        self.assertEqual(list(stale_origins()), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(
+                cargo=1,
+                seat=2,
+                journey=self.journeys[0],
+                order=Order.objects.create(user=self.user),
+                from_stop=1,
+                to_stop=2,
+            )
+            self.assertEqual(list(stale_origins()), [])
+
+        self.assertEqual(
+            sorted(stale_origins()), sorted([self.kyiv.id, self.zhytomyr.id])
+        )
+        out = StringIO()
+        call_command("precompute_availability", "--workers", "0", stdout=out)
+        self.assertIn("for 2 origins", out.getvalue())
+        self.assertEqual(list(stale_origins()), [])
+
+    def test_route_edits_mark_former_origins_stale(self):
+        odesa = Station.objects.create(name="Odesa", latitude=46, longitude=30)
+        Ticket.objects.all().delete()
+        precompute(Station.objects.values_list("id", flat=True))
+
+        RouteStop.objects.get(station=self.zhytomyr).delete()
+        self.assertEqual(list(stale_origins()), [self.zhytomyr.id])
+
+        precompute(stale_origins())
+        route = self.journeys[0].route
+        route.source = odesa
+        route.save()
+        self.assertEqual(sorted(stale_origins()), sorted([self.kyiv.id, odesa.id]))
+
+    def test_lookup_endpoint(self):
+        response = self.client.get(availability_url(self.kyiv.id))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        precompute([self.kyiv.id])
+        day = timezone.localtime(self.departure_time).date().isoformat()
+        response = self.client.get(
+            availability_url(self.kyiv.id),
+            {"destination": self.lviv.id, "date": day},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["journeys"], 2)
+        self.assertEqual(response.data[0]["min_free_seats"], 9)
+        self.assertEqual(StationAvailability.objects.count(), 1)
@@ -0,0 +1,191 @@
+import hashlib
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station.models import Station, Route, TrainType, Train, Journey, Order
+from train_station_api_service import batch, middleware
+from train_station_api_service.db_router import use_replica
+
+BATCH_URL = reverse("batch")
+
+
+@override_settings(TICKET_TOKEN_KEY="test-ticket-token-key")
+class BatchApiTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        station_1 = Station.objects.create(name="Kyiv", latitude=50.45, longitude=30.52)
+        station_2 = Station.objects.create(name="Lviv", latitude=49.84, longitude=24.03)
+        self.route = Route.objects.create(
+            source=station_1, destination=station_2, distance=540
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        train = Train.objects.create(
+            name="Train 1", cargo_num=5, places_in_cargo=50, train_type=train_type
+        )
+        departure_time = timezone.now() + timedelta(days=1)
+        self.journey = Journey.objects.create(
+            route=self.route,
+            train=train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+
+    def test_runs_requests_in_order(self):
+        payload = {
+            "requests": [
+                {"path": f"/api/station/journeys/{self.journey.id}/"},
+                {"path": f"/api/station/routes/{self.route.id}/"},
+                {
+                    "method": "POST",
+                    "path": "/api/station/orders/",
+                    "body": {
+                        "tickets": [
+                            {"cargo": 1, "seat": 1, "journey": self.journey.id}
+                        ]
+                    },
+                },
+                {"path": "/api/user/me/"},
+                {"path": "/api/station/journeys/999999/"},
+            ]
+        }
+
+        response = self.client.post(BATCH_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result["status"] for result in response.data],
+            [200, 200, 201, 200, 404],
+        )
+        self.assertEqual(response.data[0]["body"]["id"], self.journey.id)
+        self.assertEqual(response.data[3]["body"]["email"], "user@example.com")
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+
+    def test_subrequests_keep_permissions(self):
+        payload = {
+            "requests": [
+                {
+                    "method": "POST",
+                    "path": "/api/station/stations/",
+                    "body": {"name": "Odesa", "latitude": 46.48, "longitude": 30.72},
+                }
+            ]
+        }
+
+        response = self.client.post(BATCH_URL, payload, format="json")
+
+        self.assertEqual(response.data[0]["status"], status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Station.objects.filter(name="Odesa").exists())
+
+    def test_rejects_other_paths(self):
+        response = self.client.post(
+            BATCH_URL,
+            {"requests": [{"path": "/admin/"}, {"path": "/api/batch/"}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.post(
+            BATCH_URL, {"requests": [{"path": "/api/user/me/"}]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_streaming_response_is_an_item_error(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        response = self.client.post(
+            BATCH_URL,
+            {"requests": [{"path": "/api/station/gtfs/"}, {"path": "/api/user/me/"}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result["status"] for result in response.data],
+            [status.HTTP_406_NOT_ACCEPTABLE, status.HTTP_200_OK],
+        )
+
+    @override_settings(SLOW_QUERY_LOG_ENABLED=True)
+    def test_subrequests_skip_middleware(self):
+        paths = []
+        record = middleware.record
+        middleware.record = lambda get_response, request: (
+            paths.append(request.path) or record(get_response, request)
+        )
+        self.addCleanup(setattr, middleware, "record", record)
+
+        self.client.post(
+            BATCH_URL,
+            {"requests": [{"path": "/api/user/me/"}, {"path": "/api/user/me/"}]},
+            format="json",
+        )
+
+        self.assertEqual(paths, [BATCH_URL])
+
+    @override_settings(
+        LOAD_SHEDDING_ENABLED=True,
+        LOAD_SHEDDING_GROUPS={"orders": {"views": ["batch"], "limit": 0}},
+    )
+    def test_only_writing_batches_take_an_orders_slot(self):
+        reads = self.client.post(
+            BATCH_URL, {"requests": [{"path": "/api/user/me/"}]}, format="json"
+        )
+        writes = self.client.post(
+            BATCH_URL,
+            {
+                "requests": [
+                    {"path": "/api/user/me/"},
+                    {"method": "DELETE", "path": "/api/station/orders/1/"},
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(reads.status_code, status.HTTP_200_OK)
+        self.assertEqual(writes.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    @override_settings(DATABASE_REPLICA_ENABLED=True)
+    def test_replica_routing_follows_each_call(self):
+        cache.clear()
+        routed = []
+        run_subrequest = batch.run_subrequest
+        batch.run_subrequest = lambda request, item: (
+            routed.append(use_replica.get()) or run_subrequest(request, item)
+        )
+        self.addCleanup(setattr, batch, "run_subrequest", run_subrequest)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer batch-client")
+        pin_key = "db-pin:" + hashlib.sha256(b"Bearer batch-client").hexdigest()
+        order = {
+            "method": "POST",
+            "path": "/api/station/orders/",
+            "body": {"tickets": [{"cargo": 1, "seat": 1, "journey": self.journey.id}]},
+        }
+
+        self.client.post(
+            BATCH_URL, {"requests": [{"path": "/api/user/me/"}]}, format="json"
+        )
+        self.assertIsNone(cache.get(pin_key))
+
+        self.client.post(
+            BATCH_URL,
+            {"requests": [{"path": "/api/user/me/"}, order, {"path": "/api/user/me/"}]},
+            format="json",
+        )
+
+        self.assertEqual(routed, [True, True, False, False])
+        self.assertTrue(cache.get(pin_key))
@@ -0,0 +1,154 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station.coalescing import SingleFlight
+from station.models import Station, Route, TrainType, Train, Journey, Order, Ticket
+
+
+class SingleFlightTests(SimpleTestCase):
+    # Callers cannot observe each other waiting, so the computation is held
+    # open long enough for every thread to join it.
+    JOIN_SECONDS = 0.2
+
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return "result"
+
+        results = []
+        arrived = threading.Barrier(6)
+
+        def caller():
+            arrived.wait(5)
+            results.append(flight.do("key", compute))
+
+        threads = [threading.Thread(target=caller) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        arrived.wait(5)
+        time.sleep(self.JOIN_SECONDS)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["result"] * 5)
+
+    def test_finished_calls_are_not_reused(self):
+        flight = SingleFlight()
+        counter = iter(range(10))
+
+        self.assertEqual(flight.do("key", lambda: next(counter)), 0)
+        self.assertEqual(flight.do("key", lambda: next(counter)), 1)
+
+    def test_followers_retry_after_leader_failure(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def failing():
+            calls.append("leader")
+            started.set()
+            release.wait(5)
+            raise RuntimeError("boom")
+
+        def own():
+            calls.append("follower")
+            return "own"
+
+        errors = []
+
+        def leader():
+            try:
+                flight.do("key", failing)
+            except RuntimeError as error:
+                errors.append(error)
+
+        thread = threading.Thread(target=leader)
+        thread.start()
+        started.wait(5)
+        follower_result = []
+        follower = threading.Thread(
+            target=lambda: follower_result.append(flight.do("key", own))
+        )
+        follower.start()
+        time.sleep(self.JOIN_SECONDS)
+        self.assertEqual(calls, ["leader"])
+        release.set()
+        thread.join()
+        follower.join()
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(follower_result, ["own"])
+        self.assertEqual(calls, ["leader", "follower"])
+
+    def test_follower_stops_waiting_after_timeout(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return "leader"
+
+        thread = threading.Thread(target=lambda: flight.do("key", slow))
+        thread.start()
+        started.wait(5)
+        try:
+            result = flight.do("key", lambda: "own", timeout=0.05)
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(result, "own")
+
+
+class CoalescedJourneyAvailabilityTests(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+        self.client.force_authenticate(user)
+
+        station_1 = Station.objects.create(name="Kyiv", latitude=50.45, longitude=30.52)
+        station_2 = Station.objects.create(name="Lviv", latitude=49.84, longitude=24.03)
+        route = Route.objects.create(
+            source=station_1, destination=station_2, distance=540
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        train = Train.objects.create(
+            name="Train 1", cargo_num=5, places_in_cargo=50, train_type=train_type
+        )
+        departure_time = timezone.now() + timedelta(days=1)
+        self.journey = Journey.objects.create(
+            route=route,
+            train=train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+        self.order = Order.objects.create(user=user)
+
+    def test_sequential_requests_see_fresh_data(self):
+        url = reverse("station:journey-availability", args=[self.journey.id])
+        first = self.client.get(url)
+        Ticket.objects.create(cargo=1, seat=1, journey=self.journey, order=self.order)
+        second = self.client.get(url)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data["available"], 250)
+        self.assertEqual(second.data["available"], 249)
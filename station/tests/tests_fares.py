@@ -0,0 +1,131 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station.models import (
+    Station,
+    Route,
+    TrainType,
+    Fare,
+    Train,
+    Journey,
+    Order,
+    Ticket,
+)
+
+Journey_QUOTES_URL = reverse("station:journey-quotes")
+Order_URL = reverse("station:order-list")
+
+
+@override_settings(TICKET_TOKEN_KEY="test-ticket-token-key")
+class FareQuoteApiTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        station_1 = Station.objects.create(name="Kyiv", latitude=50.45, longitude=30.52)
+        station_2 = Station.objects.create(name="Lviv", latitude=49.84, longitude=24.03)
+        route = Route.objects.create(
+            source=station_1, destination=station_2, distance=100
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        Fare.objects.create(
+            train_type=train_type,
+            base_price=Decimal("10.00"),
+            price_per_km=Decimal("0.50"),
+            first_class_cargos=1,
+            first_class_multiplier=Decimal("2.00"),
+        )
+        train = Train.objects.create(
+            name="Train 1", cargo_num=2, places_in_cargo=2, train_type=train_type
+        )
+
+        departure_time = timezone.now() + timedelta(days=1)
+        self.journeys = [
+            Journey.objects.create(
+                route=route,
+                train=train,
+                departure_time=departure_time + timedelta(days=day),
+                arrival_time=departure_time + timedelta(days=day, hours=5),
+            )
+            for day in range(3)
+        ]
+
+    def _quote(self, journeys):
+        return self.client.get(
+            Journey_QUOTES_URL,
+            {"journeys": ",".join(str(journey.id) for journey in journeys)},
+        )
+
+    def test_batch_quotes_use_fixed_number_of_queries(self):
+        with self.assertNumQueries(2):
+            response = self._quote(self.journeys)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(response.data[0]["standard"], "60.00")
+        self.assertEqual(response.data[0]["first"], "120.00")
+
+    def test_quotes_are_cached(self):
+        self._quote(self.journeys)
+
+        with self.assertNumQueries(0):
+            self._quote(self.journeys)
+
+    def test_ticket_sale_drops_cached_quote(self):
+        self._quote(self.journeys)
+        order = Order.objects.create(user=self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for seat in (1, 2):
+                Ticket.objects.create(
+                    cargo=2, seat=seat, journey=self.journeys[0], order=order
+                )
+
+        with self.assertNumQueries(2):
+            response = self._quote(self.journeys)
+        self.assertEqual(response.data[0]["standard"], "66.00")
+
+    def test_fare_change_drops_every_quote(self):
+        self._quote(self.journeys)
+
+        fare = Fare.objects.get()
+        fare.base_price = Decimal("20.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            fare.save()
+
+        self.assertEqual(self._quote(self.journeys).data[2]["standard"], "70.00")
+
+    def test_occupancy_multiplier(self):
+        order = Order.objects.create(user=self.user)
+        for seat in (1, 2):
+            Ticket.objects.create(cargo=2, seat=seat, journey=self.journeys[0], order=order)
+
+        response = self._quote(self.journeys[:1])
+
+        self.assertEqual(response.data[0]["standard"], "66.00")
+
+    def test_order_stores_ticket_price(self):
+        payload = {
+            "tickets": [
+                {"cargo": 1, "seat": 1, "journey": self.journeys[1].id},
+                {"cargo": 2, "seat": 1, "journey": self.journeys[1].id},
+            ]
+        }
+        response = self.client.post(Order_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(Ticket.objects.values_list("price", flat=True)),
+            [Decimal("60.00"), Decimal("120.00")],
+        )
@@ -0,0 +1,138 @@
+import csv
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station.models import Station, Route, RouteStop, TrainType, Train, Journey
+
+GTFS_URL = reverse("station:gtfs")
+
+
+def read_member(archive, name):
+    with archive.open(name) as member:
+        return list(csv.reader(io.TextIOWrapper(member, encoding="utf-8")))
+
+
+class GtfsExportTests(APITestCase):
+    def setUp(self):
+        self.stations = [
+            Station.objects.create(name=name, latitude=50, longitude=30)
+            for name in ("Kyiv", "Zhytomyr", "Lviv")
+        ]
+        route = Route.objects.create(
+            source=self.stations[0], destination=self.stations[2], distance=540
+        )
+        RouteStop.objects.create(
+            route=route, station=self.stations[1], position=1, distance=135
+        )
+        train = Train.objects.create(
+            name="Night 7",
+            cargo_num=2,
+            places_in_cargo=10,
+            train_type=TrainType.objects.create(name="Sleeper"),
+        )
+        departure_time = datetime(2030, 5, 1, 22, 0, tzinfo=ZoneInfo("Europe/Kiev"))
+        self.journey = Journey.objects.create(
+            route=route,
+            train=train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=8),
+        )
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.output = self.directory / "gtfs.zip"
+
+    def export(self, *args):
+        out = StringIO()
+        call_command("export_gtfs", str(self.output), *args, stdout=out)
+        return out.getvalue()
+
+    def test_stop_times_past_midnight(self):
+        self.export()
+
+        with zipfile.ZipFile(self.output) as archive:
+            stop_times = read_member(archive, "stop_times.txt")
+            trips = read_member(archive, "trips.txt")
+
+        self.assertEqual(
+            [row[1:5] for row in stop_times[1:]],
+            [
+                ["22:00:00", "22:00:00", str(self.stations[0].id), "1"],
+                ["24:00:00", "24:00:00", str(self.stations[1].id), "2"],
+                ["30:00:00", "30:00:00", str(self.stations[2].id), "3"],
+            ],
+        )
+        self.assertEqual(trips[1][1:], ["20300501", str(self.journey.id), "Night 7"])
+
+    def test_stop_times_on_daylight_saving_day(self):
+        # Clocks go from 03:00 to 04:00 on 2026-03-29; GTFS counts from
+        # noon minus 12h, which is 23:00 the evening before.
+        departure_time = datetime(
+            2026, 3, 29, 2, 30, tzinfo=ZoneInfo("Europe/Kiev")
+        ).astimezone(timezone.utc)
+        Journey.objects.filter(pk=self.journey.pk).update(
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=4),
+        )
+        self.export()
+
+        with zipfile.ZipFile(self.output) as archive:
+            stop_times = read_member(archive, "stop_times.txt")
+            trips = read_member(archive, "trips.txt")
+
+        self.assertEqual(
+            [row[1] for row in stop_times[1:]], ["03:30:00", "04:30:00", "07:30:00"]
+        )
+        self.assertEqual(trips[1][1], "20260329")
+
+    def test_incremental_rebuilds_changed_files(self):
+        self.export()
+
+        output = self.export("--incremental")
+        self.assertIn("rebuilt nothing", output)
+
+        self.stations[1].name = "Zhytomyr Central"
+        self.stations[1].save()
+        output = self.export("--incremental")
+
+        self.assertIn("rebuilt stops.txt, routes.txt", output)
+        with zipfile.ZipFile(self.output) as archive:
+            stops = read_member(archive, "stops.txt")
+            self.assertEqual(stops[2][1], "Zhytomyr Central")
+            self.assertEqual(len(read_member(archive, "stop_times.txt")), 4)
+
+    def test_staff_download_streams_zip(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="user@test.com", password="testpassword"
+            )
+        )
+        self.assertEqual(
+            self.client.get(GTFS_URL).status_code, status.HTTP_403_FORBIDDEN
+        )
+
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="staff@test.com", password="testpassword", is_staff=True
+            )
+        )
+        response = self.client.get(GTFS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = b"".join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(len(read_member(archive, "stops.txt")), 4)
+
+        response = self.client.get(GTFS_URL, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
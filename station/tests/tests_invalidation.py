@@ -0,0 +1,44 @@
+import json
+import time
+
+from django.test import TestCase
+
+from station import autocomplete, invalidation
+from station.models import Station
+
+
+class InvalidationBusTests(TestCase):
+    def setUp(self):
+        self.received = []
+        invalidation.register("test", self.received.append)
+        self.addCleanup(invalidation._handlers.pop, "test")
+
+    def test_publishes_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidation.invalidate("test", 1, 2)
+            self.assertEqual(self.received, [])
+
+        self.assertEqual(self.received, [[1, 2]])
+
+    def test_delivery_latency_is_recorded(self):
+        before = invalidation.stats.snapshot()["count"]
+        invalidation.deliver(
+            json.dumps({"n": "test", "k": [], "t": time.time() - 0.25})
+        )
+
+        snapshot = invalidation.stats.snapshot()
+        self.assertEqual(snapshot["count"], before + 1)
+        self.assertGreaterEqual(snapshot["max"], 0.25)
+
+    def test_unknown_namespace_is_ignored(self):
+        invalidation.deliver(json.dumps({"n": "other", "k": [1], "t": time.time()}))
+
+        self.assertEqual(self.received, [])
+
+    def test_station_change_resets_autocomplete_index(self):
+        autocomplete.get_index()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Station.objects.create(name="Odesa", latitude=46.48, longitude=30.72)
+
+        self.assertIsNone(autocomplete._index)
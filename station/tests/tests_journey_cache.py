@@ -0,0 +1,143 @@
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.signals import request_started
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station import journey_cache
+from station.models import Station, Route, TrainType, Train, Journey
+
+JOURNEY_URL = reverse("station:journey-list")
+
+
+class JourneyListCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+        self.client.force_authenticate(user)
+
+        station_1 = Station.objects.create(name="Kyiv", latitude=50.45, longitude=30.52)
+        station_2 = Station.objects.create(name="Lviv", latitude=49.84, longitude=24.03)
+        self.route = Route.objects.create(
+            source=station_1, destination=station_2, distance=540
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        self.train = Train.objects.create(
+            name="Train 1", cargo_num=5, places_in_cargo=50, train_type=train_type
+        )
+        self.departure_time = timezone.now() + timedelta(days=1)
+        self._create_journey()
+
+        self.refreshes = []
+        self.original_start_refresh = journey_cache.start_refresh
+        journey_cache.start_refresh = self.refreshes.append
+
+    def tearDown(self):
+        journey_cache.start_refresh = self.original_start_refresh
+
+    def _create_journey(self):
+        return Journey.objects.create(
+            route=self.route,
+            train=self.train,
+            departure_time=self.departure_time,
+            arrival_time=self.departure_time + timedelta(hours=5),
+        )
+
+    def _expire(self, params):
+        key = journey_cache.journey_list_key(params)
+        entry = cache.get(key)
+        entry["fresh_until"] = time.time() - 1
+        cache.set(key, entry)
+
+    def test_fresh_entry_is_served_without_queries(self):
+        self.client.get(JOURNEY_URL, {"train": self.train.id})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(JOURNEY_URL, {"train": self.train.id})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+
+    def test_stale_entry_is_served_while_one_refresh_runs(self):
+        self.client.get(JOURNEY_URL)
+        self._create_journey()
+        self._expire({})
+
+        stale = self.client.get(JOURNEY_URL)
+        self.client.get(JOURNEY_URL)
+
+        self.assertEqual(len(stale.data), 1)
+        self.assertEqual(len(self.refreshes), 1)
+
+        self.refreshes[0]()
+
+        self.assertEqual(len(self.client.get(JOURNEY_URL).data), 2)
+
+    def test_journey_change_evicts_cached_lists(self):
+        self.client.get(JOURNEY_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_journey()
+
+        self.assertEqual(len(self.client.get(JOURNEY_URL).data), 2)
+        self.assertEqual(len(self.refreshes), 0)
+
+    def test_params_are_normalized(self):
+        self.assertEqual(
+            journey_cache.normalize_params(
+                {"train": "5,2,5", "departure_time": "", "format": "json"}
+            ),
+            {"train": "2,5"},
+        )
+
+    def test_warm_cache_prerenders_logged_filters(self):
+        day = self.departure_time.date().isoformat()
+        path = self._write_log(
+            f'1.2.3.4 - - [19/Oct/2026:10:00:00 +0000] '
+            f'"GET /api/station/journeys/?departure_time={day} HTTP/1.1" 200 512\n'
+            f'1.2.3.4 - - [19/Oct/2026:10:00:01 +0000] '
+            f'"GET /api/station/stations/ HTTP/1.1" 200 64\n'
+        )
+
+        call_command("warm_cache", path, top=5, days=0, stdout=StringIO())
+
+        self.assertIsNotNone(
+            cache.get(journey_cache.journey_list_key({"departure_time": day}))
+        )
+        self.assertIsNotNone(cache.get(journey_cache.journey_list_key({})))
+
+    @override_settings(JOURNEY_CACHE_WARM_ON_STARTUP=True, JOURNEY_CACHE_WARM_DAYS=2)
+    def test_worker_warms_on_first_request(self):
+        self.addCleanup(request_started.disconnect, journey_cache.warm_on_first_request)
+        journey_cache.warm_on_startup()
+
+        self.client.get(reverse("station:station-list"))
+        self.client.get(reverse("station:station-list"))
+        self.assertEqual(len(self.refreshes), 1)
+        self.refreshes[0]()
+
+        today = timezone.localdate()
+        for params in (
+            {},
+            {"departure_time": today.isoformat()},
+            {"departure_time": (today + timedelta(days=1)).isoformat()},
+        ):
+            self.assertIsNotNone(cache.get(journey_cache.journey_list_key(params)))
+
+    def _write_log(self, content):
+        with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False) as log:
+            log.write(content)
+        self.addCleanup(os.unlink, log.name)
+        return log.name
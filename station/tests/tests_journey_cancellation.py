@@ -0,0 +1,149 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APITestCase
+
+from station.events import broker
+from station.models import (
+    Station,
+    Route,
+    TrainType,
+    Train,
+    Journey,
+    Order,
+    Ticket,
+    ArchivedTicket,
+    SeatOccupancy,
+    OrderNotification,
+)
+from station.serializers import OrderSerializer
+
+Order_URL = reverse("station:order-list")
+
+
+class JourneyCancellationTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        route = Route.objects.create(
+            source=Station.objects.create(name="Kyiv", latitude=50, longitude=30),
+            destination=Station.objects.create(name="Lviv", latitude=49, longitude=24),
+            distance=540,
+        )
+        train = Train.objects.create(
+            name="Train 1",
+            cargo_num=2,
+            places_in_cargo=10,
+            train_type=TrainType.objects.create(name="Intercity"),
+        )
+        departure_time = timezone.now() + timedelta(days=1)
+        self.journey = Journey.objects.create(
+            route=route,
+            train=train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+        self.orders = [Order.objects.create(user=self.user) for _ in range(3)]
+        for seat in range(1, 6):
+            Ticket.objects.create(
+                cargo=1,
+                seat=seat,
+                journey=self.journey,
+                order=self.orders[seat % 3],
+            )
+
+    def cancel(self):
+        out = StringIO()
+        call_command(
+            "cancel_journey", str(self.journey.id), "--batch-size", "2", stdout=out
+        )
+        return out.getvalue()
+
+    def test_cancel_releases_tickets_in_batches(self):
+        output = self.cancel()
+
+        self.assertIn("released 2/5 tickets", output)
+        self.assertIn("released 5/5 tickets", output)
+        self.journey.refresh_from_db()
+        self.assertIsNotNone(self.journey.cancelled_at)
+        self.assertFalse(Ticket.objects.filter(journey=self.journey).exists())
+        self.assertFalse(SeatOccupancy.objects.filter(journey=self.journey).exists())
+        self.assertEqual(
+            ArchivedTicket.objects.filter(journey=self.journey).count(), 5
+        )
+        self.assertEqual(
+            sorted(OrderNotification.objects.values_list("order_id", flat=True)),
+            sorted(order.id for order in self.orders),
+        )
+
+    def test_cancel_resyncs_streams_and_evicts_journey_list(self):
+        self.client.get(reverse("station:journey-list"))
+        published = []
+        original = broker.publish
+        broker.publish = published.append
+        self.addCleanup(setattr, broker, "publish", original)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cancel()
+
+        self.assertEqual(published, [{"journey": self.journey.id, "type": "resync"}])
+        journeys = self.client.get(reverse("station:journey-list")).data
+        self.assertIsNotNone(journeys[0]["cancelled_at"])
+        self.assertEqual(journeys[0]["count_taken_seats"], 0)
+
+    def test_rerun_does_not_notify_twice(self):
+        self.cancel()
+        self.cancel()
+
+        self.assertEqual(OrderNotification.objects.count(), 3)
+
+    def test_cancelled_journey_cannot_be_booked(self):
+        self.cancel()
+
+        response = self.client.post(
+            Order_URL,
+            {"tickets": [{"cargo": 2, "seat": 1, "journey": self.journey.id}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("journey is cancelled", str(response.data))
+
+    def test_cancel_during_booking_is_caught_under_lock(self):
+        serializer = OrderSerializer(
+            data={"tickets": [{"cargo": 2, "seat": 1, "journey": self.journey.id}]}
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        Journey.objects.filter(pk=self.journey.pk).update(cancelled_at=timezone.now())
+
+        with self.assertRaisesMessage(ValidationError, "journey is cancelled"):
+            serializer.save(user=self.user)
+        self.assertFalse(Ticket.objects.filter(cargo=2).exists())
+
+    def test_history_marks_cancelled_tickets(self):
+        self.cancel()
+
+        response = self.client.get(reverse("station:order-history"))
+        detail = self.client.get(
+            reverse("station:order-detail", args=[self.orders[0].id])
+        )
+
+        tickets = [
+            ticket
+            for order in response.data["results"]
+            for ticket in order["tickets"]
+        ]
+        self.assertEqual(len(tickets), 5)
+        self.assertTrue(all(ticket["cancelled"] for ticket in tickets))
+        self.assertTrue(
+            all(ticket["cancelled"] for ticket in detail.data["archived_tickets"])
+        )
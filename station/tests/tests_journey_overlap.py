@@ -0,0 +1,161 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station.intervals import IntervalTree
+from station.models import Station, Route, TrainType, Train, Crew, Journey
+
+Journey_URL = reverse("station:journey-list")
+Journey_BULK_URL = reverse("station:journey-bulk-create")
+
+
+def roster_url(crew_id):
+    return reverse("station:crew-roster", args=[crew_id])
+
+
+class IntervalTreeTests(TestCase):
+    def test_overlapping_is_half_open(self):
+        tree = IntervalTree([(0, 10, "a"), (10, 20, "b"), (5, 15, "c")])
+
+        self.assertEqual(sorted(data for _, _, data in tree.overlapping(9, 10)), ["a", "c"])
+        self.assertEqual(sorted(data for _, _, data in tree.overlapping(20, 30)), [])
+
+
+class JourneyOverlapTests(APITestCase):
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            email="admin@example.com",
+            password="adminpassword"
+        )
+        self.client.force_authenticate(self.admin_user)
+
+        station_1 = Station.objects.create(name="Kyiv", latitude=50.45, longitude=30.52)
+        station_2 = Station.objects.create(name="Lviv", latitude=49.84, longitude=24.03)
+        self.route = Route.objects.create(
+            source=station_1, destination=station_2, distance=540
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        self.train = Train.objects.create(
+            name="Train 1", cargo_num=5, places_in_cargo=50, train_type=train_type
+        )
+        self.other_train = Train.objects.create(
+            name="Train 2", cargo_num=5, places_in_cargo=50, train_type=train_type
+        )
+        self.crew = Crew.objects.create(first_name="John", last_name="Doe")
+        self.other_crew = Crew.objects.create(first_name="Jane", last_name="Roe")
+
+        self.departure_time = timezone.now() + timedelta(days=1)
+        self.journey = Journey.objects.create(
+            route=self.route,
+            train=self.train,
+            departure_time=self.departure_time,
+            arrival_time=self.departure_time + timedelta(hours=5),
+        )
+        self.journey.crews.add(self.crew)
+
+    def _payload(self, train, hours_offset, crews=None):
+        departure_time = self.departure_time + timedelta(hours=hours_offset)
+        return {
+            "train": train.id,
+            "route": self.route.id,
+            "departure_time": departure_time.isoformat(),
+            "arrival_time": (departure_time + timedelta(hours=5)).isoformat(),
+            "crews": [crew.id for crew in crews or [self.other_crew]],
+        }
+
+    def test_overlapping_train_rejected(self):
+        response = self.client.post(Journey_URL, self._payload(self.train, 2))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("train", response.data)
+
+    def test_overlapping_crew_rejected(self):
+        response = self.client.post(
+            Journey_URL, self._payload(self.other_train, 2, [self.crew])
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("crews", response.data)
+
+    def test_back_to_back_journey_allowed(self):
+        response = self.client.post(
+            Journey_URL, self._payload(self.train, 5, [self.crew])
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_bulk_create_rejects_conflicts_inside_batch(self):
+        payload = [
+            self._payload(self.other_train, 10),
+            self._payload(self.other_train, 12),
+        ]
+        response = self.client.post(Journey_BULK_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Journey.objects.count(), 1)
+
+    def test_bulk_create(self):
+        payload = [
+            self._payload(self.train, 5, [self.crew]),
+            self._payload(self.other_train, 1),
+            self._payload(self.other_train, 6),
+        ]
+        response = self.client.post(Journey_BULK_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Journey.objects.count(), 4)
+
+    def test_overlap_checks_lock_trains_and_crews(self):
+        locked = []
+        lock_schedules = Journey.__dict__["lock_schedules"]
+        Journey.lock_schedules = staticmethod(
+            lambda train_ids, crew_ids: locked.append(
+                (sorted(train_ids), sorted(crew_ids))
+            )
+        )
+        self.addCleanup(setattr, Journey, "lock_schedules", lock_schedules)
+
+        self.client.post(Journey_URL, self._payload(self.other_train, 10))
+        self.client.post(
+            Journey_BULK_URL,
+            [
+                self._payload(self.train, 20, [self.crew]),
+                self._payload(self.other_train, 20),
+            ],
+            format="json",
+        )
+
+        trains = sorted([self.train.id, self.other_train.id])
+        crews = sorted([self.crew.id, self.other_crew.id])
+        self.assertEqual(
+            locked,
+            [([self.other_train.id], [self.other_crew.id]), (trains, crews)],
+        )
+
+    def test_crew_roster_ordered_by_departure(self):
+        later = Journey.objects.create(
+            route=self.route,
+            train=self.other_train,
+            departure_time=self.departure_time + timedelta(days=2),
+            arrival_time=self.departure_time + timedelta(days=2, hours=5),
+        )
+        later.crews.add(self.crew)
+
+        response = self.client.get(roster_url(self.crew.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [journey["id"] for journey in response.data], [self.journey.id, later.id]
+        )
+
+    def test_crew_roster_rejects_malformed_dates(self):
+        for params in ({"from": "13-11-2024"}, {"to": "tomorrow"}):
+            response = self.client.get(roster_url(self.crew.id), params)
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), response.data)
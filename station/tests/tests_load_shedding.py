@@ -0,0 +1,86 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import resolve
+
+from train_station_api_service.concurrency import AdaptiveLimiter
+from train_station_api_service.middleware import LoadSheddingMiddleware
+
+
+class AdaptiveLimiterTests(SimpleTestCase):
+    def test_rejects_over_limit(self):
+        limiter = AdaptiveLimiter("orders", ["station:order-*"], limit=2)
+
+        self.assertTrue(limiter.acquire())
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire())
+
+        limiter.release(latency=0.1)
+        self.assertTrue(limiter.acquire())
+
+    def test_limit_follows_latency(self):
+        limiter = AdaptiveLimiter(
+            "orders",
+            ["station:order-*"],
+            limit=10,
+            min_limit=2,
+            max_limit=20,
+            latency_target=0.5,
+        )
+
+        for _ in range(30):
+            limiter.acquire()
+            limiter.release(latency=2.0)
+        self.assertEqual(limiter.limit, 2)
+
+        for _ in range(200):
+            limiter.acquire()
+            limiter.release(latency=0.1)
+        self.assertEqual(limiter.limit, 20)
+
+    def test_matches_view_names(self):
+        limiter = AdaptiveLimiter("orders", ["station:order-*"], limit=1)
+
+        self.assertTrue(limiter.matches("station:order-history"))
+        self.assertFalse(limiter.matches("station:station-list"))
+
+
+@override_settings(
+    LOAD_SHEDDING_ENABLED=True,
+    LOAD_SHEDDING_GROUPS={"orders": {"views": ["station:order-*"], "limit": 1}},
+)
+class LoadSheddingMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.middleware = LoadSheddingMiddleware(lambda request: HttpResponse())
+        self.factory = RequestFactory()
+
+    def _process(self, path):
+        request = self.factory.get(path)
+        request.resolver_match = resolve(path)
+        request._shedding_limiter = None
+        return self.middleware.process_view(request, None, (), {})
+
+    def test_sheds_full_group_with_retry_after(self):
+        self.middleware.limiters[0].acquire()
+
+        response = self._process("/api/station/orders/")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "2")
+
+    def test_other_views_are_not_limited(self):
+        self.middleware.limiters[0].acquire()
+
+        self.assertIsNone(self._process("/api/station/stations/"))
+
+    def test_slot_is_released_after_response(self):
+        request = self.factory.get("/api/station/orders/")
+        request.resolver_match = resolve("/api/station/orders/")
+
+        def view(request):
+            self.middleware.process_view(request, None, (), {})
+            return HttpResponse()
+
+        self.middleware.get_response = view
+        self.middleware(request)
+
+        self.assertEqual(self.middleware.limiters[0].inflight, 0)
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station.models import Station, Route, TrainType, Train, Journey, Order, Ticket
+
+Order_HISTORY_URL = reverse("station:order-history")
+
+
+class OrderHistoryApiTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+        other_user = get_user_model().objects.create_user(
+            email="other@example.com", password="otherpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        station_1 = Station.objects.create(name="Kyiv", latitude=50.45, longitude=30.52)
+        station_2 = Station.objects.create(name="Lviv", latitude=49.84, longitude=24.03)
+        route = Route.objects.create(
+            source=station_1, destination=station_2, distance=540
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        train = Train.objects.create(
+            name="Train 1", cargo_num=5, places_in_cargo=50, train_type=train_type
+        )
+        departure_time = timezone.now() + timedelta(days=1)
+        self.journey = Journey.objects.create(
+            route=route,
+            train=train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+
+        self.orders = []
+        for seat in range(1, 4):
+            order = Order.objects.create(user=self.user)
+            Ticket.objects.create(cargo=1, seat=seat, journey=self.journey, order=order)
+            self.orders.append(order)
+        Ticket.objects.create(
+            cargo=2, seat=1, journey=self.journey, order=Order.objects.create(user=other_user)
+        )
+
+    def test_history_embeds_journey_summary(self):
+        response = self.client.get(Order_HISTORY_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 3)
+        ticket = response.data["results"][0]["tickets"][0]
+        self.assertEqual(ticket["source"], "Kyiv")
+        self.assertEqual(ticket["destination"], "Lviv")
+        self.assertEqual(ticket["journey"], self.journey.id)
+
+    def test_history_keyset_pages_newest_first(self):
+        seen = []
+        url = Order_HISTORY_URL + "?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(order["id"] for order in response.data["results"])
+            url = response.data["next"]
+
+        self.assertEqual(seen, [order.id for order in reversed(self.orders)])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(Order_HISTORY_URL, {"cursor": "garbage"})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from station.idempotency import idempotent_response
+from station.models import (
+    Station,
+    Route,
+    TrainType,
+    Train,
+    Journey,
+    Order,
+    Ticket,
+    IdempotencyKey,
+)
+
+Order_URL = reverse("station:order-list")
+
+
+@override_settings(TICKET_TOKEN_KEY="test-ticket-token-key")
+class OrderIdempotencyApiTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        station_1 = Station.objects.create(name="Kyiv", latitude=50.45, longitude=30.52)
+        station_2 = Station.objects.create(name="Lviv", latitude=49.84, longitude=24.03)
+        route = Route.objects.create(
+            source=station_1, destination=station_2, distance=540
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        train = Train.objects.create(
+            name="Train 1", cargo_num=5, places_in_cargo=50, train_type=train_type
+        )
+        departure_time = timezone.now() + timedelta(days=1)
+        self.journey = Journey.objects.create(
+            route=route,
+            train=train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+
+    def _order(self, seat, key):
+        return self.client.post(
+            Order_URL,
+            {"tickets": [{"cargo": 1, "seat": seat, "journey": self.journey.id}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_first_response(self):
+        first = self._order(seat=1, key="order-1")
+
+        with CaptureQueriesContext(connection) as queries:
+            retry = self._order(seat=1, key="order-1")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertFalse(
+            any("station_ticket" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_key_reused_with_other_payload(self):
+        self._order(seat=1, key="order-1")
+        response = self._order(seat=2, key="order-1")
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_without_key_books_again(self):
+        self._order(seat=1, key="")
+        response = self._order(seat=2, key="")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_abandoned_key_is_taken_over(self):
+        record = IdempotencyKey.objects.create(
+            user=self.user, key="order-1", fingerprint="lost worker"
+        )
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            created_at=timezone.now() - timedelta(minutes=5)
+        )
+
+        response = self._order(seat=1, key="order-1")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertTrue(IdempotencyKey.objects.get(key="order-1").completed)
+
+    def test_handler_rolls_back_when_key_was_taken_over(self):
+        request = Request(
+            APIRequestFactory().post(
+                Order_URL, {}, format="json", HTTP_IDEMPOTENCY_KEY="order-1"
+            ),
+            parsers=[JSONParser()],
+        )
+        request.user = self.user
+
+        def handler():
+            Order.objects.create(user=self.user)
+            IdempotencyKey.objects.filter(key="order-1").delete()
+            return Response({}, status=status.HTTP_201_CREATED)
+
+        response = idempotent_response(request, handler)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Order.objects.exists())
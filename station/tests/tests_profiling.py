@@ -0,0 +1,98 @@
+import pstats
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from train_station_api_service.profiling import build_call_tree, flatten
+
+JOURNEY_URL = reverse("station:journey-list")
+PROFILE_LIST_URL = reverse("profile-list")
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(
+            PROFILING_DIR=self.directory, PROFILING_MAX_FILES=2
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.staff = get_user_model().objects.create_user(
+            email="staff@test.com", password="testpassword", is_staff=True
+        )
+        self.user = get_user_model().objects.create_user(
+            email="user@test.com", password="testpassword"
+        )
+
+    def profiles(self):
+        return sorted(Path(self.directory).glob("*.prof"))
+
+    def test_staff_header_profiles_request(self):
+        token = AccessToken.for_user(self.staff)
+
+        response = self.client.get(
+            JOURNEY_URL, HTTP_X_PROFILE="1", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+        profile_id = response["X-Profile-Id"]
+        self.assertEqual(self.profiles()[0].stem, profile_id)
+        stats = pstats.Stats(str(self.profiles()[0]))
+        self.assertTrue(stats.stats)
+
+    def test_header_ignored_for_other_users(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(JOURNEY_URL, HTTP_X_PROFILE="1")
+
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(self.profiles(), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0)
+    def test_sampling_keeps_newest_profiles(self):
+        for _ in range(3):
+            self.client.get(JOURNEY_URL)
+
+        self.assertEqual(len(self.profiles()), 2)
+        self.assertEqual(len(list(Path(self.directory).glob("*.json"))), 2)
+
+    def test_browser_is_staff_only(self):
+        self.client.force_login(self.staff)
+        profile_id = self.client.get(JOURNEY_URL, HTTP_X_PROFILE="1")["X-Profile-Id"]
+
+        response = self.client.get(PROFILE_LIST_URL)
+        self.assertContains(response, profile_id)
+        response = self.client.get(reverse("profile-detail", args=[profile_id]))
+        self.assertContains(response, "Flamegraph")
+        response = self.client.get(reverse("profile-download", args=[profile_id]))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse("profile-detail", args=["..secret"]))
+        self.assertEqual(response.status_code, 404)
+
+        self.client.force_login(self.user)
+        response = self.client.get(PROFILE_LIST_URL)
+        self.assertEqual(response.status_code, 302)
+
+
+class CallTreeTests(TestCase):
+    def test_tree_follows_callers(self):
+        class Stats:
+            root = ("app.py", 1, "view")
+            child = ("db.py", 5, "query")
+            stats = {
+                root: (1, 1, 0.1, 1.0, {}),
+                child: (2, 2, 0.9, 0.9, {root: (2, 2, 0.9, 0.9)}),
+            }
+
+        tree, total = build_call_tree(Stats)
+        rows = flatten(tree, total)
+
+        self.assertEqual(
+            [(row["label"], row["depth"], row["width"]) for row in rows],
+            [("view (app.py:1)", 0, 100.0), ("query (db.py:5)", 1, 90.0)],
+        )
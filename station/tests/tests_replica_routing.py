@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from station.models import Station
+from train_station_api_service.db_router import PrimaryReplicaRouter
+from train_station_api_service.middleware import ReplicaRoutingMiddleware
+
+Station_URL = reverse("station:station-list")
+
+
+@override_settings(DATABASE_REPLICA_ENABLED=True)
+class ReplicaRoutingMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+        self.used_db = None
+
+    def _get_response(self, request):
+        self.used_db = self.router.db_for_read(Station)
+        return HttpResponse(status=201 if request.method == "POST" else 200)
+
+    def _call(self, method, path="/api/station/journeys/", token="Bearer a"):
+        request = getattr(self.factory, method)(path, HTTP_AUTHORIZATION=token)
+        ReplicaRoutingMiddleware(self._get_response)(request)
+        return self.used_db
+
+    def test_safe_reads_go_to_replica(self):
+        self.assertEqual(self._call("get"), "replica")
+
+    def test_writes_and_non_api_paths_stay_on_primary(self):
+        self.assertEqual(self._call("post"), "default")
+        cache.clear()
+        self.assertEqual(self._call("get", path="/admin/"), "default")
+
+    def test_reads_pinned_to_primary_after_write(self):
+        self._call("post")
+
+        self.assertEqual(self._call("get"), "default")
+        self.assertEqual(self._call("get", token="Bearer b"), "replica")
+
+    def test_no_replica_outside_request(self):
+        self.assertEqual(self.router.db_for_read(Station), "default")
+
+
+@override_settings(DATABASE_REPLICA_ENABLED=True)
+class ReplicaReadsApiTests(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="user@example.com", password="userpassword"
+            )
+        )
+        Station.objects.create(name="Kyiv", latitude=50.45, longitude=30.52)
+
+    def test_station_list_served_by_replica(self):
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            response = self.client.get(Station_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertTrue(replica_queries.captured_queries)
@@ -0,0 +1,251 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station.events import broker
+from station.models import (
+    Station,
+    Route,
+    RouteStop,
+    TrainType,
+    Train,
+    Journey,
+    Order,
+    Ticket,
+    SeatOccupancy,
+    segment_mask,
+)
+
+Order_URL = reverse("station:order-list")
+
+
+def availability_url(journey_id, **stops):
+    url = reverse("station:journey-availability", args=[journey_id])
+    return url + "?" + "&".join(f"{key}={value}" for key, value in stops.items())
+
+
+@override_settings(TICKET_TOKEN_KEY="test-ticket-token-key")
+class RouteStopsApiTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        stations = [
+            Station.objects.create(name=name, latitude=50, longitude=30)
+            for name in ("Kyiv", "Zhytomyr", "Rivne", "Lviv")
+        ]
+        self.stations = stations
+        self.route = route = Route.objects.create(
+            source=stations[0], destination=stations[3], distance=540
+        )
+        RouteStop.objects.create(
+            route=route, station=stations[1], position=1, distance=140
+        )
+        RouteStop.objects.create(
+            route=route, station=stations[2], position=2, distance=330
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        train = Train.objects.create(
+            name="Train 1", cargo_num=2, places_in_cargo=10, train_type=train_type
+        )
+        departure_time = timezone.now() + timedelta(days=1)
+        self.journey = Journey.objects.create(
+            route=route,
+            train=train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+
+    def _book(self, from_stop, to_stop, seat=1):
+        return self.client.post(
+            Order_URL,
+            {
+                "tickets": [
+                    {
+                        "cargo": 2,
+                        "seat": seat,
+                        "journey": self.journey.id,
+                        "from_stop": from_stop,
+                        "to_stop": to_stop,
+                    }
+                ]
+            },
+            format="json",
+        )
+
+    def test_segment_mask(self):
+        self.assertEqual(segment_mask(0, 1), 0b1)
+        self.assertEqual(segment_mask(1, 3), 0b110)
+
+    def test_seat_is_resold_for_disjoint_legs(self):
+        first = self._book(0, 1)
+        second = self._book(1, 3)
+        overlapping = self._book(0, 2)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(overlapping.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            SeatOccupancy.objects.get(journey=self.journey, seat=1).segments, 0b111
+        )
+
+    def test_seat_events_carry_the_leg(self):
+        published = []
+        original = broker.publish
+        broker.publish = published.append
+        self.addCleanup(setattr, broker, "publish", original)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._book(0, 1)
+            self._book(1, 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.get(journey=self.journey, from_stop=0).delete()
+
+        self.assertEqual(
+            [(event["type"], event["seats"]) for event in published],
+            [
+                ("taken", [{"cargo": 2, "seat": 1, "from_stop": 0, "to_stop": 1}]),
+                ("taken", [{"cargo": 2, "seat": 1, "from_stop": 1, "to_stop": 3}]),
+                ("freed", [{"cargo": 2, "seat": 1, "from_stop": 0, "to_stop": 1}]),
+            ],
+        )
+
+    def test_order_reads_route_stops_once_per_ticket(self):
+        tickets = [
+            {
+                "cargo": 1,
+                "seat": seat,
+                "journey": self.journey.id,
+                "from_stop": 1,
+                "to_stop": 3,
+            }
+            for seat in (1, 2, 3)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                Order_URL, {"tickets": tickets}, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        stop_reads = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("SELECT")
+            and 'FROM "station_routestop"' in query["sql"]
+        ]
+        self.assertEqual(len(stop_reads), len(tickets))
+
+    def test_leg_is_priced_by_distance(self):
+        short = self._book(0, 1, seat=1)
+        full = self._book(0, 3, seat=2)
+
+        self.assertLess(
+            float(short.data["tickets"][0]["price"]),
+            float(full.data["tickets"][0]["price"]),
+        )
+
+    def test_ticket_defaults_to_whole_route(self):
+        response = self.client.post(
+            Order_URL,
+            {"tickets": [{"cargo": 1, "seat": 1, "journey": self.journey.id}]},
+            format="json",
+        )
+
+        self.assertEqual(response.data["tickets"][0]["from_stop"], 0)
+        self.assertEqual(response.data["tickets"][0]["to_stop"], 3)
+
+    def test_availability_for_leg(self):
+        self._book(0, 1, seat=1)
+        self._book(2, 3, seat=2)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                availability_url(self.journey.id, from_stop=1, to_stop=3)
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["capacity"], 20)
+        self.assertEqual(response.data["available"], 19)
+        self.assertEqual(response.data["taken"], [{"cargo": 2, "seat": 2}])
+
+    def test_availability_rejects_bad_leg(self):
+        response = self.client.get(
+            availability_url(self.journey.id, from_stop=2, to_stop=1)
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deleted_ticket_frees_its_leg(self):
+        self._book(0, 1)
+        self._book(1, 3)
+
+        Ticket.objects.get(from_stop=0).delete()
+
+        self.assertEqual(
+            SeatOccupancy.objects.get(journey=self.journey, seat=1).segments, 0b110
+        )
+        Ticket.objects.get(from_stop=1).delete()
+        self.assertFalse(SeatOccupancy.objects.exists())
+
+    @skipUnless(
+        connection.vendor == "postgresql", "exclusion constraints need Postgres"
+    )
+    def test_database_refuses_overlapping_legs(self):
+        order = Order.objects.create(user=self.user)
+        fields = {"journey": self.journey, "order": order, "cargo": 2, "seat": 1}
+        Ticket.objects.bulk_create([Ticket(from_stop=1, to_stop=3, **fields)])
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Ticket.objects.bulk_create([Ticket(from_stop=0, to_stop=2, **fields)])
+        Ticket.objects.bulk_create([Ticket(from_stop=0, to_stop=1, **fields)])
+
+    def test_stop_distance_must_grow_with_position(self):
+        for position, distance in ((3, 330), (3, 600), (3, -10), (5, 0)):
+            with self.assertRaises(ValidationError):
+                RouteStop.objects.create(
+                    route=self.route,
+                    station=self.stations[0],
+                    position=position,
+                    distance=distance,
+                )
+
+        RouteStop.objects.create(
+            route=self.route, station=self.stations[0], position=3, distance=400
+        )
+        self.assertEqual(self.route.stop_distances(), [0, 140, 330, 400, 540])
+
+    def test_stop_position_is_checked_on_save(self):
+        with self.assertRaisesMessage(ValidationError, "position must be in range"):
+            RouteStop.objects.create(
+                route=self.route, station=self.stations[0], position=63, distance=400
+            )
+
+    def test_stops_of_booked_route_are_frozen(self):
+        self._book(0, 3)
+        stop = RouteStop.objects.get(position=2)
+
+        with self.assertRaisesMessage(ValidationError, "have tickets"):
+            RouteStop.objects.create(
+                route=self.route, station=self.stations[0], position=3, distance=400
+            )
+        with self.assertRaisesMessage(ValidationError, "have tickets"):
+            stop.delete()
+        stop.position = 3
+        with self.assertRaisesMessage(ValidationError, "have tickets"):
+            stop.save()
+
+        stop.position = 2
+        stop.distance = 300
+        stop.save()
+        self.assertEqual(self.route.stop_distances(), [0, 140, 300, 540])
@@ -0,0 +1,31 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+Schema_URL = reverse("schema")
+
+
+class StaticSchemaTests(TestCase):
+    def setUp(self):
+        self.schema_dir = tempfile.TemporaryDirectory()
+        self.schema_file = Path(self.schema_dir.name) / "openapi.json"
+        self.addCleanup(self.schema_dir.cleanup)
+
+    def test_schema_served_from_artifact_with_etag(self):
+        with override_settings(OPENAPI_SCHEMA_FILE=self.schema_file):
+            call_command("generate_schema", stdout=StringIO())
+            digest = (self.schema_file.parent / "openapi.json.sha256").read_text()
+
+            response = self.client.get(Schema_URL)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response["ETag"], f'"{digest}"')
+            self.assertIn("max-age=", response["Cache-Control"])
+            self.assertIn(b"/api/station/journeys/", response.content)
+
+            response = self.client.get(Schema_URL, HTTP_IF_NONE_MATCH=f'"{digest}"')
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,177 @@
+import asyncio
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station.events import SeatEventBroker, broker, seat_events
+from station.models import Station, Route, TrainType, Train, Journey, Order, Ticket
+
+Order_URL = reverse("station:order-list")
+
+
+def journey_events_url(journey_id):
+    return reverse("station:journey-events", args=[journey_id])
+
+
+class SeatEventBrokerTests(SimpleTestCase):
+    def test_publish_reaches_journey_subscribers(self):
+        local_broker = SeatEventBroker()
+
+        async def listen():
+            subscriber = local_broker.subscribe(1)
+            other = local_broker.subscribe(2)
+            local_broker.publish({"journey": 1, "type": "taken", "seats": []})
+            event = await asyncio.wait_for(subscriber[1].get(), 1)
+            local_broker.unsubscribe(1, subscriber)
+            local_broker.unsubscribe(2, other)
+            return event, other[1].empty()
+
+        event, other_empty = asyncio.run(listen())
+
+        self.assertEqual(event["type"], "taken")
+        self.assertTrue(other_empty)
+
+    def test_overflow_asks_for_resync(self):
+        local_broker = SeatEventBroker()
+
+        async def listen():
+            subscriber = local_broker.subscribe(1, maxsize=2)
+            for _ in range(3):
+                local_broker.publish({"journey": 1, "type": "taken", "seats": []})
+            await asyncio.sleep(0)
+            local_broker.unsubscribe(1, subscriber)
+            queue = subscriber[1]
+            return [queue.get_nowait()["type"] for _ in range(queue.qsize())]
+
+        self.assertEqual(asyncio.run(listen()), ["resync"])
+
+    def test_large_changes_are_chunked(self):
+        events = list(
+            seat_events(1, "freed", [(1, seat, 0, 1) for seat in range(250)])
+        )
+
+        self.assertEqual([len(event["seats"]) for event in events], [100, 100, 50])
+
+
+@override_settings(TICKET_TOKEN_KEY="test-ticket-token-key")
+class SeatEventsApiTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        station_1 = Station.objects.create(name="Kyiv", latitude=50.45, longitude=30.52)
+        station_2 = Station.objects.create(name="Lviv", latitude=49.84, longitude=24.03)
+        route = Route.objects.create(
+            source=station_1, destination=station_2, distance=540
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        train = Train.objects.create(
+            name="Train 1", cargo_num=5, places_in_cargo=50, train_type=train_type
+        )
+        departure_time = timezone.now() + timedelta(days=1)
+        self.journey = Journey.objects.create(
+            route=route,
+            train=train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+
+    def _capture(self, action):
+        published = []
+        original = broker.publish
+        broker.publish = published.append
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                action()
+        finally:
+            broker.publish = original
+        return published
+
+    def test_order_publishes_taken_seats_on_commit(self):
+        published = self._capture(
+            lambda: self.client.post(
+                Order_URL,
+                {
+                    "tickets": [
+                        {"cargo": 1, "seat": 2, "journey": self.journey.id},
+                        {"cargo": 1, "seat": 1, "journey": self.journey.id},
+                    ]
+                },
+                format="json",
+            )
+        )
+
+        self.assertEqual(
+            published,
+            [
+                {
+                    "journey": self.journey.id,
+                    "type": "taken",
+                    "seats": [
+                        {"cargo": 1, "seat": 1, "from_stop": 0, "to_stop": 1},
+                        {"cargo": 1, "seat": 2, "from_stop": 0, "to_stop": 1},
+                    ],
+                }
+            ],
+        )
+
+    def test_deleted_ticket_publishes_freed_seat(self):
+        order = Order.objects.create(user=self.user)
+        ticket = Ticket.objects.create(
+            cargo=3, seat=4, journey=self.journey, order=order
+        )
+
+        published = self._capture(ticket.delete)
+
+        self.assertEqual(published[0]["type"], "freed")
+        self.assertEqual(
+            published[0]["seats"],
+            [{"cargo": 3, "seat": 4, "from_stop": 0, "to_stop": 1}],
+        )
+
+    def test_stream_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(journey_events_url(self.journey.id))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stream_unknown_journey(self):
+        self.client.login(email="user@example.com", password="userpassword")
+        response = self.client.get(journey_events_url(self.journey.id + 100))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stream_needs_asgi(self):
+        self.client.login(email="user@example.com", password="userpassword")
+        response = self.client.get(journey_events_url(self.journey.id))
+
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+    async def test_stream_starts_with_snapshot(self):
+        order = await Order.objects.acreate(user=self.user)
+        await Ticket.objects.acreate(
+            cargo=2, seat=7, journey=self.journey, order=order
+        )
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(journey_events_url(self.journey.id))
+        stream = aiter(response.streaming_content)
+        try:
+            chunk = await anext(stream)
+        finally:
+            await stream.aclose()
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(
+            chunk,
+            b'event: snapshot\ndata: {"journey": %d, "seats": '
+            b'[{"cargo": 2, "seat": 7, "from_stop": 0, "to_stop": 1}]}\n\n'
+            % self.journey.id,
+        )
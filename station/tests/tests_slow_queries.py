@@ -0,0 +1,112 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from station import slow_queries
+from station.models import SlowQuery
+from station.slow_queries import (
+    SlowQueryRecorder,
+    explainable,
+    fingerprint,
+    normalize_sql,
+)
+
+ROUTE_URL = reverse("station:route-list")
+
+
+class NormalizeSqlTests(SimpleTestCase):
+    def test_literals_and_lists_collapse(self):
+        self.assertEqual(
+            normalize_sql(
+                "SELECT *  FROM station_journey\n WHERE id IN (%s, %s, %s) "
+                "AND name = 'Kyiv' LIMIT 21"
+            ),
+            "SELECT * FROM station_journey WHERE id IN (?) AND name = ? LIMIT ?",
+        )
+        self.assertEqual(
+            fingerprint(normalize_sql("SELECT 1 FROM t WHERE id IN (%s)")),
+            fingerprint(normalize_sql("SELECT 2 FROM t WHERE id IN (%s, %s)")),
+        )
+
+    def test_only_plain_selects_are_explained(self):
+        self.assertTrue(explainable("SELECT 1 FROM t", many=False))
+        self.assertTrue(
+            explainable('SELECT COUNT(*) FROM "station_route"', many=False)
+        )
+        for sql in (
+            "SELECT 1 FROM t FOR UPDATE",
+            "SELECT 1 FROM t FOR NO KEY UPDATE OF t",
+            "SELECT 1 FROM t FOR SHARE SKIP LOCKED",
+            "SELECT 1 FROM t\nFOR KEY SHARE",
+            "SELECT pg_notify('channel', 'payload')",
+            "SELECT nextval('station_ticket_id_seq')",
+        ):
+            self.assertFalse(explainable(sql, many=False), sql)
+        self.assertFalse(explainable("UPDATE t SET x = 1", many=False))
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1.0)
+class SlowQueryLogTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        self.explains = []
+        start_explain = slow_queries.start_explain
+        slow_queries.start_explain = self.explains.append
+        self.addCleanup(setattr, slow_queries, "start_explain", start_explain)
+
+    def test_request_queries_are_logged(self):
+        self.client.get(ROUTE_URL)
+
+        logged = SlowQuery.objects.filter(view_name="station:route-list")
+        self.assertTrue(logged.exists())
+        self.assertTrue(all("%s" not in query.sql for query in logged))
+        self.assertTrue(self.explains)
+
+    def test_each_explain_gets_its_own_query(self):
+        explained = []
+        explain = slow_queries.explain
+        slow_queries.explain = lambda *args: explained.append(args)
+        self.addCleanup(setattr, slow_queries, "explain", explain)
+        recorder = SlowQueryRecorder()
+        recorder.slow = [
+            ("SELECT 1 FROM station_route WHERE id = %s", [1], False, "default", 1),
+            ("SELECT 2 FROM station_train WHERE id = %s", [2], False, "default", 1),
+        ]
+
+        recorder.save("test")
+        for function in self.explains:
+            function()
+
+        self.assertEqual(
+            explained,
+            [
+                (query.pk, "default", sql, params)
+                for query, (sql, params, *_) in zip(
+                    SlowQuery.objects.order_by("pk"), recorder.slow
+                )
+            ],
+        )
+
+    @override_settings(SLOW_QUERY_LOG_ENABLED=False)
+    def test_disabled(self):
+        self.client.get(ROUTE_URL)
+
+        self.assertFalse(SlowQuery.objects.exists())
+
+    def test_summary_command(self):
+        self.client.get(ROUTE_URL)
+        self.client.get(ROUTE_URL)
+
+        out = StringIO()
+        call_command("slow_queries", "--top", "3", stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertIn("fingerprint", lines[0])
+        self.assertIn("station:route-list", out.getvalue())
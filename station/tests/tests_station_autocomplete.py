@@ -0,0 +1,82 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station.autocomplete import StationIndex, reset_index
+from station.models import Station
+from train_station_api_service.schema import render_schema
+
+Station_AUTOCOMPLETE_URL = reverse("station:station-autocomplete")
+
+
+class StationIndexTests(TestCase):
+    def setUp(self):
+        self.index = StationIndex(
+            [
+                (1, "Київ-Пасажирський"),
+                (2, "Львів"),
+                (3, "Kyiv-Volynskyi"),
+                (4, "Одеса-Головна"),
+                (5, "Zaporizhzhia"),
+            ]
+        )
+
+    def _ids(self, query):
+        return [station["id"] for station in self.index.search(query)]
+
+    def test_prefix_with_case_and_accent_folding(self):
+        self.assertEqual(self._ids("ЛЬВ"), [2])
+        self.assertEqual(self._ids("киі"), [3, 1])
+
+    def test_latin_query_matches_cyrillic_name(self):
+        self.assertEqual(self._ids("kyiv"), [3, 1])
+        self.assertEqual(self._ids("odesa"), [4])
+
+    def test_word_prefix_inside_name(self):
+        self.assertEqual(self._ids("holovna"), [4])
+        self.assertEqual(self._ids("kyiv vol"), [3])
+
+    def test_typo_tolerance(self):
+        self.assertEqual(self._ids("odessa"), [4])
+        self.assertEqual(self._ids("zaporizhia"), [5])
+
+    def test_empty_query(self):
+        self.assertEqual(self._ids("  "), [])
+
+
+class StationAutocompleteApiTests(APITestCase):
+    def setUp(self):
+        reset_index()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="user@example.com", password="userpassword"
+            )
+        )
+        Station.objects.create(name="Львів", latitude=49.84, longitude=24.03)
+
+    def test_autocomplete_refreshes_on_station_change(self):
+        response = self.client.get(Station_AUTOCOMPLETE_URL, {"q": "lvi"})
+        self.assertEqual([station["name"] for station in response.data], ["Львів"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Station.objects.create(name="Lviv-Pidzamche", latitude=49.85, longitude=24.02)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(Station_AUTOCOMPLETE_URL, {"q": "lvi"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+    def test_schema_documents_suggestion_limit(self):
+        parameters = json.loads(render_schema())["paths"][
+            "/api/station/stations/autocomplete/"
+        ]["get"]["parameters"]
+        limit = next(
+            parameter for parameter in parameters if parameter["name"] == "limit"
+        )
+
+        self.assertIn("suggestions", limit["description"])
@@ -0,0 +1,135 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station import ticket_changes
+from station.models import Station, Route, TrainType, Train, Journey, Order, Ticket
+from train_station_api_service.schema import render_schema
+
+
+def departures_url(station_id):
+    return reverse("station:station-departures", args=[station_id])
+
+
+@override_settings(TICKET_TOKEN_KEY="test-ticket-token-key")
+class StationDeparturesApiTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.kyiv = Station.objects.create(name="Kyiv", latitude=50.45, longitude=30.52)
+        lviv = Station.objects.create(name="Lviv", latitude=49.84, longitude=24.03)
+        route = Route.objects.create(source=self.kyiv, destination=lviv, distance=540)
+        back_route = Route.objects.create(source=lviv, destination=self.kyiv, distance=540)
+        train_type = TrainType.objects.create(name="Intercity")
+        self.train = Train.objects.create(
+            name="Train 1", cargo_num=2, places_in_cargo=10, train_type=train_type
+        )
+
+        now = timezone.now()
+        self.next_journey = self._journey(route, now + timedelta(hours=1))
+        self.later_journey = self._journey(route, now + timedelta(hours=8))
+        self._journey(route, now - timedelta(hours=8))
+        self._journey(back_route, now + timedelta(hours=3))
+
+    def _journey(self, route, departure_time):
+        return Journey.objects.create(
+            route=route,
+            train=self.train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+
+    def test_upcoming_departures_with_seats(self):
+        Ticket.objects.create(
+            cargo=1,
+            seat=1,
+            journey=self.next_journey,
+            order=Order.objects.create(user=self.user),
+        )
+
+        response = self.client.get(departures_url(self.kyiv.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [departure["id"] for departure in response.data],
+            [self.next_journey.id, self.later_journey.id],
+        )
+        self.assertEqual(response.data[0]["seats_available"], 19)
+        self.assertEqual(response.data[0]["destination"], "Lviv")
+
+    def test_ticket_sale_invalidates_cached_board(self):
+        self.client.get(departures_url(self.kyiv.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(
+                cargo=1,
+                seat=1,
+                journey=self.next_journey,
+                order=Order.objects.create(user=self.user),
+            )
+
+        with self.assertNumQueries(2):
+            response = self.client.get(departures_url(self.kyiv.id))
+        self.assertEqual(response.data[0]["seats_available"], 19)
+
+    def test_order_invalidates_board_once(self):
+        invalidated = []
+        invalidate = ticket_changes.invalidate
+        ticket_changes.invalidate = lambda *args: invalidated.append(args)
+        self.addCleanup(setattr, ticket_changes, "invalidate", invalidate)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("station:order-list"),
+                {
+                    "tickets": [
+                        {"cargo": 1, "seat": seat, "journey": journey.id}
+                        for seat in (1, 2)
+                        for journey in (self.next_journey, self.later_journey)
+                    ]
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            invalidated,
+            [
+                ("departures", self.kyiv.id),
+                ("journey-list",),
+                ("fare-quotes", self.next_journey.id, self.later_journey.id),
+            ],
+        )
+
+    def test_cached_board_skips_journey_query(self):
+        self.client.get(departures_url(self.kyiv.id))
+
+        with self.assertNumQueries(1):
+            response = self.client.get(departures_url(self.kyiv.id), {"limit": 1})
+        self.assertEqual(len(response.data), 1)
+
+    def test_schema_documents_departure_limit(self):
+        paths = json.loads(render_schema())["paths"]
+
+        def limit_description(path):
+            return next(
+                parameter["description"]
+                for parameter in paths[path]["get"]["parameters"]
+                if parameter["name"] == "limit"
+            )
+
+        self.assertIn(
+            "departures",
+            limit_description("/api/station/stations/{id}/departures/"),
+        )
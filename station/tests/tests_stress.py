@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.utils import timezone
+
+from station.models import Station, Route, TrainType, Train, Journey, Order, Ticket
+from station.stress import (
+    LevelResult,
+    double_sold,
+    percentile,
+    run_level,
+    stress_users,
+)
+
+
+class LevelResultTests(SimpleTestCase):
+    def test_percentile(self):
+        values = [0.1 * index for index in range(1, 101)]
+
+        self.assertAlmostEqual(percentile(values, 0.99), 9.9)
+        self.assertAlmostEqual(percentile(values, 0.5), 5.0)
+        self.assertEqual(percentile([], 0.99), 0.0)
+
+    def test_only_5xx_fail(self):
+        result = LevelResult(concurrency=2, statuses=[201, 400, 429, 503])
+        self.assertTrue(result.ok)
+
+        result.statuses.append(500)
+        self.assertFalse(result.ok)
+        self.assertIn("failures=1", result.summary())
+
+    def test_shed_requests_are_left_out_of_latency(self):
+        result = LevelResult(
+            concurrency=2,
+            statuses=[201, 503, 503, 400],
+            latencies=[0.2, 0.001, 0.001, 0.1],
+        )
+
+        self.assertEqual(result.served_latencies, [0.2, 0.1])
+        self.assertIn("shed=2", result.summary())
+        self.assertIn("p50=  100.0ms", result.summary())
+
+
+def stress_journey():
+    route = Route.objects.create(
+        source=Station.objects.create(name="Kyiv", latitude=50, longitude=30),
+        destination=Station.objects.create(name="Lviv", latitude=49, longitude=24),
+        distance=540,
+    )
+    train = Train.objects.create(
+        name="Train 1",
+        cargo_num=1,
+        places_in_cargo=10,
+        train_type=TrainType.objects.create(name="Intercity"),
+    )
+    departure_time = timezone.now() + timedelta(days=1)
+    return Journey.objects.create(
+        route=route,
+        train=train,
+        departure_time=departure_time,
+        arrival_time=departure_time + timedelta(hours=5),
+    )
+
+
+class DoubleSoldTests(TestCase):
+    def test_detects_overlapping_sales(self):
+        journey = stress_journey()
+        order = Order.objects.create(
+            user=get_user_model().objects.create_user(
+                email="user@test.com", password="testpassword"
+            )
+        )
+        Ticket.objects.create(cargo=1, seat=1, journey=journey, order=order)
+        Ticket.objects.create(cargo=1, seat=2, journey=journey, order=order)
+        self.assertEqual(double_sold(journey), [])
+
+        # bulk_create skips the seat reservation in Ticket.save.
+        Ticket.objects.bulk_create(
+            [Ticket(cargo=1, seat=1, journey=journey, order=order)]
+        )
+        self.assertEqual(double_sold(journey), [(1, 1)])
+
+
+# The clients send Host: localhost, as the command does.
+@override_settings(
+    ALLOWED_HOSTS=["localhost"], TICKET_TOKEN_KEY="test-ticket-token-key"
+)
+class RunLevelTests(TransactionTestCase):
+    def test_two_clients(self):
+        journey = stress_journey()
+
+        result = run_level(
+            journey, stress_users(2), requests_per_client=3, hot_seats=1, hot_share=1
+        )
+
+        self.assertEqual(result.concurrency, 2)
+        self.assertEqual(len(result.statuses) + len(result.errors), 6)
+        self.assertEqual(len(result.latencies), len(result.statuses))
+        self.assertEqual(result.shed, 0)
+        self.assertEqual(result.double_sold, [])
+        self.assertEqual(result.sold, 1)
@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station.models import Station, Route, Crew, TrainType, Train, Journey
+from station.sync import SyncCursor, decode_cursor, encode_cursor
+
+SYNC_URL = reverse("station:sync")
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncApiTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.station_1 = Station.objects.create(
+            name="Kyiv", latitude=50.45, longitude=30.52
+        )
+        station_2 = Station.objects.create(name="Lviv", latitude=49.84, longitude=24.03)
+        route = Route.objects.create(
+            source=self.station_1, destination=station_2, distance=540
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        train = Train.objects.create(
+            name="Train 1", cargo_num=5, places_in_cargo=50, train_type=train_type
+        )
+        departure_time = timezone.now() + timedelta(days=1)
+        self.journey = Journey.objects.create(
+            route=route,
+            train=train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+
+    def _sync(self, since=None, **params):
+        if since:
+            params["since"] = since
+        return self.client.get(SYNC_URL, params)
+
+    def test_returns_only_changes_since_cursor(self):
+        first = self._sync()
+        self.assertEqual(len(first.data["stations"]), 2)
+        self.assertEqual(len(first.data["journeys"]), 1)
+        self.assertFalse(first.data["has_more"])
+
+        self.station_1.name = "Kyiv-Pasazhyrskyi"
+        self.station_1.save()
+        journey_id = self.journey.id
+        self.journey.delete()
+
+        second = self._sync(first.data["cursor"])
+
+        self.assertEqual(
+            [station["name"] for station in second.data["stations"]],
+            ["Kyiv-Pasazhyrskyi"],
+        )
+        self.assertEqual(second.data["routes"], [])
+        self.assertEqual(
+            [(row["type"], row["id"]) for row in second.data["deleted"]],
+            [("journey", journey_id)],
+        )
+
+        third = self._sync(second.data["cursor"])
+        self.assertEqual(third.data["stations"], [])
+        self.assertEqual(third.data["deleted"], [])
+        self.assertEqual(
+            decode_cursor(third.data["cursor"])[:3],
+            decode_cursor(second.data["cursor"])[:3],
+        )
+
+    def test_pages_cover_every_change_once(self):
+        seen = []
+        cursor = None
+        while True:
+            response = self._sync(cursor, limit=2)
+            for kind in ("stations", "routes", "trains", "journeys"):
+                seen.extend((kind, row["id"]) for row in response.data[kind])
+            cursor = response.data["cursor"]
+            if not response.data["has_more"]:
+                break
+
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_crew_change_marks_journey_updated(self):
+        cursor = self._sync().data["cursor"]
+        crew = Crew.objects.create(first_name="Ivan", last_name="Franko")
+        crew.journeys.add(self.journey)
+
+        response = self._sync(cursor)
+
+        self.assertEqual(response.data["journeys"][0]["crews"], [crew.id])
+
+    def test_invalid_cursor(self):
+        response = self._sync("not-a-cursor")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_cursor_requires_full_sync(self):
+        cursor = encode_cursor(SyncCursor(timezone.now() - timedelta(days=365), 0, 1))
+
+        response = self._sync(cursor)
+
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_quiet_data_does_not_expire_a_recent_cursor(self):
+        long_ago = timezone.now() - timedelta(days=365)
+        for model in (Station, Route, Train, Journey):
+            model.objects.update(updated_at=long_ago)
+        first = self._sync()
+        position = decode_cursor(first.data["cursor"])
+
+        second = self._sync(first.data["cursor"])
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(decode_cursor(second.data["cursor"])[:3], position[:3])
+        self.assertGreater(position.synced_at, position.changed_at)
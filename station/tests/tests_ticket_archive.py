@@ -0,0 +1,125 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station.events import broker
+from station.models import (
+    Station,
+    Route,
+    TrainType,
+    Train,
+    Journey,
+    Order,
+    Ticket,
+    TicketCheckIn,
+    ArchivedTicket,
+)
+
+Order_URL = reverse("station:order-list")
+Order_HISTORY_URL = reverse("station:order-history")
+
+
+class TicketArchiveTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+        station_1 = Station.objects.create(name="Kyiv", latitude=50.45, longitude=30.52)
+        station_2 = Station.objects.create(name="Lviv", latitude=49.84, longitude=24.03)
+        route = Route.objects.create(
+            source=station_1, destination=station_2, distance=540
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        train = Train.objects.create(
+            name="Train 1", cargo_num=5, places_in_cargo=50, train_type=train_type
+        )
+        now = timezone.now()
+        self.old_journey = Journey.objects.create(
+            route=route,
+            train=train,
+            departure_time=now - timedelta(days=60, hours=5),
+            arrival_time=now - timedelta(days=60),
+        )
+        self.new_journey = Journey.objects.create(
+            route=route,
+            train=train,
+            departure_time=now + timedelta(days=1),
+            arrival_time=now + timedelta(days=1, hours=5),
+        )
+        self.old_order = Order.objects.create(user=self.user)
+        self.old_tickets = [
+            Ticket.objects.create(
+                cargo=1, seat=seat, journey=self.old_journey, order=self.old_order
+            )
+            for seat in (1, 2, 3)
+        ]
+        TicketCheckIn.objects.create(
+            ticket=self.old_tickets[0],
+            checked_in_at=now - timedelta(days=60, hours=6),
+        )
+        self.new_ticket = Ticket.objects.create(
+            cargo=1,
+            seat=1,
+            journey=self.new_journey,
+            order=Order.objects.create(user=self.user),
+        )
+
+    def _archive(self):
+        call_command("archive_journeys", days=30, batch_size=2, stdout=StringIO())
+
+    def test_moves_only_finished_journeys(self):
+        self._archive()
+
+        self.assertEqual(
+            list(Ticket.objects.values_list("id", flat=True)), [self.new_ticket.id]
+        )
+        self.assertEqual(
+            sorted(ArchivedTicket.objects.values_list("id", flat=True)),
+            [ticket.id for ticket in self.old_tickets],
+        )
+        self.assertIsNotNone(
+            ArchivedTicket.objects.get(id=self.old_tickets[0].id).checked_in_at
+        )
+        self.assertFalse(TicketCheckIn.objects.exists())
+
+    def test_archived_journeys_are_announced_once(self):
+        published = []
+        original = broker.publish
+        broker.publish = published.append
+        self.addCleanup(setattr, broker, "publish", original)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._archive()
+
+        self.assertEqual(
+            published, [{"journey": self.old_journey.id, "type": "resync"}]
+        )
+
+    def test_archived_orders_stay_readable(self):
+        self._archive()
+
+        detail = self.client.get(
+            reverse("station:order-detail", args=[self.old_order.id])
+        )
+        history = self.client.get(Order_HISTORY_URL)
+
+        self.assertEqual(detail.status_code, status.HTTP_200_OK)
+        self.assertEqual(detail.data["tickets"], [])
+        self.assertEqual(
+            [ticket["seat"] for ticket in detail.data["archived_tickets"]], [1, 2, 3]
+        )
+        archived_order = next(
+            order
+            for order in history.data["results"]
+            if order["id"] == self.old_order.id
+        )
+        self.assertTrue(all(ticket["archived"] for ticket in archived_order["tickets"]))
+        self.assertEqual(len(archived_order["tickets"]), 3)
@@ -0,0 +1,175 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signing import BadSignature
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station.checks import check_ticket_token_key
+from station.models import (
+    Station,
+    Route,
+    TrainType,
+    Train,
+    Journey,
+    Order,
+    Ticket,
+    TicketCheckIn,
+)
+from station.tickets import make_ticket_token, verify_ticket_token
+
+Ticket_CHECK_IN_URL = reverse("station:ticket-check-in")
+
+
+@override_settings(TICKET_TOKEN_KEY="test-ticket-token-key")
+class TicketCheckInApiTests(APITestCase):
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            email="admin@example.com", password="adminpassword"
+        )
+        self.client.force_authenticate(self.admin_user)
+
+        station_1 = Station.objects.create(name="Kyiv", latitude=50.45, longitude=30.52)
+        station_2 = Station.objects.create(name="Lviv", latitude=49.84, longitude=24.03)
+        route = Route.objects.create(
+            source=station_1, destination=station_2, distance=540
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        train = Train.objects.create(
+            name="Train 1", cargo_num=5, places_in_cargo=50, train_type=train_type
+        )
+        departure_time = timezone.now()
+        journey = Journey.objects.create(
+            route=route,
+            train=train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+        order = Order.objects.create(user=self.admin_user)
+        self.tickets = [
+            Ticket.objects.create(cargo=2, seat=seat, journey=journey, order=order)
+            for seat in (1, 2)
+        ]
+
+    def test_token_round_trip(self):
+        ticket = self.tickets[0]
+        fields = verify_ticket_token(make_ticket_token(ticket))
+
+        self.assertEqual(
+            fields,
+            {
+                "ticket": ticket.id,
+                "journey": ticket.journey_id,
+                "order": ticket.order_id,
+                "cargo": 2,
+                "seat": 1,
+                "from_stop": 0,
+                "to_stop": 1,
+            },
+        )
+
+    def test_tampered_token_rejected(self):
+        token = make_ticket_token(self.tickets[0])
+        tampered = token[:-2] + ("AA" if token[-2:] != "AA" else "BB")
+
+        with self.assertRaises(BadSignature):
+            verify_ticket_token(tampered)
+
+    def test_bulk_check_in_keeps_earliest_scan(self):
+        scanned_at = timezone.now()
+        token = make_ticket_token(self.tickets[0])
+        payload = {
+            "scans": [
+                {"token": token, "scanned_at": scanned_at.isoformat()},
+                {
+                    "token": token,
+                    "scanned_at": (scanned_at - timedelta(minutes=5)).isoformat(),
+                },
+                {
+                    "token": make_ticket_token(self.tickets[1]),
+                    "scanned_at": scanned_at.isoformat(),
+                },
+                {"token": "bogus", "scanned_at": scanned_at.isoformat()},
+            ]
+        }
+
+        with self.assertNumQueries(2):
+            response = self.client.post(Ticket_CHECK_IN_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["checked_in"], 2)
+        self.assertEqual([error["index"] for error in response.data["rejected"]], [3])
+        self.assertEqual(
+            TicketCheckIn.objects.get(ticket=self.tickets[0]).checked_in_at,
+            scanned_at - timedelta(minutes=5),
+        )
+
+    def test_later_upload_keeps_first_check_in(self):
+        scanned_at = timezone.now()
+        token = make_ticket_token(self.tickets[0])
+        self.client.post(
+            Ticket_CHECK_IN_URL,
+            {"scans": [{"token": token, "scanned_at": scanned_at.isoformat()}]},
+            format="json",
+        )
+
+        conductor = get_user_model().objects.create_superuser(
+            email="conductor@example.com", password="conductorpassword"
+        )
+        self.client.force_authenticate(conductor)
+        for offset in (timedelta(minutes=10), -timedelta(minutes=3)):
+            self.client.post(
+                Ticket_CHECK_IN_URL,
+                {
+                    "scans": [
+                        {
+                            "token": token,
+                            "scanned_at": (scanned_at + offset).isoformat(),
+                        }
+                    ]
+                },
+                format="json",
+            )
+
+        check_in = TicketCheckIn.objects.get(ticket=self.tickets[0])
+        self.assertEqual(check_in.checked_in_at, scanned_at - timedelta(minutes=3))
+        self.assertEqual(check_in.checked_in_by, conductor)
+
+    @override_settings(TICKET_TOKEN_KEY=None)
+    def test_tokens_need_their_own_key(self):
+        with self.assertRaises(ImproperlyConfigured):
+            make_ticket_token(self.tickets[0])
+
+        self.assertEqual(
+            [warning.id for warning in check_ticket_token_key(None)],
+            ["station.W001"],
+        )
+
+    def test_tokens_are_only_shown_to_the_order_owner(self):
+        ticket = self.tickets[0]
+
+        orders = self.client.get(reverse("station:order-list")).data["results"]
+        journey = self.client.get(
+            reverse("station:journey-detail", args=[ticket.journey_id])
+        ).data
+        tickets = self.client.get(reverse("station:ticket-list")).data
+
+        self.assertEqual(
+            orders[0]["tickets"][0]["token"], make_ticket_token(ticket)
+        )
+        self.assertNotIn("token", journey["tickets"][0])
+        self.assertNotIn("token", tickets[0])
+
+    def test_check_in_requires_staff(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="user@example.com", password="userpassword"
+            )
+        )
+        response = self.client.post(Ticket_CHECK_IN_URL, {"scans": []}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
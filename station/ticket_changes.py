@@ -0,0 +1,53 @@
+"""Side effects of ticket changes, applied once per journey after commit.
+
+Every ticket save or delete makes the departure board of its route's source,
+the journey list and the fare quotes of its journey stale, and marks the
+availability origins of its journey. Inside batched(),
+as used by OrderSerializer.create, changes only collect journey ids and one
+callback handles the whole order after commit instead of a lookup per ticket.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import transaction
+
+from station.availability import mark_journeys_changed
+from station.invalidation import invalidate
+from station.models import Route
+
+_pending = ContextVar("pending_ticket_journeys", default=None)
+
+
+def journeys_changed(journey_ids):
+    station_ids = (
+        Route.objects.filter(journeys__in=journey_ids)
+        .values_list("source_id", flat=True)
+        .distinct()
+    )
+    invalidate("departures", *station_ids)
+    invalidate("journey-list")
+    invalidate("fare-quotes", *journey_ids)
+    mark_journeys_changed(journey_ids)
+
+
+def ticket_changed(journey_id):
+    pending = _pending.get()
+    if pending is not None:
+        pending.add(journey_id)
+    else:
+        transaction.on_commit(partial(journeys_changed, [journey_id]))
+
+
+@contextmanager
+def batched():
+    """Collect ticket changes in the block and apply them once on commit."""
+    journey_ids = set()
+    token = _pending.set(journey_ids)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+    if journey_ids:
+        transaction.on_commit(partial(journeys_changed, sorted(journey_ids)))
@@ -0,0 +1,73 @@
+"""Compact signed ticket tokens for offline validation.
+
+A token is the URL-safe base64 of a version byte, the packed ticket fields
+(ticket, journey, order, cargo, seat and the from_stop/to_stop leg) and a
+truncated HMAC-SHA256 over both. Stop positions stay below 63, so each packs
+into a byte.
+Conductor devices holding TICKET_TOKEN_KEY verify it without the database,
+so the key must be its own secret: tokens are never signed with SECRET_KEY.
+"""
+
+import hmac
+import struct
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signing import BadSignature
+from django.utils.crypto import salted_hmac
+
+TOKEN_VERSION = 2
+TOKEN_FIELDS = (
+    "ticket", "journey", "order", "cargo", "seat", "from_stop", "to_stop"
+)
+TOKEN_STRUCT = struct.Struct(">BQQQHHBB")
+SIGNATURE_LENGTH = 16
+
+
+def _signature(payload):
+    if not settings.TICKET_TOKEN_KEY:
+        raise ImproperlyConfigured(
+            "TICKET_TOKEN_KEY must be set to issue or verify ticket tokens."
+        )
+    return salted_hmac(
+        "station.ticket-token",
+        payload,
+        secret=settings.TICKET_TOKEN_KEY,
+        algorithm="sha256",
+    ).digest()[:SIGNATURE_LENGTH]
+
+
+def make_ticket_token(ticket):
+    payload = TOKEN_STRUCT.pack(
+        TOKEN_VERSION,
+        ticket.id,
+        ticket.journey_id,
+        ticket.order_id,
+        ticket.cargo,
+        ticket.seat,
+        ticket.from_stop,
+        ticket.to_stop,
+    )
+    return urlsafe_b64encode(payload + _signature(payload)).rstrip(b"=").decode()
+
+
+def verify_ticket_token(token):
+    """Return the ticket fields of a token or raise BadSignature."""
+    try:
+        raw = urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (TypeError, ValueError):
+        raise BadSignature("Malformed ticket token")
+
+    if len(raw) != TOKEN_STRUCT.size + SIGNATURE_LENGTH:
+        raise BadSignature("Malformed ticket token")
+
+    payload, signature = raw[: TOKEN_STRUCT.size], raw[TOKEN_STRUCT.size:]
+    if not hmac.compare_digest(signature, _signature(payload)):
+        raise BadSignature("Ticket token signature does not match")
+
+    version, *fields = TOKEN_STRUCT.unpack(payload)
+    if version != TOKEN_VERSION:
+        raise BadSignature("Unsupported ticket token version")
+
+    return dict(zip(TOKEN_FIELDS, fields))
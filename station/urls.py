@@ -9,6 +9,9 @@ from .views import (
     JourneyViewSet,
     OrderViewSet,
     TicketViewSet,
+    journey_events,
+    SyncView,
+    GtfsFeedView,
 )
 
 router = DefaultRouter()
@@ -22,6 +25,9 @@ router.register(r"orders", OrderViewSet, basename="order")
 router.register(r"tickets", TicketViewSet, basename="ticket")
 
 urlpatterns = [
+    path("journeys/<int:pk>/events/", journey_events, name="journey-events"),
+    path("sync/", SyncView.as_view(), name="sync"),
+    path("gtfs/", GtfsFeedView.as_view(), name="gtfs"),
     path("", include(router.urls)),
 ]
 
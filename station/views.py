@@ -1,12 +1,29 @@
+import asyncio
+import json
+from base64 import b64decode, b64encode
 from datetime import datetime
-
-from django.db.models import F, Count
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.signing import BadSignature
+from django.db import transaction
+from django.db.models import F, Count, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import make_aware
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
 
 from station.permissions import IsAdminOrIfAuthenticatedReadOnly
 
@@ -22,6 +39,9 @@ from station.models import (
     Journey,
     Order,
     Ticket,
+    TicketCheckIn,
+    ArchivedTicket,
+    SeatOccupancy,
 )
 from station.serializers import (
     StationSerializer,
@@ -39,7 +59,28 @@ from station.serializers import (
     OrderListSerializer,
     TrainImageSerializer,
     TrainDetailSerializer,
+    CrewRosterSerializer,
+    OrderHistorySerializer,
+    DepartureSerializer,
+    FareQuoteSerializer,
+    TicketCheckInSerializer,
+    StationAutocompleteSerializer,
+    SyncSerializer,
+    SeatAvailabilitySerializer,
+    StationAvailabilitySerializer,
 )
+from station.autocomplete import get_index
+from station.availability import lookup
+from station.coalescing import coalesce
+from station.journey_cache import get_journey_list, normalize_params
+from station.notify import ensure_listener
+from station.departures import get_departures
+from station.events import SEAT_FIELDS, broker
+from station.fares import get_quotes
+from station.gtfs import feed_etag, feed_versions, stream_feed
+from station.idempotency import IDEMPOTENCY_HEADER, idempotent_response
+from station.sync import CursorExpired, changes_since, decode_cursor
+from station.tickets import verify_ticket_token
 
 
 class StationViewSet(
@@ -53,6 +94,102 @@ class StationViewSet(
     serializer_class = StationSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
+    def get_queryset(self):
+        if self.action == "departures":
+            return Station.objects.all()
+
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.action == "departures":
+            return DepartureSerializer
+
+        if self.action == "autocomplete":
+            return StationAutocompleteSerializer
+
+        if self.action == "availability":
+            return StationAvailabilitySerializer
+
+        return super().get_serializer_class()
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "q",
+                type=OpenApiTypes.STR,
+                description="Start of a station name, typos and Latin spelling "
+                "allowed (e.g., ?q=kyiv)"
+            ),
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description="Number of suggestions (default 10, max 50)"
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False, url_path="autocomplete")
+    def autocomplete(self, request):
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 10
+        limit = min(max(limit, 1), 50)
+
+        suggestions = get_index().search(request.query_params.get("q", ""), limit)
+        serializer = self.get_serializer(suggestions, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description="Number of upcoming departures (default 20, max 100)"
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=True, url_path="departures")
+    def departures(self, request, pk=None):
+        station = self.get_object()
+        try:
+            limit = int(request.query_params.get("limit", 20))
+        except ValueError:
+            limit = 20
+        limit = min(max(limit, 1), settings.DEPARTURE_BOARD_MAX_ROWS)
+
+        serializer = self.get_serializer(get_departures(station.id, limit), many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "destination",
+                type=OpenApiTypes.INT,
+                description="Only trips to this station (ex. ?destination=4)",
+            ),
+            OpenApiParameter(
+                "date",
+                type=OpenApiTypes.DATE,
+                description="Only trips departing on this day (ex. ?date=2024-02-25)",
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=True, url_path="availability")
+    def availability(self, request, pk=None):
+        """Precomputed seats from this station per destination and day."""
+        try:
+            destination = request.query_params.get("destination")
+            destination = int(destination) if destination else None
+        except ValueError:
+            raise ValidationError({"destination": "Must be an integer"})
+        day = request.query_params.get("date")
+
+        computed_at, rows = lookup(pk, destination, day)
+        if computed_at is None:
+            raise NotFound("No availability computed for this station yet.")
+        serializer = self.get_serializer(rows, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
 class RouteViewSet(
     CreateModelMixin, ListModelMixin, RetrieveModelMixin, GenericViewSet
@@ -73,6 +210,9 @@ class RouteViewSet(
             source_ids = self._params_to_ints(source)
             queryset = queryset.filter(source_id__in=source_ids)
 
+        if self.action == "retrieve":
+            queryset = queryset.prefetch_related("stops__station")
+
         return queryset.distinct()
 
     def get_serializer_class(self):
@@ -94,6 +234,53 @@ class CrewViewSet(
     serializer_class = CrewSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
+    def get_serializer_class(self):
+        if self.action == "roster":
+            return CrewRosterSerializer
+
+        return super().get_serializer_class()
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.DATE,
+                description="Journeys arriving after this date (e.g., ?from=2024-11-13)"
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.DATE,
+                description="Journeys departing before this date (e.g., ?to=2024-11-20)"
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=True, url_path="roster")
+    def roster(self, request, pk=None):
+        crew = self.get_object()
+        journeys = (
+            Journey.objects.filter(crews=crew)
+            .select_related("train", "route__source", "route__destination")
+            .order_by("departure_time")
+        )
+        # The crew's journeys come from the crews join table's crew index;
+        # the bounds compare raw timestamps rather than __date so no row needs
+        # a timezone conversion.
+        for param, lookup in (
+            ("from", "arrival_time__gt"),
+            ("to", "departure_time__lt"),
+        ):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                bound = make_aware(datetime.strptime(value, "%Y-%m-%d"))
+            except ValueError:
+                raise ValidationError({param: "Expected a date as YYYY-MM-DD"})
+            journeys = journeys.filter(**{lookup: bound})
+
+        serializer = self.get_serializer(journeys, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
 class TrainTypeViewSet(
     CreateModelMixin,
@@ -172,20 +359,31 @@ class JourneyViewSet(
         if self.action == "retrieve":
             return JourneyDetailSerializer
 
+        if self.action == "quotes":
+            return FareQuoteSerializer
+
+        if self.action == "availability":
+            return SeatAvailabilitySerializer
+
         return super().get_serializer_class()
 
+    def create(self, request, *args, **kwargs):
+        # Validation locks the train and crews it checks until the insert.
+        with transaction.atomic():
+            return super(JourneyViewSet, self).create(request, *args, **kwargs)
+
     @staticmethod
     def _params_to_ints(qs):
         return [int(str_id) for str_id in qs.split(",")]
 
-    def get_queryset(self):
-        queryset = self.queryset
-        train = self.request.query_params.get("train")
-        departure_time = self.request.query_params.get("departure_time")
-        arrival_time = self.request.query_params.get("arrival_time")
+    @classmethod
+    def filter_journeys(cls, queryset, params):
+        train = params.get("train")
+        departure_time = params.get("departure_time")
+        arrival_time = params.get("arrival_time")
 
         if train:
-            train_ids = self._params_to_ints(train)
+            train_ids = cls._params_to_ints(train)
             queryset = queryset.filter(train__id__in=train_ids)
 
         if departure_time:
@@ -198,6 +396,14 @@ class JourneyViewSet(
 
         return queryset.distinct()
 
+    def get_queryset(self):
+        return self.filter_journeys(self.queryset, self.request.query_params)
+
+    @classmethod
+    def journey_list_data(cls, params):
+        queryset = cls.filter_journeys(cls.queryset.all(), params)
+        return JourneyListSerializer(queryset, many=True).data
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -217,9 +423,110 @@ class JourneyViewSet(
                 )
         ]
     )
+    @coalesce
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        params = normalize_params(request.query_params)
+        data = get_journey_list(params, partial(self.journey_list_data, params))
+        return Response(data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "journeys",
+                type={"type": "array", "items": {"type": "integer"}},
+                description="Journey IDs to price (e.g., ?journeys=2,5,8)"
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False, url_path="quotes")
+    @coalesce
+    def quotes(self, request):
+        try:
+            journey_ids = self._params_to_ints(request.query_params.get("journeys", ""))
+        except ValueError:
+            raise ValidationError({"journeys": "Expected comma separated journey IDs"})
+
+        if len(journey_ids) > settings.FARE_QUOTE_MAX_JOURNEYS:
+            raise ValidationError(
+                {
+                    "journeys": f"At most {settings.FARE_QUOTE_MAX_JOURNEYS} "
+                    f"journeys can be quoted at once"
+                }
+            )
 
+        quotes = get_quotes(journey_ids)
+        serializer = self.get_serializer(
+            [quotes[journey_id] for journey_id in journey_ids if journey_id in quotes],
+            many=True,
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="bulk",
+        permission_classes=[IsAdminUser],
+    )
+    def bulk_create(self, request):
+        serializer = self.get_serializer(data=request.data, many=True)
+
+        # Validation locks the trains and crews it checks until the insert.
+        with transaction.atomic():
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from_stop",
+                type=OpenApiTypes.INT,
+                description="Boarding stop number, 0 is the route source (default 0)"
+            ),
+            OpenApiParameter(
+                "to_stop",
+                type=OpenApiTypes.INT,
+                description="Alighting stop number (default: route destination)"
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=True, url_path="availability")
+    @coalesce
+    def availability(self, request, pk=None):
+        journey = (
+            Journey.objects.select_related("train", "route")
+            .prefetch_related("route__stops")
+            .filter(pk=pk)
+            .first()
+        )
+        if journey is None:
+            raise NotFound("No Journey matches the given query.")
+
+        try:
+            from_stop = int(request.query_params.get("from_stop", 0))
+            to_stop = int(
+                request.query_params.get("to_stop", journey.route.last_stop)
+            )
+        except ValueError:
+            raise ValidationError({"to_stop": "Stops must be integers"})
+        Ticket.validate_stops(from_stop, to_stop, journey.route, ValidationError)
+
+        taken = list(
+            SeatOccupancy.taken(journey.id, from_stop, to_stop)
+            .order_by("cargo", "seat")
+            .values("cargo", "seat")
+        )
+        serializer = self.get_serializer(
+            {
+                "journey": journey.id,
+                "from_stop": from_stop,
+                "to_stop": to_stop,
+                "capacity": journey.train.capacity,
+                "available": journey.train.capacity - len(taken),
+                "taken": taken,
+            }
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class OrderPagination(PageNumberPagination):
@@ -228,6 +535,74 @@ class OrderPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class OrderHistoryPagination(BasePagination):
+    """Keyset pagination over (user, created_at, id), newest first.
+
+    The cursor carries the last seen (created_at, id) pair, so every page is
+    an index range scan on order_user_created_idx without OFFSET or COUNT.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            created_at, pk = b64decode(encoded.encode()).decode().rsplit("|", 1)
+            created_at, pk = parse_datetime(created_at), int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+    def encode_cursor(self, created_at, pk):
+        return b64encode(f"{created_at.isoformat()}|{pk}".encode()).decode()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_page_size(request)
+        queryset = queryset.order_by("-created_at", "-id")
+
+        cursor = self.decode_cursor(request)
+        if cursor:
+            created_at, pk = cursor
+            queryset = queryset.filter(created_at__lte=created_at).filter(
+                Q(created_at__lt=created_at) | Q(id__lt=pk)
+            )
+
+        page = list(queryset.values("id", "created_at")[: self.limit + 1])
+        self.has_next = len(page) > self.limit
+        self.page = page[: self.limit]
+        return self.page
+
+    def get_paginated_response(self, data):
+        next_url = None
+        if self.has_next:
+            last = self.page[-1]
+            next_url = replace_query_param(
+                self.request.build_absolute_uri(),
+                self.cursor_query_param,
+                self.encode_cursor(last["created_at"], last["id"]),
+            )
+
+        return Response({"next": next_url, "results": data})
+
+
 class OrderViewSet(
     CreateModelMixin,
     ListModelMixin,
@@ -242,18 +617,98 @@ class OrderViewSet(
     def get_queryset(self):
         queryset = self.queryset.filter(user=self.request.user)
 
-        if self.action == "list":
-            queryset = queryset.prefetch_related(
-                "tickets__journey__train", "tickets__journey__crews"
-            )
+        if self.action in ("list", "retrieve"):
+            queryset = queryset.prefetch_related("tickets", "archived_tickets")
         return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
             return OrderListSerializer
 
+        if self.action == "history":
+            return OrderHistorySerializer
+
         return super().get_serializer_class()
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "cursor",
+                type=OpenApiTypes.STR,
+                description="Opaque cursor taken from the previous page's `next` link"
+            ),
+            OpenApiParameter(
+                "page_size",
+                type=OpenApiTypes.INT,
+                description="Orders per page (max 100)"
+            ),
+        ]
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="history",
+        pagination_class=OrderHistoryPagination,
+    )
+    def history(self, request):
+        page = self.paginate_queryset(Order.objects.filter(user=request.user))
+        orders = {order["id"]: {**order, "tickets": []} for order in page}
+
+        for model in (Ticket, ArchivedTicket):
+            tickets = (
+                model.objects.filter(order_id__in=list(orders))
+                .order_by("cargo", "seat")
+                .values(
+                    "id",
+                    "cargo",
+                    "seat",
+                    "order_id",
+                    "journey_id",
+                    "journey__departure_time",
+                    "journey__arrival_time",
+                    "journey__train__name",
+                    "journey__route__source__name",
+                    "journey__route__destination__name",
+                    "journey__cancelled_at",
+                )
+            )
+
+            for ticket in tickets:
+                orders[ticket["order_id"]]["tickets"].append(
+                    {
+                        "id": ticket["id"],
+                        "cargo": ticket["cargo"],
+                        "seat": ticket["seat"],
+                        "journey_id": ticket["journey_id"],
+                        "train": ticket["journey__train__name"],
+                        "source": ticket["journey__route__source__name"],
+                        "destination": ticket["journey__route__destination__name"],
+                        "departure_time": ticket["journey__departure_time"],
+                        "arrival_time": ticket["journey__arrival_time"],
+                        "archived": model is ArchivedTicket,
+                        "cancelled": ticket["journey__cancelled_at"] is not None,
+                    }
+                )
+
+        serializer = self.get_serializer(list(orders.values()), many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                IDEMPOTENCY_HEADER,
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.HEADER,
+                description="Client generated key; retries with the same key "
+                "replay the first response instead of booking again"
+            ),
+        ]
+    )
+    def create(self, request, *args, **kwargs):
+        return idempotent_response(
+            request, lambda: super(OrderViewSet, self).create(request, *args, **kwargs)
+        )
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -271,3 +726,196 @@ class TicketViewSet(
     )
     serializer_class = TicketSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+
+    def get_serializer_class(self):
+        if self.action == "check_in":
+            return TicketCheckInSerializer
+
+        return super().get_serializer_class()
+
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="check-in",
+        permission_classes=[IsAdminUser],
+    )
+    def check_in(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        scanned = {}
+        rejected = []
+        for index, scan in enumerate(serializer.validated_data["scans"]):
+            try:
+                ticket_id = verify_ticket_token(scan["token"])["ticket"]
+            except BadSignature as error:
+                rejected.append({"index": index, "error": str(error)})
+                continue
+            if ticket_id not in scanned or scan["scanned_at"] < scanned[ticket_id]:
+                scanned[ticket_id] = scan["scanned_at"]
+
+        existing = set(
+            Ticket.objects.filter(id__in=list(scanned)).values_list("id", flat=True)
+        )
+        check_ins = [
+            TicketCheckIn(
+                ticket_id=ticket_id,
+                checked_in_at=scanned_at,
+                checked_in_by=request.user,
+            )
+            for ticket_id, scanned_at in scanned.items()
+            if ticket_id in existing
+        ]
+        TicketCheckIn.record_earliest(check_ins)
+
+        return Response(
+            {
+                "checked_in": len(check_ins),
+                "unknown_tickets": sorted(set(scanned) - existing),
+                "rejected": rejected,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class SyncView(APIView):
+    """Changes to stations, routes, trains and journeys since a cursor.
+
+    Start without `since`, apply the page, then call again with the returned
+    cursor while `has_more` is true. Keep the last cursor for the next sync.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "since",
+                type=OpenApiTypes.STR,
+                description="Cursor returned by the previous sync",
+            ),
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description="Maximum number of changes in the page",
+            ),
+        ],
+        responses=SyncSerializer,
+    )
+    def get(self, request):
+        since = request.query_params.get("since")
+        try:
+            cursor = decode_cursor(since) if since else None
+        except ValueError:
+            raise ValidationError({"since": "Invalid cursor"})
+
+        try:
+            limit = int(request.query_params.get("limit", settings.SYNC_PAGE_SIZE))
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer"})
+        limit = min(max(limit, 1), settings.SYNC_MAX_PAGE_SIZE)
+
+        try:
+            changes = changes_since(cursor, limit, context={"request": request})
+        except CursorExpired:
+            return Response(
+                {"detail": "Cursor expired, sync again without `since`."},
+                status=status.HTTP_410_GONE,
+            )
+        return Response(changes)
+
+
+class GtfsFeedView(APIView):
+    """The whole timetable as a static GTFS zip, streamed as it is written.
+
+    The ETag changes only when a source table does, so feed consumers can
+    poll with If-None-Match.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(responses={(200, "application/zip"): OpenApiTypes.BINARY})
+    def get(self, request):
+        etag = feed_etag(feed_versions())
+        if request.headers.get("If-None-Match") == etag:
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        response = StreamingHttpResponse(stream_feed(), content_type="application/zip")
+        response["Content-Disposition"] = 'attachment; filename="gtfs.zip"'
+        response["ETag"] = etag
+        return response
+
+
+def _event_stream_user(request):
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    if authenticated is not None:
+        return authenticated[0]
+    return request.user if request.user.is_authenticated else None
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def journey_events(request, pk):
+    """Server-sent events with the seats taken on a journey.
+
+    Sends a "snapshot" of taken seats, then "taken"/"freed" deltas as orders
+    commit. Needs an ASGI server: WSGI would buffer the endless stream, so
+    it answers 501 there. A client whose stream falls behind gets a "resync"
+    event and the stream ends; reconnecting sends a fresh snapshot.
+    """
+    user = await sync_to_async(_event_stream_user)(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+    if not await Journey.objects.filter(pk=pk).aexists():
+        return JsonResponse(
+            {"detail": "No Journey matches the given query."},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "Seat events need the ASGI server."},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+    ensure_listener()
+
+    async def stream():
+        # Subscribe before reading the snapshot so no commit falls in between.
+        subscriber = broker.subscribe(pk)
+        _, queue = subscriber
+        try:
+            seats = [
+                dict(zip(SEAT_FIELDS, seat))
+                async for seat in Ticket.objects.filter(journey_id=pk)
+                .order_by("cargo", "seat", "from_stop")
+                .values_list(*SEAT_FIELDS)
+            ]
+            yield _sse("snapshot", {"journey": pk, "seats": seats})
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), settings.SEAT_EVENTS_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(event["type"], event)
+                if event["type"] == "resync":
+                    return
+        finally:
+            broker.unsubscribe(pk, subscriber)
+
+    return StreamingHttpResponse(
+        stream(),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,185 @@
+"""Run several API calls in one HTTP request.
+
+Sub-requests are dispatched straight to the resolved views in this process,
+reusing the user authenticated for the batch itself, so the JWT is decoded
+once and every call shares the request's database connection. Throttling
+still applies per sub-request.
+
+Sub-requests do not pass through the middleware stack: the batch request is
+profiled, logged for slow queries and load shed as a whole. A batch with a
+write in it takes an "orders" shedding slot, a read-only one is shed as
+"batch-read". Replica routing is decided per call from its own method and
+path; reads after a successful write in the same batch go to the primary,
+and the client is only pinned to the primary when a call wrote. Only JSON
+responses can be batched; streaming and other bodies come back as a per-item
+406.
+"""
+
+import json
+import logging
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import Resolver404, resolve
+from rest_framework import serializers, status
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_spectacular.utils import extend_schema
+
+from train_station_api_service.db_router import use_replica
+from train_station_api_service.middleware import ReplicaRoutingMiddleware
+
+logger = logging.getLogger(__name__)
+
+BATCH_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+
+
+class BatchItemSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=BATCH_METHODS, default="GET")
+    path = serializers.CharField()
+    headers = serializers.DictField(child=serializers.CharField(), default=dict)
+    body = serializers.JSONField(required=False)
+
+    def validate_path(self, value):
+        if not value.startswith(settings.BATCH_ALLOWED_PATH_PREFIXES):
+            raise serializers.ValidationError(
+                "Only station and user API paths can be batched"
+            )
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchItemSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f"At most {settings.BATCH_MAX_REQUESTS} requests per batch"
+            )
+        return value
+
+
+class BatchResultSerializer(serializers.Serializer):
+    status = serializers.IntegerField()
+    body = serializers.JSONField(allow_null=True)
+
+
+def build_subrequest(request, item):
+    url = urlsplit(item["path"])
+    body = b""
+    environ = {
+        key: value for key, value in request.META.items() if not key.startswith("HTTP_")
+    }
+    if "body" in item:
+        body = json.dumps(item["body"]).encode()
+        environ["CONTENT_TYPE"] = "application/json"
+    else:
+        environ.pop("CONTENT_TYPE", None)
+    environ.update(
+        {
+            "REQUEST_METHOD": item["method"],
+            "PATH_INFO": url.path,
+            "SCRIPT_NAME": "",
+            "QUERY_STRING": url.query,
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": BytesIO(body),
+        }
+    )
+    for name, value in item["headers"].items():
+        environ["HTTP_" + name.upper().replace("-", "_")] = value
+    environ["HTTP_HOST"] = request.get_host()
+
+    subrequest = WSGIRequest(environ)
+    # DRF skips its authenticators when these are set.
+    subrequest._force_auth_user = request.user
+    subrequest._force_auth_token = request.auth
+    return subrequest
+
+
+def run_subrequest(request, item):
+    try:
+        match = resolve(urlsplit(item["path"]).path)
+    except Resolver404:
+        return {"status": status.HTTP_404_NOT_FOUND, "body": {"detail": "Not found."}}
+    if iscoroutinefunction(match.func):
+        return {
+            "status": status.HTTP_400_BAD_REQUEST,
+            "body": {"detail": "Streaming endpoints can not be batched."},
+        }
+
+    try:
+        response = match.func(
+            build_subrequest(request, item), *match.args, **match.kwargs
+        )
+    except Exception:
+        logger.exception("Batched request to %s failed", item["path"])
+        return {
+            "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+            "body": {"detail": "Internal server error."},
+        }
+
+    if hasattr(response, "data"):
+        return {"status": response.status_code, "body": response.data}
+    if not response.streaming and response.get("Content-Type", "").startswith(
+        "application/json"
+    ):
+        try:
+            body = json.loads(response.content or b"null")
+        except ValueError:
+            pass
+        else:
+            return {"status": response.status_code, "body": body}
+    response.close()
+    return {
+        "status": status.HTTP_406_NOT_ACCEPTABLE,
+        "body": {"detail": "Only JSON responses can be batched."},
+    }
+
+
+class BatchView(APIView):
+    """Run up to BATCH_MAX_REQUESTS station/user API calls in order."""
+
+    permission_classes = (IsAuthenticated,)
+    # Each sub-request is throttled by its own view.
+    throttle_classes = ()
+
+    @staticmethod
+    def load_shedding_view_name(request, view_name):
+        """Only batches that write compete with orders for a slot."""
+        try:
+            items = json.loads(request.body)["requests"]
+            writes = any(
+                item.get("method", "GET") not in SAFE_METHODS for item in items
+            )
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return view_name
+        return view_name if writes else f"{view_name}-read"
+
+    @extend_schema(request=BatchSerializer, responses=BatchResultSerializer(many=True))
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = []
+        wrote = False
+        for item in serializer.validated_data["requests"]:
+            token = use_replica.set(
+                not wrote
+                and ReplicaRoutingMiddleware.reads_replica(
+                    request, item["method"], urlsplit(item["path"]).path
+                )
+            )
+            try:
+                result = run_subrequest(request, item)
+            finally:
+                use_replica.reset(token)
+            if item["method"] not in SAFE_METHODS and result["status"] < 400:
+                wrote = True
+            results.append(result)
+
+        request._request.replica_wrote = wrote
+        return Response(results)
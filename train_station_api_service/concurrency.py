@@ -0,0 +1,69 @@
+import threading
+from fnmatch import fnmatchcase
+
+
+class AdaptiveLimiter:
+    """Concurrency limit for one group of views, adapted to latency.
+
+    Requests finishing under ``latency_target`` grow the limit by one per
+    full window (additive increase); a slower request cuts it by
+    ``backoff`` (multiplicative decrease), never below ``min_limit``. While
+    the group is full, up to ``max_queue`` requests wait ``queue_timeout``
+    seconds for a slot; everything beyond that is rejected at once.
+    """
+
+    def __init__(
+        self,
+        name,
+        views,
+        limit,
+        min_limit=1,
+        max_limit=None,
+        latency_target=1.0,
+        backoff=0.9,
+        max_queue=0,
+        queue_timeout=0.0,
+    ):
+        self.name = name
+        self.views = tuple(views)
+        self.limit = float(limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit or limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.inflight = 0
+        self.waiting = 0
+        self._condition = threading.Condition()
+
+    def matches(self, view_name):
+        return any(fnmatchcase(view_name, pattern) for pattern in self.views)
+
+    def _has_slot(self):
+        return self.inflight < int(self.limit)
+
+    def acquire(self):
+        with self._condition:
+            if not self._has_slot():
+                if self.waiting >= self.max_queue or not self.queue_timeout:
+                    return False
+                self.waiting += 1
+                try:
+                    if not self._condition.wait_for(
+                        self._has_slot, timeout=self.queue_timeout
+                    ):
+                        return False
+                finally:
+                    self.waiting -= 1
+            self.inflight += 1
+            return True
+
+    def release(self, latency):
+        with self._condition:
+            self.inflight -= 1
+            if latency > self.latency_target:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+            elif self.limit < self.max_limit:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify()
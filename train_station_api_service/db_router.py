@@ -0,0 +1,29 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REPLICA_DB = "replica"
+
+use_replica = ContextVar("use_replica", default=False)
+
+
+class PrimaryReplicaRouter:
+    """Send reads to the replica only while ReplicaRoutingMiddleware allows it.
+
+    Everything outside a routed request (management commands, shell, writes,
+    pinned users) stays on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if use_replica.get() and settings.DATABASE_REPLICA_ENABLED:
+            return REPLICA_DB
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
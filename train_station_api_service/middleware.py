@@ -0,0 +1,135 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+
+from station.slow_queries import record
+from train_station_api_service.concurrency import AdaptiveLimiter
+from train_station_api_service.db_router import use_replica
+
+
+class ReplicaRoutingMiddleware:
+    """Route safe API reads to the replica with read-your-writes stickiness.
+
+    A client is identified by its Authorization header (or session cookie).
+    After a successful write the client is pinned to the primary for
+    DATABASE_REPLICA_PIN_SECONDS so it never reads a lagging replica. A view
+    that only knows after the fact whether it wrote, such as the batch view,
+    sets ``request.replica_wrote`` to decide the pin itself.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    @staticmethod
+    def pin_key(request):
+        identity = request.headers.get("Authorization") or request.COOKIES.get(
+            settings.SESSION_COOKIE_NAME
+        )
+        if not identity:
+            return None
+        return "db-pin:" + hashlib.sha256(identity.encode()).hexdigest()
+
+    @classmethod
+    def reads_replica(cls, request, method, path):
+        """Whether a ``method`` call to ``path`` by this client may read the
+        replica."""
+        if method not in SAFE_METHODS or not path.startswith(
+            settings.DATABASE_REPLICA_PATH_PREFIX
+        ):
+            return False
+        key = cls.pin_key(request)
+        return not (key and cache.get(key))
+
+    def __call__(self, request):
+        token = use_replica.set(
+            self.reads_replica(request, request.method, request.path)
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            use_replica.reset(token)
+
+        wrote = getattr(
+            request,
+            "replica_wrote",
+            request.method not in SAFE_METHODS and response.status_code < 400,
+        )
+        key = self.pin_key(request)
+        if key and wrote:
+            cache.set(key, True, timeout=settings.DATABASE_REPLICA_PIN_SECONDS)
+
+        return response
+
+
+class LoadSheddingMiddleware:
+    """Cap concurrent requests per group of views and shed the excess.
+
+    Groups come from LOAD_SHEDDING_GROUPS and match URL names such as
+    "station:order-*"; a view class can refine its name per request with a
+    ``load_shedding_view_name(request, view_name)`` method. A request over its
+    group's adaptive limit gets an immediate 503 with Retry-After instead of
+    queueing behind the database; views outside every group are never
+    limited. Limits are per process.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.limiters = [
+            AdaptiveLimiter(name, **options)
+            for name, options in settings.LOAD_SHEDDING_GROUPS.items()
+        ]
+
+    def limiter_for(self, request):
+        match = request.resolver_match
+        view_name = match.view_name
+        name_for = getattr(
+            getattr(match.func, "cls", None), "load_shedding_view_name", None
+        )
+        if name_for is not None:
+            view_name = name_for(request, view_name)
+        for limiter in self.limiters:
+            if limiter.matches(view_name):
+                return limiter
+        return None
+
+    def __call__(self, request):
+        request._shedding_limiter = None
+        started = time.monotonic()
+        response = self.get_response(request)
+        limiter = request._shedding_limiter
+        if limiter is not None:
+            limiter.release(time.monotonic() - started)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.LOAD_SHEDDING_ENABLED:
+            return None
+        limiter = self.limiter_for(request)
+        if limiter is None:
+            return None
+        if not limiter.acquire():
+            response = JsonResponse(
+                {"detail": "Service is busy, please retry shortly."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            response["Retry-After"] = str(settings.LOAD_SHEDDING_RETRY_AFTER)
+            return response
+        request._shedding_limiter = limiter
+        return None
+
+
+class SlowQueryMiddleware:
+    """Log queries slower than SLOW_QUERY_THRESHOLD_MS with their view name."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SLOW_QUERY_LOG_ENABLED:
+            return self.get_response(request)
+        return record(self.get_response, request)
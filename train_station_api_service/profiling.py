@@ -0,0 +1,246 @@
+"""Opt-in cProfile capture of single requests and a staff browser for them.
+
+A request is profiled when a staff user sends the PROFILING_HEADER header
+or when it falls in the PROFILING_SAMPLE_RATE sample. Profiles are written
+to PROFILING_DIR as pstats dumps with a JSON sidecar, newest
+PROFILING_MAX_FILES kept, and shown under /admin/profiles/ as a call tree
+and an icicle flamegraph.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID = re.compile(r"^\d+-[0-9a-f]{8}$")
+# Call tree branches below this share of the request time are folded away.
+MIN_NODE_FRACTION = 0.005
+MAX_TREE_DEPTH = 60
+
+
+def profiles_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def is_staff_request(request):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_staff:
+        return True
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return False
+    return bool(authenticated and authenticated[0].is_staff)
+
+
+def save_profile(profiler, request, response, elapsed):
+    directory = profiles_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profile_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+    profiler.dump_stats(directory / f"{profile_id}.prof")
+    (directory / f"{profile_id}.json").write_text(
+        json.dumps(
+            {
+                "id": profile_id,
+                "method": request.method,
+                "path": request.get_full_path(),
+                "status": response.status_code,
+                "duration_ms": round(elapsed * 1000, 1),
+            }
+        )
+    )
+
+    profiles = sorted(directory.glob("*.prof"))
+    for stale in profiles[: -settings.PROFILING_MAX_FILES]:
+        stale.unlink(missing_ok=True)
+        stale.with_suffix(".json").unlink(missing_ok=True)
+    return profile_id
+
+
+class ProfilingMiddleware:
+    """Profile requests that opt in; everything else passes straight through."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def should_profile(self, request):
+        if settings.PROFILING_HEADER in request.headers:
+            return is_staff_request(request)
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler already runs in this process.
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        elapsed = time.perf_counter() - started
+
+        try:
+            response["X-Profile-Id"] = save_profile(
+                profiler, request, response, elapsed
+            )
+        except OSError:
+            logger.exception("Could not store request profile")
+        return response
+
+
+def function_label(function):
+    filename, line, name = function
+    if filename == "~":
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def build_call_tree(stats):
+    """Expand pstats caller edges into a tree of (label, seconds, calls)."""
+    callees = {}
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, calls, _, cumulative) in callers.items():
+            callees.setdefault(caller, []).append((function, calls, cumulative))
+
+    roots = [
+        (function, row[1], row[3])
+        for function, row in stats.stats.items()
+        if not row[4]
+    ]
+    total = sum(cumulative for _, _, cumulative in roots) or 1e-9
+
+    def expand(function, calls, cumulative, path):
+        node = {
+            "label": function_label(function),
+            "seconds": cumulative,
+            "calls": calls,
+            "children": [],
+        }
+        if len(path) < MAX_TREE_DEPTH:
+            for child, child_calls, child_cumulative in sorted(
+                callees.get(function, ()), key=lambda edge: -edge[2]
+            ):
+                if child in path or child_cumulative < total * MIN_NODE_FRACTION:
+                    continue
+                node["children"].append(
+                    expand(child, child_calls, child_cumulative, path | {child})
+                )
+        return node
+
+    tree = [
+        expand(function, calls, cumulative, {function})
+        for function, calls, cumulative in sorted(roots, key=lambda root: -root[2])
+        if cumulative >= total * MIN_NODE_FRACTION
+    ]
+    return tree, total
+
+
+def flatten(tree, total):
+    """Rows for the call tree and the icicle chart, in depth-first order."""
+    rows = []
+
+    def visit(node, depth, left):
+        width = node["seconds"] / total * 100
+        rows.append(
+            {
+                "label": node["label"],
+                "ms": round(node["seconds"] * 1000, 2),
+                "calls": node["calls"],
+                "percent": round(width, 1),
+                "depth": depth,
+                "indent": depth * 16,
+                "top": depth * 18,
+                "left": round(left, 3),
+                "width": round(width, 3),
+            }
+        )
+        child_left = left
+        for child in node["children"]:
+            visit(child, depth + 1, child_left)
+            child_left += child["seconds"] / total * 100
+
+    left = 0.0
+    for root in tree:
+        visit(root, 0, left)
+        left += root["seconds"] / total * 100
+    return rows
+
+
+def load_metadata(profile_id):
+    if not PROFILE_ID.match(profile_id):
+        raise Http404("Unknown profile")
+    path = profiles_dir() / f"{profile_id}.json"
+    if not path.exists():
+        raise Http404("Unknown profile")
+    return json.loads(path.read_text())
+
+
+@staff_member_required
+def profile_list(request):
+    profiles = [
+        json.loads(path.read_text())
+        for path in sorted(profiles_dir().glob("*.json"), reverse=True)
+    ]
+    return render(request, "admin/profiles/list.html", {"profiles": profiles})
+
+
+@staff_member_required
+def profile_detail(request, profile_id):
+    metadata = load_metadata(profile_id)
+    stats = pstats.Stats(str(profiles_dir() / f"{profile_id}.prof"))
+    tree, total = build_call_tree(stats)
+    rows = flatten(tree, total)
+    top_functions = sorted(
+        (
+            {
+                "label": function_label(function),
+                "calls": row[1],
+                "own_ms": round(row[2] * 1000, 2),
+                "cumulative_ms": round(row[3] * 1000, 2),
+            }
+            for function, row in stats.stats.items()
+        ),
+        key=lambda function: -function["own_ms"],
+    )[:30]
+    return render(
+        request,
+        "admin/profiles/detail.html",
+        {
+            "profile": metadata,
+            "rows": rows,
+            "chart_height": (max((row["depth"] for row in rows), default=0) + 1) * 18,
+            "top_functions": top_functions,
+        },
+    )
+
+
+@staff_member_required
+def profile_download(request, profile_id):
+    load_metadata(profile_id)
+    return FileResponse(
+        open(profiles_dir() / f"{profile_id}.prof", "rb"),
+        as_attachment=True,
+        filename=f"{profile_id}.prof",
+    )
@@ -0,0 +1,66 @@
+import hashlib
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_safe
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.renderers import OpenApiJsonRenderer
+
+SchemaArtifact = namedtuple("SchemaArtifact", ("path", "content", "digest"))
+
+_artifact = None
+_lock = threading.Lock()
+
+
+def render_schema():
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return OpenApiJsonRenderer().render(schema, renderer_context={})
+
+
+def write_schema(path=None):
+    """Generate the OpenAPI document and store it with its content hash."""
+    path = Path(path or settings.OPENAPI_SCHEMA_FILE)
+    content = render_schema()
+    digest = hashlib.sha256(content).hexdigest()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    path.with_name(path.name + ".sha256").write_text(digest)
+    return SchemaArtifact(path, content, digest)
+
+
+def load_schema():
+    """The stored schema, read once per process and generated if missing."""
+    global _artifact
+    path = Path(settings.OPENAPI_SCHEMA_FILE)
+    artifact = _artifact
+    if artifact is None or artifact.path != path:
+        with _lock:
+            if _artifact is None or _artifact.path != path:
+                if path.exists():
+                    content = path.read_bytes()
+                    _artifact = SchemaArtifact(
+                        path, content, hashlib.sha256(content).hexdigest()
+                    )
+                else:
+                    _artifact = write_schema(path)
+            artifact = _artifact
+    return artifact
+
+
+def build_on_startup():
+    if settings.OPENAPI_SCHEMA_BUILD_ON_STARTUP:
+        threading.Thread(target=load_schema, name="openapi-schema", daemon=True).start()
+
+
+@require_safe
+@cache_control(public=True, max_age=settings.OPENAPI_SCHEMA_MAX_AGE)
+@condition(etag_func=lambda request: load_schema().digest)
+def schema_view(request):
+    return HttpResponse(
+        load_schema().content, content_type="application/vnd.oai.openapi+json"
+    )
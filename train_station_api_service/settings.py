@@ -34,6 +34,12 @@ ALLOWED_HOSTS = []
 
 INTERNAL_IPS = ["127.0.0.1"]
 
+# The debug toolbar instruments every request; it is on with DEBUG unless
+# DEBUG_TOOLBAR_ENABLED says otherwise, and never loaded when off.
+DEBUG_TOOLBAR_ENABLED = (
+    os.environ.get("DEBUG_TOOLBAR_ENABLED", str(DEBUG)).lower() == "true"
+)
+
 
 # Application definition
 
@@ -48,20 +54,29 @@ INSTALLED_APPS = [
     "api_user",
     "rest_framework",
     "drf_spectacular",
-    "debug_toolbar",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "train_station_api_service.middleware.LoadSheddingMiddleware",
+    "train_station_api_service.middleware.ReplicaRoutingMiddleware",
+    "train_station_api_service.middleware.SlowQueryMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    "train_station_api_service.profiling.ProfilingMiddleware",
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+if DEBUG_TOOLBAR_ENABLED:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.contrib.sessions.middleware.SessionMiddleware"),
+        "debug_toolbar.middleware.DebugToolbarMiddleware",
+    )
+
 ROOT_URLCONF = 'train_station_api_service.urls'
 
 TEMPLATES = [
@@ -104,6 +119,25 @@ DATABASES = {
     }
 }
 
+# Read replica for safe API requests. Routing is enabled only when
+# POSTGRES_REPLICA_HOST is set; tests run the alias as a mirror of default.
+DATABASE_REPLICA_ENABLED = bool(os.environ.get("POSTGRES_REPLICA_HOST"))
+
+DATABASES["replica"] = {
+    **DATABASES["default"],
+    "HOST": os.environ.get("POSTGRES_REPLICA_HOST", DATABASES["default"]["HOST"]),
+    "TEST": {"MIRROR": "default"},
+}
+
+DATABASE_ROUTERS = ["train_station_api_service.db_router.PrimaryReplicaRouter"]
+
+DATABASE_REPLICA_PATH_PREFIX = "/api/"
+
+# Seconds a client keeps reading from the primary after a write.
+# Pins are stored in the default cache, which must be shared between
+# workers (e.g. Redis/Memcached) for stickiness to hold across them.
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get("DATABASE_REPLICA_PIN_SECONDS", 5))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -175,6 +209,164 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+# Station departure boards are cached per station and dropped on journey or
+# ticket changes; the TTL only bounds how long departed trains linger.
+DEPARTURE_BOARD_CACHE_SECONDS = 30
+DEPARTURE_BOARD_MAX_ROWS = 100
+
+# Fare quotes are cached per journey; occupancy tiers are
+# (minimum share of sold seats, price multiplier), checked in order.
+FARE_QUOTE_CACHE_SECONDS = 60
+FARE_QUOTE_MAX_JOURNEYS = 500
+FARE_OCCUPANCY_MULTIPLIERS = (
+    (0.5, "1.10"),
+    (0.8, "1.30"),
+    (0.95, "1.60"),
+)
+
+# Key shared with conductor devices to verify ticket QR tokens offline. It is
+# required wherever tickets are rendered; SECRET_KEY is never used instead.
+TICKET_TOKEN_KEY = os.environ.get("TICKET_TOKEN_KEY")
+TICKET_CHECK_IN_MAX_SCANS = 5000
+
+# Idempotency-Key support for order creation: stored responses live for
+# IDEMPOTENCY_KEY_TTL seconds, duplicates of an in-flight request wait up to
+# IDEMPOTENCY_WAIT_SECONDS for its result. A key still in flight after
+# IDEMPOTENCY_IN_FLIGHT_SECONDS is treated as abandoned and taken over.
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+IDEMPOTENCY_WAIT_SECONDS = 5
+IDEMPOTENCY_IN_FLIGHT_SECONDS = 6 * IDEMPOTENCY_WAIT_SECONDS
+IDEMPOTENCY_POLL_INTERVAL = 0.1
+
+# Seconds before a worker rebuilds its in-memory station name index.
+# Local station changes reset it immediately.
+STATION_AUTOCOMPLETE_TTL = 300
+
+# The OpenAPI document is generated once (manage.py generate_schema, or on
+# first use) and served from this file with an ETag and long cache lifetime.
+OPENAPI_SCHEMA_FILE = BASE_DIR / "schema" / "openapi.json"
+OPENAPI_SCHEMA_MAX_AGE = 24 * 60 * 60
+OPENAPI_SCHEMA_BUILD_ON_STARTUP = (
+    os.environ.get("OPENAPI_SCHEMA_BUILD_ON_STARTUP", "false").lower() == "true"
+)
+
+# Process-local caches are evicted in every worker over pg_notify; deliveries
+# slower than this are logged. Each cache keeps its own TTL as a fallback.
+INVALIDATION_SLOW_SECONDS = 1.0
+
+# Station-pair availability matrix (manage.py precompute_availability):
+# days ahead it covers and worker processes it is computed with.
+AVAILABILITY_HORIZON_DAYS = 60
+AVAILABILITY_WORKERS = int(
+    os.environ.get("AVAILABILITY_WORKERS", os.cpu_count() or 1)
+)
+
+# Agency row of the GTFS export (manage.py export_gtfs, /api/station/gtfs/).
+GTFS_AGENCY = {
+    "id": "train-station",
+    "name": os.environ.get("GTFS_AGENCY_NAME", "Train Station"),
+    "url": os.environ.get("GTFS_AGENCY_URL", "http://localhost:8000"),
+    "timezone": TIME_ZONE,
+}
+
+# Queries slower than SLOW_QUERY_THRESHOLD_MS are stored as SlowQuery rows
+# (see manage.py slow_queries); a sample of slow SELECTs also gets an
+# EXPLAIN (ANALYZE, BUFFERS) plan from a side connection.
+SLOW_QUERY_LOG_ENABLED = (
+    os.environ.get("SLOW_QUERY_LOG_ENABLED", "true").lower() == "true"
+)
+SLOW_QUERY_THRESHOLD_MS = int(os.environ.get("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = 0.05
+SLOW_QUERY_RETENTION_DAYS = 14
+
+# Requests are profiled with cProfile when a staff user sends PROFILING_HEADER
+# or, for anyone, at PROFILING_SAMPLE_RATE (0 disables sampling). The newest
+# PROFILING_MAX_FILES profiles are kept and browsable at /admin/profiles/.
+PROFILING_HEADER = "X-Profile"
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_DIR = os.environ.get("PROFILING_DIR", BASE_DIR / "profiles")
+PROFILING_MAX_FILES = 200
+
+# Comment lines sent on idle /journeys/{id}/events/ streams to keep
+# proxies from closing them. The stream needs an ASGI server.
+SEAT_EVENTS_KEEPALIVE_SECONDS = 15
+
+# /sync/ holds back changes younger than SYNC_SETTLE_SECONDS so slow commits
+# are not skipped. Cursors older than the tombstone retention must resync.
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_PAGE_SIZE = 2000
+SYNC_SETTLE_SECONDS = 5
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+# /api/batch/ runs sub-requests in process; only these APIs can be batched.
+BATCH_MAX_REQUESTS = 20
+BATCH_ALLOWED_PATH_PREFIXES = ("/api/station/", "/api/user/")
+
+# archive_journeys moves tickets of journeys finished this long ago out of
+# station_ticket, TICKET_ARCHIVE_BATCH_SIZE rows per transaction.
+TICKET_ARCHIVE_AFTER_DAYS = 30
+TICKET_ARCHIVE_BATCH_SIZE = 5000
+
+# manage.py cancel_journey moves this many tickets per transaction.
+JOURNEY_CANCEL_BATCH_SIZE = 1000
+
+# Per-process concurrency limits by URL name. Each limit adapts between
+# min_limit and max_limit to keep requests under latency_target seconds;
+# requests beyond it get 503 with Retry-After. Batch sub-requests skip the
+# middleware, so a whole batch takes one "orders" slot if it writes and one
+# "journeys" slot ("batch-read") if it only reads.
+LOAD_SHEDDING_ENABLED = (
+    os.environ.get("LOAD_SHEDDING_ENABLED", "true").lower() == "true"
+)
+LOAD_SHEDDING_RETRY_AFTER = 2
+
+LOAD_SHEDDING_GROUPS = {
+    "orders": {
+        "views": ["station:order-*", "batch"],
+        "limit": 8,
+        "min_limit": 2,
+        "max_limit": 32,
+        "latency_target": 1.0,
+        "max_queue": 16,
+        "queue_timeout": 0.5,
+    },
+    "journeys": {
+        "views": [
+            "station:journey-list",
+            "station:journey-quotes",
+            "station:journey-availability",
+            "batch-read",
+        ],
+        "limit": 16,
+        "min_limit": 4,
+        "max_limit": 64,
+        "latency_target": 0.5,
+    },
+}
+
+# Identical concurrent journey searches share one computation; a waiting
+# request gives up after this long and runs the query itself.
+COALESCE_WAIT_SECONDS = 10
+
+# Journey list results are fresh for JOURNEY_LIST_FRESH_SECONDS, then served
+# stale for up to JOURNEY_LIST_STALE_SECONDS while one refresh runs.
+JOURNEY_LIST_FRESH_SECONDS = 15
+JOURNEY_LIST_STALE_SECONDS = 60
+
+# The journey list cache is per process, so each web worker warms its own
+# in the background on its first request when JOURNEY_CACHE_WARM_ON_STARTUP
+# is set, from JOURNEY_CACHE_WARM_LOGS (comma separated access log paths).
+# `manage.py warm_cache` takes the same defaults but only reaches the web
+# workers when CACHES points at a shared backend (Redis/Memcached).
+JOURNEY_CACHE_WARM_ON_STARTUP = (
+    os.environ.get("JOURNEY_CACHE_WARM_ON_STARTUP", "false").lower() == "true"
+)
+JOURNEY_CACHE_WARM_LOGS = [
+    path for path in os.environ.get("JOURNEY_CACHE_WARM_LOGS", "").split(",") if path
+]
+JOURNEY_CACHE_WARM_TOP = 50
+JOURNEY_CACHE_WARM_DAYS = 3
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=30),
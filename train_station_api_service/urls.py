@@ -15,19 +15,38 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
-import debug_toolbar
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
+
+from train_station_api_service.batch import BatchView
+from train_station_api_service.profiling import (
+    profile_detail,
+    profile_download,
+    profile_list,
+)
+from train_station_api_service.schema import schema_view
 
 urlpatterns = [
+    path("admin/profiles/", profile_list, name="profile-list"),
+    path("admin/profiles/<str:profile_id>/", profile_detail, name="profile-detail"),
+    path(
+        "admin/profiles/<str:profile_id>/download/",
+        profile_download,
+        name="profile-download",
+    ),
     path("admin/", admin.site.urls),
     path("api/station/", include("station.urls", namespace="station")),
     path("api/user/", include("api_user.urls", namespace="user")),
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("api/batch/", BatchView.as_view(), name="batch"),
+    path("api/schema/", schema_view, name="schema"),
     path("api/schema/swagger-ui/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
     path("api/schema/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
-    path("__debug__/", include(debug_toolbar.urls)),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+if settings.DEBUG_TOOLBAR_ENABLED:
+    import debug_toolbar
+
+    urlpatterns.append(path("__debug__/", include(debug_toolbar.urls)))